@@ -7,7 +7,12 @@ import logfire
 from ...tools.bybit.market_data import MarketDataTool
 from ...tools.charts import ChartGeneratorTool
 from ...tools.volatility import VolatilityCalculator
-from ...tools.charts.indicators import IndicatorCalculator
+from ...tools.indicators.store import FeatureStore
+from ...tools.volatility.service import VolatilityRegistry
+
+# Columns of the volume_profile indicator reported to the prompt
+VOLUME_LEVELS = ("VWAP", "VWAP_upper", "VWAP_lower", "POC", "VAH", "VAL")
+
 
 class MarketAnalyzer:
     """Handles market data analysis, chart generation and volatility calculations."""
@@ -15,17 +20,23 @@ class MarketAnalyzer:
     def __init__(self, 
                  market_data: MarketDataTool, 
                  chart_generator: ChartGeneratorTool,
-                 volatility_calculator: VolatilityCalculator):
+                 volatility_calculator: VolatilityCalculator,
+                 features: Optional[FeatureStore] = None,
+                 volatility: Optional[VolatilityRegistry] = None):
         """Initialize the market analyzer.
         
         Args:
             market_data: Service for market data operations
             chart_generator: Service for chart generation
             volatility_calculator: Service for volatility metrics
+            features: Feature store shared with charts, volatility and stop losses
+            volatility: Metrics published by the volatility service, used when current
         """
         self.market_data = market_data
         self.chart_generator = chart_generator
         self.volatility_calculator = volatility_calculator
+        self.features = features or chart_generator.features
+        self.volatility = volatility
 
     def analyze_market(self, symbol: str) -> Dict:
         """Perform complete market analysis for a symbol.
@@ -39,6 +50,7 @@ class MarketAnalyzer:
                 - timeframes: List of analyzed timeframes
                 - charts: Generated chart images
                 - volatility_metrics: Volatility analysis
+                - volume_levels: Session VWAP and volume profile levels by timeframe
         """
         try:
             with logfire.span("market_analysis") as span:
@@ -58,7 +70,7 @@ class MarketAnalyzer:
                 timeframe_data = self._fetch_timeframe_data(symbol, timeframes)
 
                 # Generate analysis results
-                volatility_metrics = self._calculate_volatility(timeframe_data)
+                volatility_metrics = self._calculate_volatility(timeframe_data, symbol)
                 if volatility_metrics:
                     logfire.info("Volatility metrics calculated",
                                symbol=symbol,
@@ -73,7 +85,8 @@ class MarketAnalyzer:
                     "current_price": current_price,
                     "timeframes": timeframes,
                     "charts": charts,
-                    "volatility_metrics": volatility_metrics
+                    "volatility_metrics": volatility_metrics,
+                    "volume_levels": self._volume_levels(timeframe_data)
                 }
 
                 logfire.info("Market analysis completed", 
@@ -99,20 +112,28 @@ class MarketAnalyzer:
                            symbol=symbol,
                            timeframes=timeframes)
 
+                # Fetch all timeframes at once (concurrently with the async client)
+                with logfire.span("fetch_klines"):
+                    fetched = self.market_data.fetch_timeframes(symbol, timeframes)
+
                 for timeframe in timeframes:
                     try:
                         with logfire.span(f"fetch_{timeframe}_data"):
-                            # Fetch raw data
-                            df = self.market_data.fetch_historical_data(symbol, timeframe)
+                            # Raw data, or the error raised while fetching it
+                            df = fetched[timeframe]
+                            if isinstance(df, Exception):
+                                raise df
                             
                             # Calculate indicators once
                             timeframe_config = self.chart_generator.config.get_timeframe_config(timeframe)
-                            calculator = IndicatorCalculator(df)
                             all_indicators = []
                             for view in timeframe_config.views:
                                 all_indicators.extend(view.indicators)
 
-                            df_with_indicators = calculator.calculate_all(all_indicators)
+                            # Computed once: the charts reuse this frame from the store
+                            df_with_indicators = self.features.indicators(
+                                symbol, timeframe_config, df, all_indicators
+                            )
                             timeframe_data[timeframe] = df_with_indicators
                             
                             logfire.info(f"Data fetched for {timeframe}",
@@ -144,11 +165,16 @@ class MarketAnalyzer:
                        error=str(e))
             raise
 
-    def _calculate_volatility(self, timeframe_data: Dict) -> Optional[Dict]:
+    def _calculate_volatility(self, timeframe_data: Dict, symbol: Optional[str] = None) -> Optional[Dict]:
         """Calculate volatility metrics for all timeframes."""
         try:
             with logfire.span("calculate_volatility"):
-                metrics = self.volatility_calculator.calculate_for_timeframes(timeframe_data)
+                metrics = None
+                if self.volatility is not None and symbol is not None:
+                    # Precomputed on the last candle close of every timeframe
+                    metrics = self.volatility.get(symbol, timeframe_data.keys())
+                if metrics is None:
+                    metrics = self.volatility_calculator.calculate_for_timeframes(timeframe_data, symbol)
                 
                 # Log detailed metrics for each timeframe
                 for timeframe, metric in metrics.metrics.items():
@@ -167,6 +193,18 @@ class MarketAnalyzer:
                        timeframes=list(timeframe_data.keys()))
             return None
 
+    def _volume_levels(self, timeframe_data: Dict) -> Dict[str, Dict[str, float]]:
+        """Latest VWAP and volume profile levels of the timeframes configured with them."""
+        levels = {}
+        for timeframe, df in timeframe_data.items():
+            if df.empty or not set(VOLUME_LEVELS).issubset(df.columns):
+                continue
+            last = df[list(VOLUME_LEVELS)].iloc[-1]
+            if last.isna().any():
+                continue
+            levels[timeframe] = {name: float(value) for name, value in last.items()}
+        return levels
+
     def _generate_charts(self, symbol: str, timeframes: List[str], timeframe_data: Dict) -> List[bytes]:
         """Generate technical analysis charts for each timeframe."""
         generated_charts = []
@@ -192,7 +230,9 @@ class MarketAnalyzer:
 
                         # Use DataFrame with pre-calculated indicators
                         df = timeframe_data[timeframe]
-                        timeframe_charts = self.chart_generator.create_charts_for_timeframe(df, timeframe)
+                        timeframe_charts = self.chart_generator.create_charts_for_timeframe(
+                            df, timeframe, symbol=symbol
+                        )
                         
                         if timeframe_charts:
                             generated_charts.extend(timeframe_charts)
@@ -0,0 +1,188 @@
+# aitrading/agents/planner/gate.py
+
+import hashlib
+import math
+import threading
+import time
+from typing import Dict, List, Optional
+
+import logfire
+from pydantic import BaseModel, Field
+
+from ...tools.bybit.market_data import MarketDataTool
+from ...tools.bybit.orders import OrdersTool
+from ...tools.volatility import VolatilityCalculator, TimeframeVolatility
+from ...tools.volatility.service import VolatilityRegistry
+
+
+class MarketState(BaseModel):
+    """Fingerprint of what a trading plan depends on, for one symbol."""
+    symbol: str
+    regimes: Dict[str, str] = Field(..., description="Volatility regime by timeframe")
+    direction_buckets: Dict[str, int] = Field(..., description="Direction score bucket by timeframe")
+    candles: Dict[str, int] = Field(..., description="Index of the current candle by timeframe")
+    price: float
+    atr: float = Field(..., description="ATR of the reference timeframe, to scale price moves")
+    positions: str = Field("", description="Digest of the open positions")
+    orders: str = Field("", description="Digest of the active orders")
+    taken_at: float = Field(default_factory=time.time)
+
+
+class PlanningDecision(BaseModel):
+    """Whether a symbol is planned this cycle, and why."""
+    symbol: str
+    replan: bool
+    reasons: List[str]
+    state: MarketState
+
+
+def _digest(items: List[tuple]) -> str:
+    return hashlib.sha1(repr(sorted(items)).encode()).hexdigest()[:16]
+
+
+class PlanningGate:
+    """Skips the charts and the LLM call while a symbol's market state is unchanged.
+
+    The state recorded at the last planning is compared with the current
+    one; a new plan is needed when any of these moved:
+    - the volatility regime of a timeframe;
+    - the direction score bucket (``direction_bucket`` points wide) of a timeframe;
+    - the price, by ``atr_move`` ATRs or more of ``atr_timeframe``;
+    - a new candle closed on one of the ``timeframes``;
+    - the open positions (side and size) or the active orders;
+    - ``max_age_minutes`` elapsed since the last plan.
+
+    Volatility metrics come from the volatility service when current, and
+    are computed otherwise (the candles fetched stay cached for the plan).
+    """
+
+    def __init__(self, market_data: MarketDataTool, orders: OrdersTool,
+                 calculator: Optional[VolatilityCalculator] = None,
+                 registry: Optional[VolatilityRegistry] = None,
+                 timeframes: Optional[List[str]] = None, atr_timeframe: str = "1H",
+                 atr_move: float = 0.5, direction_bucket: float = 25.0,
+                 max_age_minutes: float = 60.0):
+        self.market_data = market_data
+        self.orders = orders
+        self.calculator = calculator or VolatilityCalculator()
+        self.registry = registry
+        self.timeframes = timeframes or ["1H", "4H"]
+        self.atr_timeframe = atr_timeframe
+        self.atr_move = atr_move
+        self.direction_bucket = direction_bucket
+        self.max_age_minutes = max_age_minutes
+        self._planned: Dict[str, MarketState] = {}
+        self._lock = threading.Lock()
+
+    def _metrics(self, symbol: str, timeframes: List[str]) -> TimeframeVolatility:
+        if self.registry is not None:
+            published = self.registry.get(symbol, timeframes)
+            if published is not None:
+                return published
+
+        fetched = self.market_data.fetch_timeframes(symbol, timeframes)
+        for timeframe, df in fetched.items():
+            if isinstance(df, Exception):
+                raise df
+        return self.calculator.calculate_for_timeframes(fetched, symbol)
+
+    def _account(self, symbol: str, force_refresh: bool = False) -> Dict[str, str]:
+        positions = self.orders.get_positions(symbol, force_refresh=force_refresh)
+        orders = self.orders.get_active_orders(symbol)
+        return {
+            "positions": _digest([(p.side, p.size) for p in positions]),
+            "orders": _digest([(o.id, o.side, o.qty, o.price) for o in orders]),
+        }
+
+    def capture(self, symbol: str) -> MarketState:
+        """Current market state of a symbol."""
+        timeframes = list(dict.fromkeys(self.timeframes + [self.atr_timeframe]))
+        metrics = self._metrics(symbol, timeframes)
+        now_ms = int(time.time() * 1000)
+        candles = {
+            tf: now_ms // (self.market_data.config.get_timeframe_config(tf).minutes * 60_000)
+            for tf in self.timeframes
+        }
+        return MarketState(
+            symbol=symbol,
+            regimes={tf: metrics.metrics[tf].regime for tf in self.timeframes},
+            direction_buckets={
+                tf: math.floor(metrics.metrics[tf].direction_score / self.direction_bucket)
+                for tf in self.timeframes
+            },
+            candles=candles,
+            price=self.market_data.get_current_price(symbol),
+            atr=metrics.metrics[self.atr_timeframe].atr,
+            **self._account(symbol)
+        )
+
+    def compare(self, previous: Optional[MarketState], current: MarketState) -> List[str]:
+        """Reasons to plan again; empty when the state has not moved meaningfully."""
+        if previous is None:
+            return ["no previous plan"]
+
+        reasons = []
+        age_minutes = (current.taken_at - previous.taken_at) / 60
+        if age_minutes >= self.max_age_minutes:
+            reasons.append(f"last plan {age_minutes:.0f} minutes old")
+        for tf, regime in current.regimes.items():
+            if previous.regimes.get(tf) != regime:
+                reasons.append(f"{tf} regime {previous.regimes.get(tf)} -> {regime}")
+        for tf, bucket in current.direction_buckets.items():
+            if previous.direction_buckets.get(tf) != bucket:
+                reasons.append(f"{tf} direction moved to bucket {bucket}")
+        for tf, candle in current.candles.items():
+            if previous.candles.get(tf) != candle:
+                reasons.append(f"new {tf} candle")
+        if previous.atr > 0:
+            move = abs(current.price - previous.price) / previous.atr
+            if move >= self.atr_move:
+                reasons.append(f"price moved {move:.2f} ATR")
+        if previous.positions != current.positions:
+            reasons.append("positions changed")
+        if previous.orders != current.orders:
+            reasons.append("orders changed")
+        return reasons
+
+    def check(self, symbol: str) -> PlanningDecision:
+        """Decide whether ``symbol`` needs a new plan. Errors always lead to planning."""
+        with self._lock:
+            previous = self._planned.get(symbol)
+        try:
+            state = self.capture(symbol)
+        except Exception as e:
+            logfire.warning("Market state unavailable, planning anyway", symbol=symbol, error=str(e))
+            return PlanningDecision(symbol=symbol, replan=True, reasons=[f"state unavailable: {str(e)}"],
+                                    state=previous or MarketState(
+                                        symbol=symbol, regimes={}, direction_buckets={}, candles={},
+                                        price=0.0, atr=0.0, taken_at=0.0))
+
+        reasons = self.compare(previous, state)
+        if reasons:
+            logfire.info("Planning triggered", symbol=symbol, reasons=reasons)
+        else:
+            age_minutes = (state.taken_at - previous.taken_at) / 60
+            move = abs(state.price - previous.price) / previous.atr if previous.atr > 0 else 0.0
+            logfire.info("Planning skipped, market state unchanged", symbol=symbol,
+                         regimes=state.regimes, direction_buckets=state.direction_buckets,
+                         price_move_atr=round(move, 3), last_plan_minutes=round(age_minutes, 1))
+        return PlanningDecision(symbol=symbol, replan=bool(reasons), reasons=reasons, state=state)
+
+    def record(self, decision: PlanningDecision) -> None:
+        """Remember the state a plan was made on.
+
+        The account part is read again, so orders placed and positions changed
+        by the plan itself do not trigger the next cycle.
+        """
+        state = decision.state
+        if not state.regimes:
+            # Captured nothing: plan again next cycle
+            return
+        try:
+            state = state.model_copy(update=self._account(decision.symbol, force_refresh=True))
+        except Exception as e:
+            logfire.warning("Failed to refresh account state after planning",
+                            symbol=decision.symbol, error=str(e))
+            return
+        with self._lock:
+            self._planned[decision.symbol] = state
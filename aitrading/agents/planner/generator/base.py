@@ -1,4 +1,4 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from jinja2 import Template
 import logfire
 
@@ -8,6 +8,8 @@ from ....tools.bybit.orders import OrdersTool
 from ....tools.charts import ChartGeneratorTool
 from ....tools.redis.order_context import OrderContext
 from ....tools.volatility import VolatilityCalculator
+from ....tools.indicators.store import FeatureStore
+from ....tools.volatility.service import VolatilityRegistry
 from ....models.position import Position
 from ....models.orders import PlannedOrder, ExistingOrder
 
@@ -27,12 +29,16 @@ class PlanGenerator:
                  volatility_calculator: VolatilityCalculator,
                  order_context: OrderContext,
                  ai_client: Any,
-                 system_template: Template):
+                 system_template: Template,
+                 features: Optional[FeatureStore] = None,
+                 volatility: Optional[VolatilityRegistry] = None):
         """Initialize the plan generator with required components."""
         self.market_analyzer = MarketAnalyzer(
             market_data=market_data,
             chart_generator=chart_generator,
-            volatility_calculator=volatility_calculator
+            volatility_calculator=volatility_calculator,
+            features=features,
+            volatility=volatility
         )
         self.orders = orders
         self.ai_client = ai_client
@@ -81,6 +81,7 @@ class TemplateManager:
                     "position_limits": position_limits,
                     "atr_timeframe": params.stop_loss_config.get("timeframe") if params.stop_loss_config else "1H",
                     "volatility_metrics": volatility_metrics,
+                    "volume_levels": market_data.get("volume_levels", {}),
                     "current_datetime": datetime.now(timezone.utc).isoformat(),
                     # Add execution context parameters
                     "parameters": {
@@ -11,6 +11,8 @@ from ...tools.bybit.orders import OrdersTool
 from ...tools.charts import ChartGeneratorTool
 from ...tools.stop_loss import StopLossManager
 from ...tools.volatility import VolatilityCalculator
+from ...tools.indicators.store import FeatureStore
+from ...tools.volatility.service import VolatilityRegistry
 from ...tools.redis.order_context import OrderContext
 from ...models import TradingParameters, TradingPlan
 
@@ -19,12 +21,16 @@ class TradingPlanner:
                 chart_generator: ChartGeneratorTool, provider_name: str,
                 api_key: str, order_context: OrderContext,
                 vertex_params: Optional[Dict] = None,
-                stop_loss_manager: Optional[StopLossManager] = None
+                stop_loss_manager: Optional[StopLossManager] = None,
+                features: Optional[FeatureStore] = None,
+                volatility: Optional[VolatilityRegistry] = None
                 ) :
         self.market_data = market_data
         self.orders = orders
         self.chart_generator = chart_generator
-        self.volatility_calculator = VolatilityCalculator()
+        self.features = features
+        self.volatility = volatility
+        self.volatility_calculator = VolatilityCalculator(features=features)
         self.order_context = order_context
         self.stop_loss_manager = stop_loss_manager,
 
@@ -57,7 +63,9 @@ class TradingPlanner:
             volatility_calculator=self.volatility_calculator,
             order_context=self.order_context,
             ai_client=self.ai_client,
-            system_template=self.system_template
+            system_template=self.system_template,
+            features=self.features,
+            volatility=self.volatility
         )
         return generator.generate(params)
 
@@ -1,13 +1,27 @@
 # aitrading/container.py
 
 from dependency_injector import containers, providers
-from .tools.bybit.market_data import MarketDataTool
+from .tools.bybit.async_market_data import AsyncMarketDataTool
+from .tools.bybit.kline_cache import KlineCache
+from .tools.bybit.kline_store import KlineStore
+from .tools.bybit.backfill import KlineBackfill
+from .tools.bybit.stream import MarketDataStream
 from .tools.bybit.orders import OrdersTool
+from .tools.bybit.transport import BybitTransport, create_rate_limiter
+from .tools.bybit.tickers import TickerSnapshot
+from .tools.bybit.coalescing import RequestCoalescer
+from .tools.bybit.prefetch import CyclePrefetcher
 from .tools.charts import ChartGeneratorTool
+from .tools.indicators.incremental import IndicatorStateStore
+from .tools.indicators.store import FeatureStore
 from .tools.redis.provider import RedisProvider
 from .tools.redis.order_context import OrderContext
 from .tools.stop_loss import StopLossManager, StopLossConfig
+from .tools.volatility import VolatilityCalculator
+from .tools.volatility.service import VolatilityRegistry, VolatilityService
+from .tools.volatility.screener import VolatilityScreener
 from .agents.planner.planner import TradingPlanner
+from .agents.planner.gate import PlanningGate
 
 
 class Container(containers.DeclarativeContainer):
@@ -48,22 +62,232 @@ class Container(containers.DeclarativeContainer):
         )
     )
 
+    # Shared Bybit HTTP session: pooled connections and rate limiting
+    bybit_transport = providers.Singleton(
+        BybitTransport,
+        api_key=config.bybit.api_key,
+        api_secret=config.bybit.api_secret,
+        testnet=config.bybit.testnet,
+        limiter=providers.Callable(create_rate_limiter, config, redis_provider),
+        pool_connections=providers.Callable(
+            lambda config: config.get("transport", {}).get("pool_connections", 4),
+            config
+        ),
+        pool_maxsize=providers.Callable(
+            lambda config: config.get("transport", {}).get("pool_maxsize", 16),
+            config
+        ),
+        endpoint=providers.Callable(
+            lambda config: config.get("transport", {}).get("endpoint"),
+            config
+        ),
+        record_path=providers.Callable(
+            lambda config: config.get("transport", {}).get("record_path"),
+            config
+        )
+    )
+
+    # All linear tickers, fetched at most once per TTL
+    tickers = providers.Singleton(
+        TickerSnapshot,
+        session=bybit_transport.provided.session,
+        ttl=providers.Callable(
+            lambda config: config.get("market_data", {}).get("tickers", {}).get("ttl", 10.0),
+            config
+        )
+    )
+
+    # Closed-candle cache shared by all market data consumers
+    kline_cache = providers.Singleton(
+        KlineCache,
+        max_series=providers.Callable(
+            lambda config: config.get("market_data", {}).get("kline_cache", {}).get("max_series", 64),
+            config
+        ),
+        max_candles=providers.Callable(
+            lambda config: config.get("market_data", {}).get("kline_cache", {}).get("max_candles", 2000),
+            config
+        )
+    )
+
+    # On-disk candle archive for warm starts (optional)
+    kline_store = providers.Singleton(
+        lambda config: KlineStore(
+            root=config.get("market_data", {}).get("kline_store", {}).get("path", ".klines")
+        ) if config.get("market_data", {}).get("kline_store", {}).get("enabled", False) else None,
+        config
+    )
+
+    # Long histories fetched in concurrent pages, archived in the kline store
+    kline_backfill = providers.Singleton(
+        KlineBackfill,
+        session=bybit_transport.provided.session,
+        store=kline_store,
+        max_workers=providers.Callable(
+            lambda config: config.get("market_data", {}).get("backfill", {}).get("max_workers", 4),
+            config
+        )
+    )
+
+    # Shares identical market data requests made within a short window
+    market_data_coalescer = providers.Singleton(
+        lambda config: RequestCoalescer(
+            ttl=config.get("market_data", {}).get("coalescing", {}).get("ttl", 2.0)
+        ) if config.get("market_data", {}).get("coalescing", {}).get("enabled", True) else None,
+        config
+    )
+
+    # Indicator state updated per closed candle (optional), saved with the kline store
+    indicator_states = providers.Singleton(
+        lambda config: IndicatorStateStore(
+            root=config.get("market_data", {}).get("kline_store", {}).get("path", ".klines")
+            if config.get("market_data", {}).get("kline_store", {}).get("enabled", False) else None,
+            reanchor_candles=config.get("market_data", {}).get("indicators", {}).get("reanchor_candles", 100)
+        ) if config.get("market_data", {}).get("indicators", {}).get("incremental", False) else None,
+        config
+    )
+
+    # Indicator features computed once per candle window, shared by analysis,
+    # charts, volatility and stop losses
+    feature_store = providers.Singleton(
+        FeatureStore,
+        states=indicator_states
+    )
+
+    # Public WebSocket feed (optional)
+    market_stream = providers.Singleton(
+        lambda config: MarketDataStream(
+            testnet=config.get("bybit", {}).get("testnet", False),
+            url=config.get("market_data", {}).get("stream", {}).get("url"),
+            price_max_age=config.get("market_data", {}).get("stream", {}).get("price_max_age", 5.0),
+            kline_max_age=config.get("market_data", {}).get("stream", {}).get("kline_max_age", 60.0)
+        ) if config.get("market_data", {}).get("stream", {}).get("enabled", False) else None,
+        config
+    )
+
     # Tools
     market_data = providers.Singleton(
-        MarketDataTool,
+        AsyncMarketDataTool,
         api_key=config.bybit.api_key,
         api_secret=config.bybit.api_secret,
-        testnet=config.bybit.testnet
+        testnet=config.bybit.testnet,
+        kline_cache=kline_cache,
+        stream=market_stream,
+        session=bybit_transport.provided.session,
+        kline_store=kline_store,
+        tickers=tickers,
+        coalescer=market_data_coalescer,
+        max_concurrency=providers.Callable(
+            lambda config: config.get("market_data", {}).get("max_concurrency", 8),
+            config
+        )
     )
 
     orders = providers.Singleton(
         OrdersTool,
         api_key=config.bybit.api_key,
         api_secret=config.bybit.api_secret,
-        testnet=config.bybit.testnet
+        testnet=config.bybit.testnet,
+        session=bybit_transport.provided.session,
+        tickers=tickers,
+        positions_ttl=providers.Callable(
+            lambda config: config.get("market_data", {}).get("prefetch", {}).get("positions_ttl", 15.0),
+            config
+        ),
+        instruments_ttl=providers.Callable(
+            lambda config: config.get("market_data", {}).get("prefetch", {}).get("instruments_ttl", 3600.0),
+            config
+        )
     )
 
-    chart_generator = providers.Singleton(ChartGeneratorTool)
+    # Warms the caches ahead of each scheduler cycle (optional)
+    cycle_prefetcher = providers.Singleton(
+        lambda config, market_data, orders: CyclePrefetcher(
+            market_data=market_data,
+            orders=orders,
+            lead_seconds=config.get("market_data", {}).get("prefetch", {}).get("lead_seconds", 10.0)
+        ) if config.get("market_data", {}).get("prefetch", {}).get("enabled", True) else None,
+        config,
+        market_data,
+        orders
+    )
+
+    chart_generator = providers.Singleton(ChartGeneratorTool, features=feature_store)
+
+    # Latest volatility metrics per symbol, mirrored to Redis when enabled
+    volatility_registry = providers.Singleton(
+        VolatilityRegistry,
+        redis_provider=redis_provider,
+        grace_seconds=providers.Callable(
+            lambda config: config.get("market_data", {}).get("volatility", {}).get("grace_seconds", 60.0),
+            config
+        )
+    )
+
+    # Recomputes the volatility metrics on every candle close (optional)
+    volatility_service = providers.Singleton(
+        lambda config, market_data, registry, stream, features: VolatilityService(
+            market_data=market_data,
+            registry=registry,
+            calculator=VolatilityCalculator(features=features),
+            stream=stream,
+            # The stop loss timeframe and ATR period are published too
+            timeframes=list(dict.fromkeys(
+                market_data.get_analysis_timeframes() + [config.get("stop_loss", {}).get("timeframe", "1H")]
+            )),
+            atr_periods=[config.get("stop_loss", {}).get("atr_period", 14)],
+            close_delay=config.get("market_data", {}).get("volatility", {}).get("close_delay", 5.0)
+        ) if config.get("market_data", {}).get("volatility", {}).get("service", False) else None,
+        config,
+        market_data,
+        volatility_registry,
+        market_stream,
+        feature_store
+    )
+
+    # Ranks the symbol universe so only the best candidates are planned (optional)
+    volatility_screener = providers.Singleton(
+        lambda config, market_data, orders, tickers, registry, features: VolatilityScreener(
+            market_data=market_data,
+            orders=orders,
+            tickers=tickers,
+            calculator=VolatilityCalculator(features=features),
+            registry=registry,
+            timeframe=config.get("screener", {}).get("timeframe", "1H"),
+            top_n=config.get("screener", {}).get("top_n", 5),
+            min_opportunity=config.get("screener", {}).get("min_opportunity"),
+            min_natr=config.get("screener", {}).get("min_natr", 0.0),
+            universe=config.get("screener", {}).get("universe"),
+            min_turnover=config.get("screener", {}).get("min_turnover", 0.0),
+            max_universe=config.get("screener", {}).get("max_universe", 200)
+        ) if config.get("screener", {}).get("enabled", False) else None,
+        config,
+        market_data,
+        orders,
+        tickers,
+        volatility_registry,
+        feature_store
+    )
+
+    # Skips planning while the market state of a symbol is unchanged (optional)
+    planning_gate = providers.Singleton(
+        lambda config, market_data, orders, registry, features: PlanningGate(
+            market_data=market_data,
+            orders=orders,
+            calculator=VolatilityCalculator(features=features),
+            registry=registry,
+            timeframes=config.get("planning_gate", {}).get("timeframes", ["1H", "4H"]),
+            atr_timeframe=config.get("planning_gate", {}).get("atr_timeframe", "1H"),
+            atr_move=config.get("planning_gate", {}).get("atr_move", 0.5),
+            direction_bucket=config.get("planning_gate", {}).get("direction_bucket", 25.0),
+            max_age_minutes=config.get("planning_gate", {}).get("max_age_minutes", 60.0)
+        ) if config.get("planning_gate", {}).get("enabled", False) else None,
+        config,
+        market_data,
+        orders,
+        volatility_registry,
+        feature_store
+    )
 
     # Stop Loss Manager
     stop_loss_manager = providers.Singleton(
@@ -74,14 +298,17 @@ class Container(containers.DeclarativeContainer):
             lambda config: StopLossConfig(
                 timeframe=config.get("stop_loss", {}).get("timeframe", "1H"),
                 initial_multiplier=config.get("stop_loss", {}).get("initial_multiplier", 1.5),
-                in_profit_multiplier=config.get("stop_loss", {}).get("in_profit_multiplier", 2.0)
+                in_profit_multiplier=config.get("stop_loss", {}).get("in_profit_multiplier", 2.0),
+                atr_period=config.get("stop_loss", {}).get("atr_period", 14)
             ),
             config
         ),
         enabled=providers.Callable(
             lambda config: config.get("stop_loss", {}).get("enabled", True),
             config
-        )
+        ),
+        features=feature_store,
+        volatility=volatility_registry
     )
 
     # Order context manager
@@ -114,4 +341,6 @@ class Container(containers.DeclarativeContainer):
             config
         ),
         stop_loss_manager=stop_loss_manager,
+        features=feature_store,
+        volatility=volatility_registry,
     )
\ No newline at end of file
@@ -0,0 +1,118 @@
+# aitrading/tools/bybit/async_market_data.py
+
+import asyncio
+import concurrent.futures
+from typing import Coroutine, Dict, List, Optional, TypeVar, Union
+
+import pandas as pd
+from pybit.unified_trading import HTTP
+
+import logging
+
+from .kline_cache import KlineCache
+from .kline_store import KlineStore
+from .market_data import MarketDataTool
+from .stream import MarketDataStream
+from .tickers import TickerSnapshot
+from .coalescing import RequestCoalescer
+
+logger = logging.getLogger("trader")
+
+T = TypeVar("T")
+
+
+class AsyncMarketDataTool(MarketDataTool):
+    """MarketDataTool with asyncio variants fetching requests concurrently.
+
+    pybit's HTTP client is blocking, so each request runs in a worker thread
+    while the event loop waits on all of them. A semaphore bounds the number
+    of requests in flight, shared across symbols and timeframes of one call.
+    The synchronous ``fetch_timeframes`` and ``fetch_symbols`` use the same
+    concurrent path, so existing callers benefit without becoming async.
+    """
+
+    def __init__(self, api_key: str, api_secret: str, testnet: bool = False,
+                 kline_cache: Optional[KlineCache] = None,
+                 stream: Optional[MarketDataStream] = None,
+                 session: Optional[HTTP] = None,
+                 kline_store: Optional[KlineStore] = None,
+                 tickers: Optional[TickerSnapshot] = None,
+                 coalescer: Optional[RequestCoalescer] = None,
+                 max_concurrency: int = 8):
+        super().__init__(api_key, api_secret, testnet=testnet, kline_cache=kline_cache,
+                         stream=stream, session=session, kline_store=kline_store,
+                         tickers=tickers, coalescer=coalescer)
+        self.max_concurrency = max_concurrency
+
+    # Async variants
+
+    async def aget_current_price(self, symbol: str) -> float:
+        """Async variant of ``get_current_price``."""
+        return await asyncio.to_thread(self.get_current_price, symbol)
+
+    async def afetch_historical_data(self, symbol: str, timeframe: str,
+                                     semaphore: Optional[asyncio.Semaphore] = None) -> pd.DataFrame:
+        """Async variant of ``fetch_historical_data``."""
+        semaphore = semaphore or asyncio.Semaphore(self.max_concurrency)
+        async with semaphore:
+            return await asyncio.to_thread(self.fetch_historical_data, symbol, timeframe)
+
+    async def afetch_timeframes(self, symbol: str, timeframes: List[str],
+                                semaphore: Optional[asyncio.Semaphore] = None
+                                ) -> Dict[str, Union[pd.DataFrame, Exception]]:
+        """Fetch several timeframes of a symbol concurrently.
+
+        Returns:
+            Dict mapping each timeframe to its data, or to the exception
+            raised while fetching it
+        """
+        semaphore = semaphore or asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(
+            *(self.afetch_historical_data(symbol, timeframe, semaphore) for timeframe in timeframes),
+            return_exceptions=True
+        )
+        return dict(zip(timeframes, results))
+
+    async def afetch_symbols(self, symbols: List[str], timeframes: Optional[List[str]] = None
+                             ) -> Dict[str, Dict[str, Union[pd.DataFrame, Exception]]]:
+        """Fetch timeframes for several symbols concurrently.
+
+        Args:
+            symbols: Symbols to fetch
+            timeframes: Timeframes to fetch, defaults to the analysis timeframes
+
+        Returns:
+            Dict mapping each symbol to its ``afetch_timeframes`` result
+        """
+        timeframes = timeframes or self.get_analysis_timeframes()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(
+            *(self.afetch_timeframes(symbol, timeframes, semaphore) for symbol in symbols)
+        )
+        return dict(zip(symbols, results))
+
+    # Synchronous entry points
+
+    def fetch_timeframes(self, symbol: str, timeframes: List[str]) -> Dict[str, Union[pd.DataFrame, Exception]]:
+        """Fetch several timeframes of a symbol concurrently."""
+        return _run(self.afetch_timeframes(symbol, timeframes))
+
+    def fetch_symbols(self, symbols: List[str], timeframes: Optional[List[str]] = None
+                      ) -> Dict[str, Dict[str, Union[pd.DataFrame, Exception]]]:
+        """Fetch timeframes for several symbols concurrently."""
+        return _run(self.afetch_symbols(symbols, timeframes))
+
+
+def _run(coro: Coroutine[None, None, T]) -> T:
+    """Run a coroutine to completion from synchronous code.
+
+    When called from a thread that already runs an event loop, the coroutine
+    is run on a fresh loop in a helper thread instead of nesting loops.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
@@ -0,0 +1,128 @@
+# aitrading/tools/bybit/backfill.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import logfire
+
+from .kline_cache import find_gaps, split_forming
+from .kline_store import KlineStore
+from .market_data import MarketDataTool, decode_kline_rows
+
+
+def interval_minutes(interval: str) -> int:
+    """Minutes per candle of a Bybit kline interval (minutes or ``D``)."""
+    if interval == "D":
+        return 1440
+    if interval.isdigit():
+        return int(interval)
+    raise ValueError(f"Unsupported kline interval for backfill: {interval}")
+
+
+class KlineBackfill:
+    """Fetch long candle histories by splitting them into concurrent pages.
+
+    A range is cut into pages of at most ``MAX_KLINE_LIMIT`` candles, fetched
+    by a thread pool (requests still go through the session's rate limiter),
+    then stitched into one ascending, de-duplicated series. With a store,
+    ``backfill`` only fetches what the archive is missing and appends it.
+    """
+
+    def __init__(self, session, store: Optional[KlineStore] = None, max_workers: int = 4):
+        self.session = session
+        self.store = store
+        self.max_workers = max_workers
+
+    def pages(self, interval: str, start_ms: int, end_ms: int) -> List[Tuple[int, int]]:
+        """Split [start_ms, end_ms] into inclusive page ranges aligned to candle open times."""
+        step = interval_minutes(interval) * 60_000
+        first = start_ms + (-start_ms % step)
+        last = end_ms - end_ms % step
+        span = MarketDataTool.MAX_KLINE_LIMIT * step
+        return [(page_start, min(page_start + span - step, last))
+                for page_start in range(first, last + 1, span)]
+
+    def fetch(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> pd.DataFrame:
+        """Fetch every candle with open time in [start_ms, end_ms]."""
+        pages = self.pages(interval, start_ms, end_ms)
+        if not pages:
+            return MarketDataTool._empty_frame()
+
+        with logfire.span("kline_backfill") as span:
+            span.set_attributes({"symbol": symbol, "interval": interval, "pages": len(pages)})
+
+            if len(pages) == 1:
+                results = [self._fetch_page(symbol, interval, *pages[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pages))) as executor:
+                    results = list(executor.map(lambda page: self._fetch_page(symbol, interval, *page), pages))
+
+            timestamps = np.concatenate([r[0] for r in results])
+            values = np.concatenate([r[1] for r in results], axis=1)
+            # Pages are disjoint and already ascending, but the exchange may
+            # repeat a boundary candle: sort and dedupe defensively
+            timestamps, positions = np.unique(timestamps, return_index=True)
+            values = values[:, positions]
+
+            index = pd.DatetimeIndex(timestamps.view("datetime64[ms]"), name="timestamp")
+            data = pd.DataFrame(values.T, index=index,
+                                columns=["open", "high", "low", "close", "volume", "turnover"])
+
+            logfire.info("Backfill fetched", symbol=symbol, interval=interval,
+                         pages=len(pages), candles=len(data))
+            return data
+
+    def _fetch_page(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> Tuple[np.ndarray, np.ndarray]:
+        response = self.session.get_kline(
+            category="linear",
+            symbol=symbol,
+            interval=interval,
+            start=start_ms,
+            end=end_ms,
+            limit=MarketDataTool.MAX_KLINE_LIMIT,
+        )
+        if response["retCode"] != 0:
+            raise ValueError(f"API error: {response['retMsg']}")
+
+        rows = response["result"]["list"]
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty((6, 0), dtype=np.float64)
+        return decode_kline_rows(rows)
+
+    def backfill(self, symbol: str, interval: str, start_ms: int, end_ms: Optional[int] = None) -> int:
+        """Complete the archive over [start_ms, end_ms] with closed candles.
+
+        Only the parts the store is missing are fetched: before its first
+        candle, after its last one, and holes in between.
+
+        Returns:
+            Number of candles added to the store
+        """
+        if self.store is None:
+            raise ValueError("Backfill into the archive requires a kline store")
+
+        step = interval_minutes(interval) * 60_000
+        now_ms = int(time.time() * 1000)
+        end_ms = min(end_ms if end_ms is not None else now_ms, now_ms)
+
+        stored = self.store.read_array(symbol, interval, start_ms, end_ms)
+        if len(stored) == 0:
+            missing = [(start_ms, end_ms)]
+        else:
+            first, last = int(stored["timestamp"][0]), int(stored["timestamp"][-1])
+            index = pd.DatetimeIndex(stored["timestamp"].astype("datetime64[ms]"))
+            missing = [(start_ms, first - step)] + find_gaps(index, step) + [(last + step, end_ms)]
+            missing = [(lo, hi) for lo, hi in missing if hi >= lo]
+
+        added = 0
+        for lo, hi in missing:
+            data = self.fetch(symbol, interval, lo, hi)
+            closed, _ = split_forming(data, step, now_ms)
+            added += self.store.append(symbol, interval, closed)
+
+        logfire.info("Backfill completed", symbol=symbol, interval=interval,
+                     ranges=len(missing), added=added)
+        return added
@@ -0,0 +1,83 @@
+# aitrading/tools/bybit/coalescing.py
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class RequestCoalescer:
+    """Single-flight execution with short-lived result reuse.
+
+    Concurrent calls with the same key share one execution of the loader:
+    the first caller runs it, the others wait for its result. Results are
+    then reused for ``ttl`` seconds. Errors are propagated to every waiting
+    caller but never cached.
+    """
+
+    def __init__(self, ttl: float = 2.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "coalesced": 0, "misses": 0, "errors": 0}
+
+    def do(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the result for ``key``, running ``loader`` only if needed."""
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and time.time() - cached[0] < self.ttl:
+                self.stats["hits"] += 1
+                return cached[1]
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                leader = False
+            else:
+                future = self._in_flight[key] = Future()
+                self.stats["misses"] += 1
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = loader()
+        except BaseException as e:
+            with self._lock:
+                self.stats["errors"] += 1
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._results[key] = (time.time(), result)
+            del self._in_flight[key]
+            if len(self._results) > self.max_entries:
+                self._prune()
+        future.set_result(result)
+        return result
+
+    def _prune(self) -> None:
+        now = time.time()
+        for key in [k for k, (ts, _) in self._results.items() if now - ts >= self.ttl]:
+            del self._results[key]
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """Drop a reusable result, or all of them."""
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
+
+    def summary(self) -> Dict[str, int]:
+        """Coalescing counters, suitable for structured logging."""
+        with self._lock:
+            total = self.stats["hits"] + self.stats["coalesced"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "saved_ratio": round((self.stats["hits"] + self.stats["coalesced"]) / total, 3) if total else 0.0,
+            }
@@ -0,0 +1,129 @@
+# aitrading/tools/bybit/kline_cache.py
+
+from collections import OrderedDict
+from threading import RLock
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import logfire
+
+
+class KlineCache:
+    """In-memory store of closed candles per (symbol, interval).
+
+    Only closed candles are kept: the still-forming candle changes on every
+    tick and is always fetched fresh. Series are evicted in LRU order once
+    more than ``max_series`` are tracked, and each series is trimmed to its
+    most recent ``max_candles`` rows.
+    """
+
+    def __init__(self, max_series: int = 64, max_candles: int = 2000):
+        self.max_series = max_series
+        self.max_candles = max_candles
+        self._series: "OrderedDict[Tuple[str, str], pd.DataFrame]" = OrderedDict()
+        self._lock = RLock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, symbol: str, interval: str) -> Optional[pd.DataFrame]:
+        """Get cached closed candles, marking the series as recently used."""
+        key = (symbol, interval)
+        with self._lock:
+            df = self._series.get(key)
+            if df is None:
+                self.stats["misses"] += 1
+                return None
+            self._series.move_to_end(key)
+            self.stats["hits"] += 1
+            return df
+
+    def update(self, symbol: str, interval: str, closed: pd.DataFrame,
+               min_keep: Optional[int] = None) -> pd.DataFrame:
+        """Merge newly closed candles into the cached series.
+
+        Rows already present are replaced by the new ones, so a candle that was
+        re-fetched after closing always reflects the exchange's final values.
+        ``min_keep`` raises the per-series limit for callers that need a longer
+        history than ``max_candles``.
+        """
+        key = (symbol, interval)
+        with self._lock:
+            current = self._series.get(key)
+            if current is not None and not current.empty:
+                if closed.empty:
+                    merged = current
+                else:
+                    merged = pd.concat([current, closed])
+                    merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            else:
+                merged = closed.sort_index()
+
+            keep = max(self.max_candles, min_keep or 0)
+            if len(merged) > keep:
+                merged = merged.iloc[-keep:]
+
+            self._series[key] = merged
+            self._series.move_to_end(key)
+
+            while len(self._series) > self.max_series:
+                evicted, _ = self._series.popitem(last=False)
+                self.stats["evictions"] += 1
+                logfire.debug("Kline series evicted", symbol=evicted[0], interval=evicted[1])
+
+            return merged
+
+    def invalidate(self, symbol: Optional[str] = None, interval: Optional[str] = None) -> None:
+        """Drop cached series matching the given symbol and/or interval."""
+        with self._lock:
+            for key in list(self._series.keys()):
+                if (symbol is None or key[0] == symbol) and (interval is None or key[1] == interval):
+                    del self._series[key]
+
+    def keys(self) -> List[Tuple[str, str]]:
+        """List cached (symbol, interval) pairs."""
+        with self._lock:
+            return list(self._series.keys())
+
+    def summary(self) -> Dict[str, int]:
+        """Snapshot of cache counters, suitable for structured logging."""
+        with self._lock:
+            return {
+                **self.stats,
+                "series": len(self._series),
+                "candles": int(sum(len(df) for df in self._series.values())),
+            }
+
+    def memory_usage(self) -> int:
+        """Approximate memory held by cached candles, in bytes."""
+        with self._lock:
+            return int(sum(df.memory_usage(index=True).sum() for df in self._series.values()))
+
+
+def find_gaps(index: pd.DatetimeIndex, interval_ms: int) -> List[Tuple[int, int]]:
+    """Find missing candle ranges in a sorted candle index.
+
+    Returns:
+        List of (start_ms, end_ms) pairs, both inclusive, covering the open
+        times of the missing candles.
+    """
+    if len(index) < 2:
+        return []
+
+    timestamps = index.as_unit("ms").asi8
+    deltas = np.diff(timestamps)
+    gap_positions = np.nonzero(deltas > interval_ms)[0]
+
+    return [
+        (int(timestamps[i] + interval_ms), int(timestamps[i + 1] - interval_ms))
+        for i in gap_positions
+    ]
+
+
+def split_forming(df: pd.DataFrame, interval_ms: int, now_ms: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Split candles into closed ones and the still-forming one(s)."""
+    if df.empty:
+        return df, df
+    open_ms = df.index.as_unit("ms").asi8
+    forming_mask = open_ms + interval_ms > now_ms
+    return df[~forming_mask], df[forming_mask]
+
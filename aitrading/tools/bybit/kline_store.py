@@ -0,0 +1,184 @@
+# aitrading/tools/bybit/kline_store.py
+
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import logfire
+
+from .resample import OHLCV_COLUMNS
+
+# One fixed-size record per candle, so files can be appended to and
+# memory-mapped without any parsing
+KLINE_DTYPE = np.dtype([("timestamp", "<i8")] + [(col, "<f8") for col in OHLCV_COLUMNS])
+
+
+class KlineStore:
+    """On-disk archive of closed candles, one file per (symbol, interval).
+
+    Files live at ``<root>/<symbol>/<interval>.bin`` and hold ``KLINE_DTYPE``
+    records sorted by open time. New candles are appended; candles older than
+    the file's tail (e.g. backfilled gaps) trigger an atomic rewrite. Reads
+    memory-map the file, so ``read_array`` is zero-copy.
+
+    The store assumes a single writer process per root directory.
+    """
+
+    def __init__(self, root: str = ".klines"):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def path(self, symbol: str, interval: str) -> Path:
+        return self.root / symbol / f"{interval}.bin"
+
+    def symbols(self) -> List[str]:
+        """Symbols with at least one stored series."""
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir())
+
+    def intervals(self, symbol: str) -> List[str]:
+        """Intervals stored for a symbol."""
+        directory = self.root / symbol
+        if not directory.exists():
+            return []
+        return sorted(p.stem for p in directory.glob("*.bin"))
+
+    # Writing
+
+    def append(self, symbol: str, interval: str, df: pd.DataFrame) -> int:
+        """Store closed candles, ignoring those already present.
+
+        Returns:
+            Number of candles added
+        """
+        if df.empty:
+            return 0
+
+        records = to_records(df)
+        path = self.path(symbol, interval)
+
+        with self._lock:
+            stored = self._memmap(path)
+            if stored is None or len(stored) == 0:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                records = _dedupe(records)
+                self._write(path, records)
+                return len(records)
+
+            last = int(stored["timestamp"][-1])
+            first_new = int(records["timestamp"][0])
+
+            if first_new > last:
+                # Common case: only newer candles, plain append after the
+                # last whole record, dropping a partially written one
+                end = len(stored) * KLINE_DTYPE.itemsize
+                del stored
+                with open(path, "r+b") as f:
+                    if f.seek(0, os.SEEK_END) != end:
+                        logfire.warning("Truncating partial record in kline archive",
+                                        symbol=symbol, interval=interval)
+                        f.truncate(end)
+                    f.seek(end)
+                    f.write(records.tobytes())
+                return len(records)
+
+            # Older or overlapping candles: merge, keeping stored values
+            known = np.isin(records["timestamp"], stored["timestamp"])
+            missing = records[~known]
+            if len(missing) == 0:
+                return 0
+
+            merged = np.concatenate([np.asarray(stored), missing])
+            merged = _dedupe(merged[np.argsort(merged["timestamp"], kind="stable")])
+            del stored
+            self._write(path, merged)
+            logfire.debug("Kline archive rewritten", symbol=symbol, interval=interval,
+                          added=len(missing), total=len(merged))
+            return len(missing)
+
+    @staticmethod
+    def _write(path: Path, records: np.ndarray) -> None:
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(records.tobytes())
+        os.replace(tmp, path)
+
+    # Reading
+
+    @staticmethod
+    def _memmap(path: Path) -> Optional[np.ndarray]:
+        if not path.exists():
+            return None
+        size = path.stat().st_size
+        # Ignore a partially written trailing record
+        count = size // KLINE_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=KLINE_DTYPE)
+        return np.memmap(path, dtype=KLINE_DTYPE, mode="r", shape=(count,))
+
+    def read_array(self, symbol: str, interval: str, start_ms: Optional[int] = None,
+                   end_ms: Optional[int] = None) -> np.ndarray:
+        """Candles with open time in [start_ms, end_ms] as a read-only record array.
+
+        The result is a view on the memory-mapped file: nothing is copied.
+        """
+        stored = self._memmap(self.path(symbol, interval))
+        if stored is None:
+            return np.empty(0, dtype=KLINE_DTYPE)
+
+        timestamps = stored["timestamp"]
+        lo = 0 if start_ms is None else int(np.searchsorted(timestamps, start_ms, side="left"))
+        hi = len(stored) if end_ms is None else int(np.searchsorted(timestamps, end_ms, side="right"))
+        return stored[lo:hi]
+
+    def read(self, symbol: str, interval: str, start_ms: Optional[int] = None,
+             end_ms: Optional[int] = None, last: Optional[int] = None) -> pd.DataFrame:
+        """Candles with open time in [start_ms, end_ms] as a kline DataFrame.
+
+        Args:
+            symbol: Trading symbol
+            interval: Bybit kline interval
+            start_ms: Earliest open time, inclusive
+            end_ms: Latest open time, inclusive
+            last: Only return the most recent ``last`` candles of the range
+        """
+        records = self.read_array(symbol, interval, start_ms, end_ms)
+        if last is not None:
+            records = records[-last:] if last else records[:0]
+        return from_records(records)
+
+    def last_timestamp(self, symbol: str, interval: str) -> Optional[int]:
+        """Open time of the newest stored candle, in ms."""
+        stored = self._memmap(self.path(symbol, interval))
+        if stored is None or len(stored) == 0:
+            return None
+        return int(stored["timestamp"][-1])
+
+
+def to_records(df: pd.DataFrame) -> np.ndarray:
+    """Convert a kline DataFrame to sorted ``KLINE_DTYPE`` records."""
+    records = np.empty(len(df), dtype=KLINE_DTYPE)
+    records["timestamp"] = df.index.as_unit("ms").asi8
+    for col in OHLCV_COLUMNS:
+        records[col] = df[col].to_numpy(dtype=np.float64)
+    if len(records) > 1 and np.any(np.diff(records["timestamp"]) < 0):
+        records = records[np.argsort(records["timestamp"], kind="stable")]
+    return records
+
+
+def from_records(records: np.ndarray) -> pd.DataFrame:
+    """Build a kline DataFrame from ``KLINE_DTYPE`` records."""
+    index = pd.DatetimeIndex(records["timestamp"].astype("datetime64[ms]"), name="timestamp")
+    return pd.DataFrame({col: np.array(records[col]) for col in OHLCV_COLUMNS}, index=index)
+
+
+def _dedupe(records: np.ndarray) -> np.ndarray:
+    """Drop records sharing an open time with the previous one (input sorted)."""
+    if len(records) < 2:
+        return records
+    keep = np.r_[True, records["timestamp"][1:] != records["timestamp"][:-1]]
+    return records[keep]
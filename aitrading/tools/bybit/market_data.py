@@ -1,14 +1,23 @@
 # aitrading/tools/bybit/market_data.py
 
-from typing import Dict, List
+from typing import Dict, List, Optional, Union
+import threading
+import time
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
 from pybit.unified_trading import HTTP
 from ..charts.config import TimeframesConfiguration
 
 import logging
 
 from ..charts.models import TimeframeConfig
+from ..charts.lookback import LookbackPlanner
+from .kline_cache import KlineCache, find_gaps, split_forming
+from .kline_store import KlineStore
+from .resample import resample_ohlcv, compare_candles
+from .stream import MarketDataStream
+from .tickers import TickerSnapshot, get_ticker_price
+from .coalescing import RequestCoalescer
 
 logger = logging.getLogger("trader")
 
@@ -16,9 +25,33 @@ logger = logging.getLogger("trader")
 class MarketDataTool:
     """Tool for fetching market data from Bybit."""
 
-    def __init__(self, api_key: str, api_secret: str, testnet: bool = False):
-        self.session = HTTP(testnet=testnet, api_key=api_key, api_secret=api_secret)
+    # Bybit returns at most this many candles per kline request
+    MAX_KLINE_LIMIT = 1000
+
+    def __init__(self, api_key: str, api_secret: str, testnet: bool = False,
+                 kline_cache: Optional[KlineCache] = None,
+                 stream: Optional[MarketDataStream] = None,
+                 session: Optional[HTTP] = None,
+                 kline_store: Optional[KlineStore] = None,
+                 tickers: Optional[TickerSnapshot] = None,
+                 coalescer: Optional[RequestCoalescer] = None):
+        # A shared session (see BybitTransport) pools connections and rate limits
+        self.session = session or HTTP(testnet=testnet, api_key=api_key, api_secret=api_secret)
         self.config = TimeframesConfiguration()
+        self.kline_cache = kline_cache if kline_cache is not None else KlineCache()
+        self.stream = stream
+        self.kline_store = kline_store
+        self.tickers = tickers
+        self.coalescer = coalescer
+        self.resampling = self.config.get_resampling_config()
+        self.lookback = LookbackPlanner(self.config)
+        # Timeframe -> base timeframe it is built from (bases map to themselves)
+        self._resampled_from = self._plan_resampling()
+        self._base_snapshots: Dict[tuple, tuple] = {}
+        self._derivations: Dict[tuple, int] = {}
+        self._diverged: set = set()
+        # Timeframes may be fetched concurrently: one base fetch serves them all
+        self._base_lock = threading.RLock()
 
     def get_analysis_timeframes(self) -> List[str]:
         """Get all available analysis timeframes."""
@@ -31,65 +64,413 @@ class MarketDataTool:
             logger.error(f"Error getting timeframes: {str(e)}")
             raise
 
-    def get_current_price(self, symbol: str) -> float:
-        """Get current market price."""
+    def get_current_price(self, symbol: str, force_refresh: bool = False) -> float:
+        """Get current market price.
+
+        Served from the WebSocket feed when it is fresh, otherwise from the
+        ticker snapshot (or a single-symbol request without one).
+        """
+        if self.stream is not None:
+            self.stream.ensure_ticker(symbol)
+            price = self.stream.get_last_price(symbol)
+            if price is not None:
+                return price
+
         try:
-            response = self.session.get_tickers(category="linear", symbol=symbol)
-            return float(response["result"]["list"][0]["lastPrice"])
+            if self.coalescer is not None and not force_refresh:
+                return self.coalescer.do(
+                    ("price", symbol),
+                    lambda: get_ticker_price(self.tickers, self.session, symbol)
+                )
+            return get_ticker_price(self.tickers, self.session, symbol, force_refresh=force_refresh)
         except Exception as e:
             raise Exception(f"Error fetching price: {str(e)}")
 
     def fetch_historical_data(self, symbol: str, timeframe: str) -> pd.DataFrame:
-        """Fetch historical market data for specified timeframe."""
+        """Fetch historical market data for specified timeframe.
+
+        Closed candles are served from the kline cache; only the candles that
+        closed since the last call and the still-forming one are requested.
+        When resampling is enabled, the configured timeframes are built from
+        their group's base timeframe instead of being fetched.
+        """
         logger.debug(f"Fetching data for {symbol} on {timeframe} timeframe")
         try:
             # Get timeframe configuration
             tf_config = self.config.get_timeframe_config(timeframe)
             logger.debug(f"Using interval: {tf_config.interval} for timeframe: {timeframe}")
 
-            # Get data from Bybit
+            if self.coalescer is not None:
+                # Identical requests in flight or just served share one result;
+                # each caller gets its own copy to modify
+                data = self.coalescer.do(
+                    ("klines", symbol, timeframe),
+                    lambda: self._load_timeframe(symbol, tf_config)
+                ).copy()
+            else:
+                data = self._load_timeframe(symbol, tf_config)
+
+            logger.debug(f"Retrieved {len(data)} candles for {timeframe}")
+            return data
+
+        except Exception as e:
+            logger.error(f"Error fetching historical data for {timeframe}: {str(e)}")
+            raise Exception(f"Error fetching historical data: {str(e)}")
+
+    def _load_timeframe(self, symbol: str, tf_config: TimeframeConfig) -> pd.DataFrame:
+        if self._uses_base_series(tf_config.timeframe):
+            return self._fetch_from_base(symbol, tf_config)
+        return self._fetch_candles(symbol, tf_config, candles=self.lookback.candles_for(tf_config))
+
+    def fetch_recent_candles(self, symbol: str, timeframe: str, candles: int) -> pd.DataFrame:
+        """Fetch only the latest ``candles`` candles of a timeframe.
+
+        Light path for consumers needing a short window (e.g. the latest ATR)
+        rather than the full analysis window.
+        """
+        try:
+            tf_config = self.config.get_timeframe_config(timeframe)
+            if self.coalescer is not None:
+                return self.coalescer.do(
+                    ("recent", symbol, timeframe, candles),
+                    lambda: self._fetch_candles(symbol, tf_config, candles=candles)
+                ).copy()
+            return self._fetch_candles(symbol, tf_config, candles=candles)
+        except Exception as e:
+            logger.error(f"Error fetching recent {timeframe} candles: {str(e)}")
+            raise Exception(f"Error fetching historical data: {str(e)}")
+
+    def cache_summary(self) -> Dict[str, Dict]:
+        """Counters of the caching layers in use, suitable for structured logging."""
+        summary = {"kline_cache": self.kline_cache.summary()}
+        if self.tickers is not None:
+            summary["tickers"] = self.tickers.summary()
+        if self.coalescer is not None:
+            summary["coalescing"] = self.coalescer.summary()
+        return summary
+
+    def fetch_timeframes(self, symbol: str, timeframes: List[str]) -> Dict[str, Union[pd.DataFrame, Exception]]:
+        """Fetch historical data for several timeframes of a symbol.
+
+        Failures do not abort the other fetches: the exception raised for a
+        timeframe is returned in place of its data.
+        """
+        results = {}
+        for timeframe in timeframes:
+            try:
+                results[timeframe] = self.fetch_historical_data(symbol, timeframe)
+            except Exception as e:
+                results[timeframe] = e
+        return results
+
+    def _fetch_candles(self, symbol: str, tf_config: TimeframeConfig,
+                       candles: Optional[int] = None) -> pd.DataFrame:
+        """Fetch the latest candles of a timeframe through the kline cache."""
+        candles = candles or tf_config.candles
+        interval_ms = tf_config.minutes * 60_000
+        now_ms = int(time.time() * 1000)
+        window_start = now_ms - candles * interval_ms
+
+        cached = self.kline_cache.get(symbol, tf_config.interval)
+        if cached is None and self.kline_store is not None:
+            cached = self._load_from_store(symbol, tf_config, window_start, candles)
+        if cached is not None and not cached.empty:
+            last_closed = int(cached.index.as_unit("ms").asi8[-1])
+        else:
+            last_closed = None
+
+        if self.stream is not None:
+            self.stream.ensure_kline(symbol, tf_config.interval)
+            if last_closed is not None and last_closed >= window_start:
+                live = self._read_stream(symbol, tf_config, candles)
+                if live is not None:
+                    return live
+
+        if last_closed is None or last_closed < window_start:
+            # Cold start (or cache too old to be useful): full window
+            fresh = self._fetch_range(symbol, tf_config.interval, window_start, now_ms,
+                                      max_candles=candles)
+        else:
+            # Re-fetch the last closed candle too, so continuity can be checked
+            fresh = self._fetch_range(symbol, tf_config.interval, last_closed, now_ms)
+
+        closed, forming = split_forming(fresh, interval_ms, now_ms)
+        history = self.kline_cache.update(symbol, tf_config.interval, closed, min_keep=candles)
+        self._archive(symbol, tf_config.interval, closed)
+
+        # A shorter window was cached before: fetch the missing head
+        first_cached = int(history.index.as_unit("ms").asi8[0]) if not history.empty else None
+        if first_cached is not None and first_cached - interval_ms > window_start:
+            head = self._fetch_range(symbol, tf_config.interval, window_start, first_cached - interval_ms)
+            history = self.kline_cache.update(symbol, tf_config.interval, head, min_keep=candles)
+            self._archive(symbol, tf_config.interval, head)
+
+        # Backfill any hole inside the requested window
+        window = history[history.index >= pd.Timestamp(window_start, unit="ms")]
+        gaps = find_gaps(window.index, interval_ms)
+        if gaps:
+            logger.warning(f"Backfilling {len(gaps)} kline gap(s) for {symbol} {tf_config.timeframe}")
+            for gap_start, gap_end in gaps:
+                filled = self._fetch_range(symbol, tf_config.interval, gap_start, gap_end)
+                history = self.kline_cache.update(symbol, tf_config.interval, filled, min_keep=candles)
+                self._archive(symbol, tf_config.interval, filled)
+
+        data = pd.concat([history, forming]) if not forming.empty else history
+        data = data[~data.index.duplicated(keep="last")]
+        data = data.iloc[-candles:]
+
+        if data.empty:
+            raise ValueError("No data returned")
+
+        logger.debug(f"{len(fresh)} {tf_config.timeframe} candles fetched from exchange for {symbol}")
+        return data
+
+    def _read_stream(self, symbol: str, tf_config: TimeframeConfig, candles: int) -> Optional[pd.DataFrame]:
+        """Serve candles from the WebSocket feed on top of the cached history.
+
+        Returns None (so the caller falls back to REST) when the feed is stale
+        or does not connect seamlessly with the cached closed candles.
+        """
+        live = self.stream.get_candles(symbol, tf_config.interval)
+        if live is None:
+            return None
+
+        closed, forming = live
+        if forming.empty:
+            # Right after a close, until the next candle's first update
+            return None
+
+        history = self.kline_cache.update(symbol, tf_config.interval, closed, min_keep=candles)
+        self._archive(symbol, tf_config.interval, closed)
+        interval_ms = tf_config.minutes * 60_000
+        last_closed = int(history.index.as_unit("ms").asi8[-1])
+        forming_start = int(forming.index.as_unit("ms").asi8[-1])
+        if forming_start != last_closed + interval_ms or forming_start + interval_ms <= time.time() * 1000:
+            return None
+
+        window_start = forming_start - candles * interval_ms
+        if find_gaps(history[history.index >= pd.Timestamp(window_start, unit="ms")].index, interval_ms):
+            return None
+
+        data = pd.concat([history, forming]).iloc[-candles:]
+        logger.debug(f"{tf_config.timeframe} candles for {symbol} served from stream")
+        return data
+
+    def _load_from_store(self, symbol: str, tf_config: TimeframeConfig,
+                          window_start: int, candles: int) -> Optional[pd.DataFrame]:
+        """Seed the kline cache from the on-disk archive after a restart."""
+        try:
+            stored = self.kline_store.read(symbol, tf_config.interval, start_ms=window_start)
+        except Exception as e:
+            logger.warning(f"Could not read kline archive for {symbol} {tf_config.timeframe}: {str(e)}")
+            return None
+        if stored.empty:
+            return None
+
+        logger.debug(f"Loaded {len(stored)} {tf_config.timeframe} candles for {symbol} from archive")
+        return self.kline_cache.update(symbol, tf_config.interval, stored, min_keep=candles)
+
+    def _archive(self, symbol: str, interval: str, closed: pd.DataFrame) -> None:
+        """Append closed candles to the on-disk archive, if configured."""
+        if self.kline_store is None or closed.empty:
+            return
+        try:
+            self.kline_store.append(symbol, interval, closed)
+        except Exception as e:
+            logger.warning(f"Could not archive {interval} candles for {symbol}: {str(e)}")
+
+    def _plan_resampling(self) -> Dict[str, str]:
+        """Map each timeframe served from a base series to that base.
+
+        Derived timeframes needing more than ``max_base_candles`` base candles
+        are fetched from the exchange instead: 300 4H candles take 14,448 5m
+        ones, about 15 paged requests on a cold start. Such timeframes belong
+        in a group with a coarser base (4H from 1H takes 1,204).
+        """
+        plan: Dict[str, str] = {}
+        if not self.resampling.enabled:
+            return plan
+        for group in self.resampling.get_groups():
+            plan[group.base_timeframe] = group.base_timeframe
+            for timeframe in group.timeframes:
+                needed = self._base_candles_for(timeframe, group.base_timeframe)
+                if needed > self.resampling.max_base_candles:
+                    logger.warning(f"Resampling {timeframe} from {group.base_timeframe} takes {needed} base "
+                                   f"candles (max_base_candles: {self.resampling.max_base_candles}), "
+                                   f"fetching {timeframe} from the exchange instead")
+                    continue
+                plan[timeframe] = group.base_timeframe
+        return plan
+
+    def _uses_base_series(self, timeframe: str) -> bool:
+        """Whether a timeframe is served from a resampling base series."""
+        return timeframe in self._resampled_from
+
+    def _base_candles_for(self, timeframe: str, base_timeframe: str) -> int:
+        """Base candles needed to build a derived timeframe's window."""
+        base_config = self.config.get_timeframe_config(base_timeframe)
+        tf_config = self.config.get_timeframe_config(timeframe)
+        ratio = tf_config.minutes // base_config.minutes
+        # One extra bucket, as the first one may be partial and dropped
+        return (self.lookback.candles_for(tf_config) + 1) * ratio
+
+    def _base_candles_needed(self, base_timeframe: str) -> int:
+        """Base candles needed to build every timeframe served from a base series."""
+        base_config = self.config.get_timeframe_config(base_timeframe)
+        needed = self.lookback.candles_for(base_config)
+        for timeframe, base in self._resampled_from.items():
+            if base == base_timeframe and timeframe != base_timeframe:
+                needed = max(needed, self._base_candles_for(timeframe, base_timeframe))
+        return needed
+
+    def _get_base_series(self, symbol: str, base_timeframe: str) -> pd.DataFrame:
+        """Get a base series, reusing a recent fetch within the same cycle."""
+        key = (symbol, base_timeframe)
+        with self._base_lock:
+            snapshot = self._base_snapshots.get(key)
+            if snapshot and time.time() - snapshot[0] < self.resampling.refresh_seconds:
+                return snapshot[1]
+
+            base_config = self.config.get_timeframe_config(base_timeframe)
+            base = self._fetch_candles(symbol, base_config, candles=self._base_candles_needed(base_timeframe))
+            self._base_snapshots[key] = (time.time(), base)
+            return base
+
+    def _fetch_from_base(self, symbol: str, tf_config: TimeframeConfig) -> pd.DataFrame:
+        """Build a timeframe from its base series, reconciling periodically."""
+        base_config = self.config.get_timeframe_config(self._resampled_from[tf_config.timeframe])
+        base = self._get_base_series(symbol, base_config.timeframe)
+
+        candles = self.lookback.candles_for(tf_config)
+        if tf_config.timeframe == base_config.timeframe:
+            return base.iloc[-candles:]
+
+        data = resample_ohlcv(base, base_config.minutes, tf_config.minutes).iloc[-candles:]
+
+        key = (symbol, tf_config.timeframe)
+        with self._base_lock:
+            count = self._derivations.get(key, 0)
+            self._derivations[key] = count + 1
+        if self.resampling.reconcile_every and count % self.resampling.reconcile_every == 0:
+            if self._reconcile(symbol, tf_config, data):
+                self._diverged.discard(key)
+            else:
+                self._diverged.add(key)
+
+        if key in self._diverged:
+            # Use exchange candles until the next reconciliation succeeds
+            return self._fetch_candles(symbol, tf_config, candles=candles)
+
+        return data
+
+    def _reconcile(self, symbol: str, tf_config: TimeframeConfig, derived: pd.DataFrame) -> bool:
+        """Compare derived closed candles with the exchange's. Returns True if they match."""
+        interval_ms = tf_config.minutes * 60_000
+        now_ms = int(time.time() * 1000)
+        start_ms = now_ms - self.resampling.reconcile_candles * interval_ms
+
+        exchange = self._fetch_range(symbol, tf_config.interval, start_ms, now_ms)
+        exchange, _ = split_forming(exchange, interval_ms, now_ms)
+        mismatches = compare_candles(derived, exchange)
+
+        if len(mismatches):
+            logger.warning(f"Resampled {tf_config.timeframe} candles for {symbol} differ from exchange "
+                           f"on {len(mismatches)} of {len(exchange)} candles, using exchange data")
+            return False
+
+        logger.debug(f"Resampled {tf_config.timeframe} candles for {symbol} reconciled "
+                     f"({len(exchange)} candles checked)")
+        return True
+
+    def _fetch_range(self, symbol: str, interval: str, start_ms: int, end_ms: int,
+                     max_candles: Optional[int] = None) -> pd.DataFrame:
+        """Fetch candles with open time in [start_ms, end_ms], paging backwards.
+
+        Bybit returns the newest candles of the range first, so each page moves
+        the end of the range back until the start is reached.
+        """
+        pages = []
+        remaining = max_candles
+        page_end = end_ms
+
+        while page_end >= start_ms:
+            limit = self.MAX_KLINE_LIMIT if remaining is None else min(remaining, self.MAX_KLINE_LIMIT)
             response = self.session.get_kline(
                 category="linear",
                 symbol=symbol,
-                interval=tf_config.interval,
-                start=self._get_start_timestamp(tf_config),
-                limit=tf_config.candles,
+                interval=interval,
+                start=start_ms,
+                end=page_end,
+                limit=limit,
             )
 
             if response["retCode"] != 0:
                 raise ValueError(f"API error: {response['retMsg']}")
 
-            data = self._process_kline_data(response["result"]["list"])
-            logger.debug(f"Retrieved {len(data)} candles for {timeframe}")
-            return data
+            rows = response["result"]["list"]
+            if not rows:
+                break
 
-        except Exception as e:
-            logger.error(f"Error fetching historical data for {timeframe}: {str(e)}")
-            raise Exception(f"Error fetching historical data: {str(e)}")
+            pages.append(rows)
+            oldest = int(rows[-1][0])
+
+            if remaining is not None:
+                remaining -= len(rows)
+                if remaining <= 0:
+                    break
+            if len(rows) < limit:
+                break
+            page_end = oldest - 1
+
+        if not pages:
+            return self._empty_frame()
 
-    def _get_start_timestamp(self, tf_config: TimeframeConfig) -> int:
-        """Calculate start timestamp based on timeframe configuration."""
-        now = datetime.now()
-        lookback_minutes = tf_config.candles * tf_config.minutes
-        start_time = now - timedelta(minutes=lookback_minutes)
-        return int(start_time.timestamp() * 1000)
+        # Pages move backwards without overlapping: together they are still
+        # newest first, and can be decoded in one go
+        rows = pages[0] if len(pages) == 1 else [row for page in pages for row in page]
+        return self._process_kline_data(rows)
+
+    @staticmethod
+    def _empty_frame() -> pd.DataFrame:
+        """Empty candle frame with the same layout as processed kline data."""
+        return pd.DataFrame(
+            columns=["open", "high", "low", "close", "volume", "turnover"],
+            index=pd.DatetimeIndex([], name="timestamp"),
+            dtype=float,
+        )
 
     def _process_kline_data(self, data: List) -> pd.DataFrame:
         """Process raw kline data into DataFrame."""
         if not data:
             raise ValueError("No data returned")
 
-        df = pd.DataFrame(
-            data,
-            columns=["timestamp", "open", "high", "low", "close", "volume", "turnover"],
-        )
+        timestamps, values = decode_kline_rows(data)
+        index = pd.DatetimeIndex(timestamps.view("datetime64[ms]"), name="timestamp")
+        # values.T keeps one contiguous row per column in the frame's block
+        return pd.DataFrame(values.T, index=index,
+                            columns=["open", "high", "low", "close", "volume", "turnover"],
+                            copy=False)
+
+
+def decode_kline_rows(rows: List) -> tuple:
+    """Decode Bybit kline rows into ascending NumPy arrays.
+
+    Rows are ``[start, open, high, low, close, volume, turnover]`` strings,
+    newest first. The strings are parsed by NumPy in a single pass (open
+    times in ms are exact in float64), then reversed while being copied into
+    the output arrays.
 
-        # Convert numeric columns
-        numeric_cols = ["open", "high", "low", "close", "volume", "turnover"]
-        df[numeric_cols] = df[numeric_cols].astype(float)
+    Returns:
+        Tuple of (timestamps, values): int64 open times in ms with shape (n,),
+        and float64 OHLCV + turnover with shape (6, n), each row contiguous
+    """
+    parsed = np.array(rows, dtype=np.float64)
+    timestamps = parsed[::-1, 0].astype(np.int64)
+    values = np.ascontiguousarray(parsed[::-1, 1:7].T)
 
-        # Process timestamp
-        df["timestamp"] = pd.to_datetime(df["timestamp"].astype(int), unit="ms")
-        df.set_index("timestamp", inplace=True)
+    if len(timestamps) > 1 and not np.all(timestamps[1:] > timestamps[:-1]):
+        # Not the documented order: sort and drop duplicates
+        timestamps, positions = np.unique(timestamps, return_index=True)
+        values = np.ascontiguousarray(values[:, positions])
 
-        return df.sort_index()
\ No newline at end of file
+    return timestamps, values
@@ -7,32 +7,66 @@ import logfire
 
 from aitrading.models.position import Position
 from .execution import execute_order_operations, set_trading_stops, cancel_order
-from .utils import get_current_price, get_active_orders, get_positions, verify_account_status, get_instrument_info
+from .utils import (
+    get_current_price, get_active_orders, get_positions, get_position_symbols,
+    verify_account_status, get_instrument_info
+)
+from ..tickers import TickerSnapshot
+from ..coalescing import RequestCoalescer
 
 from ....models import PlannedOrder
 
 class OrdersTool:
     """Tool for managing orders on Bybit."""
 
-    def __init__(self, api_key: str, api_secret: str, testnet: bool = False):
-        """Initialize the Bybit client."""
-        self.session = HTTP(testnet=testnet, api_key=api_key, api_secret=api_secret)
+    def __init__(self, api_key: str, api_secret: str, testnet: bool = False,
+                 session: Optional[HTTP] = None, tickers: Optional[TickerSnapshot] = None,
+                 positions_ttl: float = 15.0, instruments_ttl: float = 3600.0):
+        """Initialize the Bybit client, optionally on a shared session.
+
+        Positions and instrument rules are cached for ``positions_ttl`` and
+        ``instruments_ttl`` seconds; the position cache of a symbol is dropped
+        on every write made through this tool.
+        """
+        self.session = session or HTTP(testnet=testnet, api_key=api_key, api_secret=api_secret)
+        self.tickers = tickers
+        self.positions_cache = RequestCoalescer(ttl=positions_ttl)
+        self.instruments_cache = RequestCoalescer(ttl=instruments_ttl)
         logfire.info("Bybit orders tool initialized", testnet=testnet)
 
     def get_active_orders(self, symbol: str) -> List[Dict]:
         """Get active orders for a symbol."""
         return get_active_orders(self.session, symbol)
 
-    def get_positions(self, symbol: str) -> List[Dict]:
+    def get_positions(self, symbol: str, force_refresh: bool = False) -> List[Dict]:
         """Get current positions for a symbol."""
-        return get_positions(self.session, symbol)
+        if force_refresh:
+            self.positions_cache.invalidate(symbol)
+        return self.positions_cache.do(symbol, lambda: get_positions(self.session, symbol))
+
+    def get_position_symbols(self, settle_coin: str = "USDT") -> List[str]:
+        """Symbols with an open position, across the account."""
+        return get_position_symbols(self.session, settle_coin)
+
+    def get_instrument_info(self, symbol: str) -> Dict:
+        """Get instrument trading rules."""
+        return self.instruments_cache.do(symbol, lambda: get_instrument_info(self.session, symbol))
+
+    def cache_summary(self) -> Dict[str, Dict]:
+        """Position and instrument cache counters, suitable for structured logging."""
+        return {
+            "positions": self.positions_cache.summary(),
+            "instruments": self.instruments_cache.summary(),
+        }
 
     def cancel_order(self, symbol: str, order_id: str = None, order_link_id: str = None) -> Dict:
         """Cancel an order by order_id or order_link_id."""
+        self.positions_cache.invalidate(symbol)
         return cancel_order(self.session, symbol, order_id, order_link_id)
 
     def set_position_settings(self, symbol: str, leverage: int) -> None:
         """Configure leverage and position mode."""
+        self.positions_cache.invalidate(symbol)
         try:
             with logfire.span("set_position_settings") as span:
                 span.set_attributes({
@@ -92,9 +126,9 @@ class OrdersTool:
                               error=str(e))
             raise Exception(f"Error configuring position for {symbol}: {str(e)}")
 
-    def get_current_price(self, symbol: str) -> float:
+    def get_current_price(self, symbol: str, force_refresh: bool = False) -> float:
         """Get current market price."""
-        return get_current_price(self.session, symbol)
+        return get_current_price(self.session, symbol, self.tickers, force_refresh=force_refresh)
 
     def place_strategy_orders(self, order) -> Dict:
         """Place order on the exchange with orderLinkId."""
@@ -108,10 +142,11 @@ class OrdersTool:
             verify_account_status(self.session, order.symbol)
 
             # Get instrument info
-            instrument_info = get_instrument_info(self.session, order.symbol)
+            instrument_info = self.get_instrument_info(order.symbol)
 
             # Se l'ordine è reduce-only, verifica che esista una posizione e che la direzione sia corretta
-            current_positions = self.get_positions(order.symbol)
+            # Validation needs the live position, not the cached one
+            current_positions = self.get_positions(order.symbol, force_refresh=True)
 
             # Convert order to dictionary and ensure reduce_only is present
             order_data = order.model_dump()
@@ -144,12 +179,14 @@ class OrdersTool:
                 base_position_size = None
 
             # Execute order
+            self.positions_cache.invalidate(order.symbol)
             entry_result = execute_order_operations(
                 self.session,
                 order,
                 instrument_info,
                 is_reduce_only=order.reduce_only,
-                base_position_size=base_position_size
+                base_position_size=base_position_size,
+                tickers=self.tickers
             )
             results["entry"] = entry_result
 
@@ -171,4 +208,5 @@ class OrdersTool:
 
     def set_trading_stops(self, symbol: str, position_idx: int = 0, **kwargs) -> Dict:
         """Set or update trading stop levels for a position."""
+        self.positions_cache.invalidate(symbol)
         return set_trading_stops(self.session, symbol, position_idx, **kwargs)
\ No newline at end of file
@@ -11,7 +11,8 @@ def execute_order_operations(
         order,
         instrument_info: Dict,
         is_reduce_only: bool = False,
-        base_position_size: Optional[float] = None
+        base_position_size: Optional[float] = None,
+        tickers=None
 ) -> Dict:
     """Execute order operations including base params preparation and order placement.
 
@@ -21,6 +22,7 @@ def execute_order_operations(
         instrument_info: Instrument trading rules
         is_reduce_only: Whether this is a reduce-only order
         base_position_size: Base position size for reduce-only orders
+        tickers: Optional ticker snapshot used to price market orders
     """
     results = {"entry": None, "errors": []}
 
@@ -39,7 +41,8 @@ def execute_order_operations(
                 order,
                 instrument_info,
                 is_reduce_only=is_reduce_only,
-                base_position_size=base_position_size
+                base_position_size=base_position_size,
+                tickers=tickers
             )
 
             # Add order parameters based on order type
@@ -172,7 +175,8 @@ def _prepare_base_order_params(
         order,
         instrument_info: Dict,
         is_reduce_only: bool = False,
-        base_position_size: Optional[float] = None
+        base_position_size: Optional[float] = None,
+        tickers=None
 ) -> Dict:
     """Prepare base order parameters.
 
@@ -182,6 +186,7 @@ def _prepare_base_order_params(
         instrument_info: Instrument trading rules
         is_reduce_only: Whether this is a reduce-only order
         base_position_size: Base position size for reduce-only orders
+        tickers: Optional ticker snapshot used to price market orders
     """
     try:
         with logfire.span("prepare_base_params"):
@@ -189,7 +194,8 @@ def _prepare_base_order_params(
             price_for_qty = (
                 order.order.entry.price
                 if order.order.type == "limit"
-                else get_current_price(session, order.symbol)
+                # Sizing a market order needs the live price, not the snapshot's
+                else get_current_price(session, order.symbol, tickers, force_refresh=True)
             )
 
             size_percentage = getattr(order.order.entry, 'size_percentage', None)
@@ -1,7 +1,8 @@
 # aitrading/tools/bybit/orders/utils.py
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logfire
+from ..tickers import TickerSnapshot, get_ticker_price
 from ....models.orders import ExistingOrder
 from ....models.position import Position
 
@@ -110,11 +111,37 @@ def get_positions(session, symbol: str) -> List[Position]:
         raise Exception(f"Error fetching positions for {symbol}: {str(e)}")
 
 
-def get_current_price(session, symbol: str) -> float:
-    """Get current market price."""
+def get_position_symbols(session, settle_coin: str = "USDT") -> List[str]:
+    """Symbols with an open position, across the account."""
     try:
-        response = session.get_tickers(category="linear", symbol=symbol)
-        return float(response["result"]["list"][0]["lastPrice"])
+        symbols = []
+        cursor = None
+        while True:
+            params = {"category": "linear", "settleCoin": settle_coin, "limit": 200}
+            if cursor:
+                params["cursor"] = cursor
+            response = session.get_positions(**params)
+
+            if response["retCode"] != 0:
+                raise ValueError(f"API error: {response['retMsg']}")
+
+            result = response["result"]
+            symbols.extend(pos["symbol"] for pos in result["list"] if float(pos["size"]) != 0)
+            cursor = result.get("nextPageCursor")
+            if not cursor:
+                break
+
+        return sorted(set(symbols))
+
+    except Exception as e:
+        raise Exception(f"Error fetching {settle_coin} positions: {str(e)}")
+
+
+def get_current_price(session, symbol: str, tickers: Optional[TickerSnapshot] = None,
+                      force_refresh: bool = False) -> float:
+    """Get current market price, from the ticker snapshot when provided."""
+    try:
+        return get_ticker_price(tickers, session, symbol, force_refresh=force_refresh)
     except Exception as e:
         raise Exception(f"Error fetching price for {symbol}: {str(e)}")
 
@@ -0,0 +1,86 @@
+# aitrading/tools/bybit/prefetch.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import logfire
+
+from .async_market_data import AsyncMarketDataTool
+from .orders import OrdersTool
+
+
+class CyclePrefetcher:
+    """Warms the market data and account caches ahead of a scheduler cycle.
+
+    Fires ``lead_seconds`` before the next cycle and loads, for the symbols
+    about to be processed, the klines of every analysis timeframe and the
+    instrument rules. The cycle then starts on hot caches and only fetches
+    the candles formed in between. Requests still in flight when the cycle
+    starts are joined rather than repeated, through the market data
+    coalescer.
+
+    Tickers and positions are not warmed: their caches live for seconds
+    (see ``TickerSnapshot.ttl`` and ``positions_ttl``) while the symbols of
+    a cycle are planned one after the other over minutes, so a warm-up
+    would expire before nearly every symbol reads it.
+    """
+
+    def __init__(self, market_data: AsyncMarketDataTool, orders: OrdersTool,
+                 lead_seconds: float = 10.0, max_workers: int = 4):
+        self.market_data = market_data
+        self.orders = orders
+        self.lead_seconds = lead_seconds
+        self.max_workers = max_workers
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self.last_run: Dict[str, float] = {}
+
+    def schedule(self, symbols: List[str], cycle_in: float) -> None:
+        """Prefetch ``symbols`` ``lead_seconds`` before a cycle starting in ``cycle_in`` seconds."""
+        delay = max(0.0, cycle_in - self.lead_seconds)
+        with self._lock:
+            self._cancel()
+            self._timer = threading.Timer(delay, self.prefetch, args=(list(symbols),))
+            self._timer.daemon = True
+            self._timer.start()
+        logfire.debug("Prefetch scheduled", symbols=symbols, delay=round(delay, 1))
+
+    def cancel(self) -> None:
+        """Drop the scheduled prefetch, if any."""
+        with self._lock:
+            self._cancel()
+
+    def _cancel(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def prefetch(self, symbols: List[str]) -> Dict[str, float]:
+        """Load the caches for ``symbols`` now. Returns the seconds spent per stage."""
+        timings = {}
+        with logfire.span("cycle_prefetch") as span:
+            span.set_attribute("symbols", symbols)
+
+            start = time.time()
+            self._warm("klines", self.market_data.fetch_symbols, symbols)
+            timings["klines"] = time.time() - start
+
+            start = time.time()
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for symbol in symbols:
+                    executor.submit(self._warm, "instruments", self.orders.get_instrument_info, symbol)
+            timings["instruments"] = time.time() - start
+
+            self.last_run = {stage: round(seconds, 3) for stage, seconds in timings.items()}
+            logfire.info("Caches prefetched", symbols=len(symbols), **self.last_run)
+        return self.last_run
+
+    @staticmethod
+    def _warm(stage: str, loader, *args) -> None:
+        # A failed prefetch only means a cold cache: the cycle fetches it again
+        try:
+            loader(*args)
+        except Exception as e:
+            logfire.warning("Prefetch failed", stage=stage, args=args, error=str(e))
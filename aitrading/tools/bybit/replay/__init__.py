@@ -0,0 +1,6 @@
+# aitrading/tools/bybit/replay/__init__.py
+
+from .recorder import ResponseRecorder, request_key
+from .server import ReplayServer
+
+__all__ = ['ResponseRecorder', 'ReplayServer', 'request_key']
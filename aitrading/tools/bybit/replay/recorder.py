@@ -0,0 +1,76 @@
+# aitrading/tools/bybit/replay/recorder.py
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+import requests
+
+# Request parameters that change on every call and must not take part in
+# matching a replayed request to a recorded one
+VOLATILE_PARAMS = {"start", "end", "cursor", "orderLinkId", "timestamp"}
+
+# Rate limit headers are replayed so the limiter behaves as against the exchange
+REPLAYED_HEADERS = ("X-Bapi-Limit", "X-Bapi-Limit-Status", "X-Bapi-Limit-Reset-Timestamp")
+
+
+def request_params(method: str, url: str, body) -> Dict[str, str]:
+    """Parameters of a pybit request: the query string for GET, the JSON body otherwise."""
+    if method == "GET":
+        return dict(parse_qsl(urlparse(url).query))
+    if not body:
+        return {}
+    if isinstance(body, bytes):
+        body = body.decode()
+    try:
+        return {k: str(v) for k, v in json.loads(body).items()}
+    except (ValueError, AttributeError):
+        return {}
+
+
+def request_key(method: str, path: str, params: Dict[str, str]) -> Tuple:
+    """Key used to match a request with recorded responses."""
+    stable = tuple(sorted((k, v) for k, v in params.items() if k not in VOLATILE_PARAMS))
+    return method, path, stable
+
+
+class ResponseRecorder:
+    """Appends the exchange's REST responses to a JSON lines file.
+
+    Attached to the transport's adapter, it sees every pybit call
+    (``get_kline``, ``get_tickers``, ``get_positions``, ``place_order``, ...)
+    without wrapping each method. Request headers, which carry the API key
+    and signature, are not recorded.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, request: requests.PreparedRequest, response: requests.Response) -> None:
+        parsed = urlparse(request.url)
+        try:
+            body = response.json()
+        except ValueError:
+            body = response.text
+
+        entry = {
+            "recorded_at": int(time.time() * 1000),
+            "method": request.method,
+            "path": parsed.path,
+            "params": request_params(request.method, request.url, request.body),
+            "status": response.status_code,
+            "elapsed_ms": round(response.elapsed.total_seconds() * 1000, 1),
+            "headers": {h: response.headers[h] for h in REPLAYED_HEADERS if h in response.headers},
+            "body": body,
+        }
+        line = json.dumps(entry, separators=(",", ":"))
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+            self.count += 1
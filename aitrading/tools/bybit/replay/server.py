@@ -0,0 +1,177 @@
+# aitrading/tools/bybit/replay/server.py
+
+"""Local HTTP server replaying recorded Bybit REST responses.
+
+Point the transport at it with ``transport.endpoint`` (e.g.
+``http://127.0.0.1:8180``) to run whole cycles against recorded data with a
+controlled latency.
+
+Usage:
+    python -m aitrading.tools.bybit.replay.server recording.jsonl --port 8180 --latency-ms 80 --jitter-ms 30
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import logfire
+
+from .recorder import request_key, request_params
+
+
+class ReplayServer:
+    """Serves recorded responses with configurable latency and jitter.
+
+    Requests are matched on method, path and parameters, ignoring the ones
+    that change on every call (time ranges, cursors, order link ids). When
+    several responses were recorded for the same request they are replayed
+    in order, cycling. Requests with no exact match fall back to the
+    latest response recorded for the same path and symbol, then path.
+    """
+
+    def __init__(self, recording_path: str, host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._random = random.Random(seed)
+        self._exact: Dict[Tuple, List[dict]] = defaultdict(list)
+        self._by_symbol: Dict[Tuple, dict] = {}
+        self._by_path: Dict[Tuple, dict] = {}
+        self._cursors: Dict[Tuple, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"served": 0, "exact": 0, "fallback": 0, "missing": 0}
+        self._load(recording_path)
+
+    def _load(self, path: str) -> None:
+        count = 0
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                params = entry.get("params", {})
+                self._exact[request_key(entry["method"], entry["path"], params)].append(entry)
+                self._by_symbol[(entry["method"], entry["path"], params.get("symbol"))] = entry
+                self._by_path[(entry["method"], entry["path"])] = entry
+                count += 1
+        logfire.info("Replay recording loaded", path=path, responses=count, requests=len(self._exact))
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def match(self, method: str, path: str, params: Dict[str, str]) -> Optional[dict]:
+        """Recorded response for a request, or None."""
+        key = request_key(method, path, params)
+        with self._lock:
+            entries = self._exact.get(key)
+            if entries:
+                entry = entries[self._cursors[key] % len(entries)]
+                self._cursors[key] += 1
+                self.stats["exact"] += 1
+                return entry
+
+            entry = self._by_symbol.get((method, path, params.get("symbol"))) or self._by_path.get((method, path))
+            self.stats["fallback" if entry else "missing"] += 1
+            return entry
+
+    def delay(self) -> float:
+        """Seconds to wait before answering."""
+        jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def start(self) -> "ReplayServer":
+        """Serve in a background thread; returns once the port is bound."""
+        self._server = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bybit-replay", daemon=True)
+        self._thread.start()
+        logfire.info("Replay server listening", url=self.url,
+                     latency_ms=self.latency_ms, jitter_ms=self.jitter_ms)
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+
+def _make_handler(replay: ReplayServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _serve(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            params = request_params(self.command, self.path, body)
+            entry = replay.match(self.command, urlparse(self.path).path, params)
+
+            time.sleep(replay.delay())
+
+            if entry is None:
+                status, headers = 200, {}
+                payload = {"retCode": 10001, "retMsg": f"No recorded response for {self.path}",
+                           "result": {}, "time": int(time.time() * 1000)}
+            else:
+                status, headers, payload = entry["status"], entry.get("headers", {}), entry["body"]
+
+            data = json.dumps(payload).encode() if not isinstance(payload, str) else payload.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+            replay.stats["served"] += 1
+
+        do_GET = _serve
+        do_POST = _serve
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Bybit REST responses")
+    parser.add_argument("recording", help="JSON lines file written by ResponseRecorder")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8180)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = ReplayServer(args.recording, host=args.host, port=args.port,
+                          latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed)
+    server.start()
+    print(f"Replaying {args.recording} on {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
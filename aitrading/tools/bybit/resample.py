@@ -0,0 +1,100 @@
+# aitrading/tools/bybit/resample.py
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume", "turnover"]
+
+
+def resample_ohlcv(df: pd.DataFrame, base_minutes: int, target_minutes: int) -> pd.DataFrame:
+    """Aggregate base-resolution candles into coarser candles.
+
+    Candle boundaries follow Bybit's: open times are aligned to multiples of
+    the interval since the Unix epoch (UTC), so daily candles open at 00:00
+    UTC and 4H candles at 00:00, 04:00, ... UTC.
+
+    The first bucket is dropped when the base series starts after its open
+    time, since its open/high/low would not match the exchange candle. The
+    last bucket may be incomplete: like the exchange's still-forming candle
+    it reflects the candles seen so far.
+
+    Args:
+        df: Base candles indexed by open time, sorted ascending
+        base_minutes: Minutes per base candle
+        target_minutes: Minutes per target candle
+
+    Returns:
+        DataFrame with the same layout as the input, indexed by target open time
+    """
+    validate_resampling(base_minutes, target_minutes)
+    if df.empty:
+        return df.copy()
+
+    step_ms = target_minutes * 60_000
+    open_ms = df.index.as_unit("ms").asi8
+    buckets = open_ms - (open_ms % step_ms)
+
+    # Group boundaries: buckets are sorted because the index is
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+
+    values = {col: df[col].to_numpy(dtype=np.float64) for col in OHLCV_COLUMNS}
+    result = {
+        "open": values["open"][starts],
+        "high": np.maximum.reduceat(values["high"], starts),
+        "low": np.minimum.reduceat(values["low"], starts),
+        "close": values["close"][ends],
+        "volume": np.add.reduceat(values["volume"], starts),
+        "turnover": np.add.reduceat(values["turnover"], starts),
+    }
+
+    index = pd.DatetimeIndex(buckets[starts].astype("datetime64[ms]"), name=df.index.name)
+    resampled = pd.DataFrame(result, index=index)
+
+    if open_ms[0] != buckets[0]:
+        resampled = resampled.iloc[1:]
+
+    return resampled
+
+
+def validate_resampling(base_minutes: int, target_minutes: int) -> None:
+    """Check that a target interval can be built from a base interval."""
+    if target_minutes % base_minutes != 0:
+        raise ValueError(
+            f"Cannot resample {base_minutes}m candles to {target_minutes}m: "
+            f"target is not a multiple of base"
+        )
+    if 1440 % target_minutes != 0 and target_minutes != 1440:
+        raise ValueError(
+            f"Cannot resample to {target_minutes}m: only intervals that divide "
+            f"a UTC day are aligned with exchange candles"
+        )
+
+
+def compare_candles(derived: pd.DataFrame, exchange: pd.DataFrame,
+                    rtol: float = 1e-9, volume_rtol: float = 1e-6) -> pd.Index:
+    """Find candles whose derived values disagree with the exchange ones.
+
+    Only candles present in both frames are compared.
+
+    Returns:
+        Index of the mismatching open times
+    """
+    common = derived.index.intersection(exchange.index)
+    if common.empty:
+        return common
+
+    left = derived.loc[common]
+    right = exchange.loc[common]
+
+    price_ok = np.isclose(
+        left[["open", "high", "low", "close"]].to_numpy(),
+        right[["open", "high", "low", "close"]].to_numpy(),
+        rtol=rtol, atol=0.0
+    ).all(axis=1)
+    volume_ok = np.isclose(
+        left["volume"].to_numpy(), right["volume"].to_numpy(),
+        rtol=volume_rtol, atol=1e-12
+    )
+
+    return common[~(price_ok & volume_ok)]
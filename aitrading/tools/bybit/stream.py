@@ -0,0 +1,281 @@
+# aitrading/tools/bybit/stream.py
+
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+import websocket
+import logfire
+
+PUBLIC_LINEAR_URL = "wss://stream.bybit.com/v5/public/linear"
+PUBLIC_LINEAR_TESTNET_URL = "wss://stream-testnet.bybit.com/v5/public/linear"
+
+# Bybit accepts at most 10 topics per subscribe request on public channels
+MAX_TOPICS_PER_REQUEST = 10
+
+CandleCallback = Callable[[str, str, dict], None]
+
+
+class _LiveSeries:
+    """Candles received for one (symbol, interval) topic."""
+
+    def __init__(self, max_candles: int):
+        self.closed: Deque[dict] = deque(maxlen=max_candles)
+        self.forming: Optional[dict] = None
+        self.updated_at: float = 0.0
+
+
+class MarketDataStream:
+    """Public WebSocket feed keeping live candles and last prices in memory.
+
+    Subscriptions are added on demand with ``ensure_kline`` and
+    ``ensure_ticker``; they are replayed automatically after a reconnect.
+    Readers get ``None`` when the data is missing or older than the
+    configured maximum age, and are expected to fall back to REST.
+    """
+
+    def __init__(
+            self,
+            testnet: bool = False,
+            url: Optional[str] = None,
+            price_max_age: float = 5.0,
+            kline_max_age: float = 60.0,
+            max_candles: int = 500,
+            ping_interval: float = 20.0,
+            reconnect_delay: float = 5.0
+    ):
+        self.url = url or (PUBLIC_LINEAR_TESTNET_URL if testnet else PUBLIC_LINEAR_URL)
+        self.price_max_age = price_max_age
+        self.kline_max_age = kline_max_age
+        self.max_candles = max_candles
+        self.ping_interval = ping_interval
+        self.reconnect_delay = reconnect_delay
+
+        self._topics: Set[str] = set()
+        self._prices: Dict[str, Tuple[float, float]] = {}
+        self._series: Dict[Tuple[str, str], _LiveSeries] = {}
+        self._close_callbacks: List[CandleCallback] = []
+        self._lock = threading.RLock()
+
+        self._ws: Optional[websocket.WebSocketApp] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._connected = threading.Event()
+
+    # Lifecycle
+
+    def start(self) -> None:
+        """Start the connection thread."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="bybit-stream", daemon=True)
+        self._thread.start()
+        logfire.info("Market data stream started", url=self.url)
+
+    def stop(self) -> None:
+        """Close the connection and stop reconnecting."""
+        self._running = False
+        if self._ws is not None:
+            self._ws.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._connected.clear()
+        logfire.info("Market data stream stopped", url=self.url)
+
+    def wait_connected(self, timeout: float = 10.0) -> bool:
+        """Block until the socket is open."""
+        return self._connected.wait(timeout)
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    # Subscriptions
+
+    def ensure_kline(self, symbol: str, interval: str) -> None:
+        """Subscribe to a kline topic if not subscribed yet."""
+        self._ensure_topics([f"kline.{interval}.{symbol}"])
+
+    def ensure_ticker(self, symbol: str) -> None:
+        """Subscribe to a ticker topic if not subscribed yet."""
+        self._ensure_topics([f"tickers.{symbol}"])
+
+    def on_candle_close(self, callback: CandleCallback) -> None:
+        """Register a callback invoked as ``callback(symbol, interval, candle)``
+        whenever a confirmed candle is received."""
+        with self._lock:
+            self._close_callbacks.append(callback)
+
+    def _ensure_topics(self, topics: List[str]) -> None:
+        with self._lock:
+            new_topics = [t for t in topics if t not in self._topics]
+            self._topics.update(new_topics)
+        if not new_topics:
+            return
+        if not self._running:
+            self.start()
+        elif self.connected:
+            self._subscribe(new_topics)
+
+    def _subscribe(self, topics: List[str]) -> None:
+        for i in range(0, len(topics), MAX_TOPICS_PER_REQUEST):
+            chunk = topics[i:i + MAX_TOPICS_PER_REQUEST]
+            try:
+                self._ws.send(json.dumps({"op": "subscribe", "args": chunk}))
+                logfire.debug("Subscribed to stream topics", topics=chunk)
+            except Exception as e:
+                logfire.warning("Stream subscription failed", topics=chunk, error=str(e))
+
+    # Readers
+
+    def get_last_price(self, symbol: str, max_age: Optional[float] = None) -> Optional[float]:
+        """Last traded price, or None if unknown or stale."""
+        max_age = self.price_max_age if max_age is None else max_age
+        with self._lock:
+            entry = self._prices.get(symbol)
+        if entry is None or time.time() - entry[1] > max_age:
+            return None
+        return entry[0]
+
+    def get_candles(
+            self,
+            symbol: str,
+            interval: str,
+            max_age: Optional[float] = None
+    ) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+        """Closed and forming candles received so far, or None if stale.
+
+        Returns:
+            Tuple of (closed, forming) DataFrames with the same layout as
+            ``MarketDataTool`` kline frames
+        """
+        max_age = self.kline_max_age if max_age is None else max_age
+        with self._lock:
+            series = self._series.get((symbol, interval))
+            if series is None or time.time() - series.updated_at > max_age:
+                return None
+            closed = list(series.closed)
+            forming = [series.forming] if series.forming else []
+        return _to_frame(closed), _to_frame(forming)
+
+    # Connection handling
+
+    def _run(self) -> None:
+        while self._running:
+            self._ws = websocket.WebSocketApp(
+                self.url,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=self._on_close,
+            )
+            pinger = threading.Thread(target=self._ping_loop, args=(self._ws,), daemon=True)
+            pinger.start()
+            try:
+                self._ws.run_forever()
+            except Exception as e:
+                logfire.warning("Market data stream crashed", error=str(e))
+            self._connected.clear()
+            if self._running:
+                time.sleep(self.reconnect_delay)
+
+    def _ping_loop(self, ws: websocket.WebSocketApp) -> None:
+        # Bybit expects an application level ping to keep the socket alive
+        while self._running and self._ws is ws:
+            time.sleep(self.ping_interval)
+            if self.connected and self._ws is ws:
+                try:
+                    ws.send(json.dumps({"op": "ping"}))
+                except Exception:
+                    pass
+
+    def _on_open(self, ws) -> None:
+        self._connected.set()
+        with self._lock:
+            topics = sorted(self._topics)
+        logfire.info("Market data stream connected", url=self.url, topics=len(topics))
+        if topics:
+            self._subscribe(topics)
+
+    def _on_error(self, ws, error) -> None:
+        logfire.warning("Market data stream error", error=str(error))
+
+    def _on_close(self, ws, status_code, message) -> None:
+        self._connected.clear()
+        logfire.info("Market data stream closed", status_code=status_code, message=message)
+
+    def _on_message(self, ws, message: str) -> None:
+        try:
+            payload = json.loads(message)
+            topic = payload.get("topic")
+            if not topic:
+                if payload.get("op") == "subscribe" and not payload.get("success", True):
+                    logfire.warning("Stream subscription rejected", response=payload)
+                return
+
+            if topic.startswith("tickers."):
+                self._handle_ticker(payload)
+            elif topic.startswith("kline."):
+                self._handle_kline(topic, payload)
+        except Exception as e:
+            logfire.warning("Failed to process stream message", error=str(e))
+
+    def _handle_ticker(self, payload: dict) -> None:
+        data = payload.get("data") or {}
+        last_price = data.get("lastPrice")
+        if last_price is None:
+            # Deltas only carry changed fields
+            return
+        with self._lock:
+            self._prices[data["symbol"]] = (float(last_price), time.time())
+
+    def _handle_kline(self, topic: str, payload: dict) -> None:
+        _, interval, symbol = topic.split(".", 2)
+        closed_now = []
+        with self._lock:
+            series = self._series.get((symbol, interval))
+            if series is None:
+                series = self._series[(symbol, interval)] = _LiveSeries(self.max_candles)
+
+            for item in payload.get("data") or []:
+                candle = {
+                    "timestamp": int(item["start"]),
+                    "open": float(item["open"]),
+                    "high": float(item["high"]),
+                    "low": float(item["low"]),
+                    "close": float(item["close"]),
+                    "volume": float(item["volume"]),
+                    "turnover": float(item["turnover"]),
+                }
+                if item.get("confirm"):
+                    if not series.closed or series.closed[-1]["timestamp"] < candle["timestamp"]:
+                        series.closed.append(candle)
+                        closed_now.append(candle)
+                    if series.forming and series.forming["timestamp"] <= candle["timestamp"]:
+                        series.forming = None
+                else:
+                    series.forming = candle
+            series.updated_at = time.time()
+            callbacks = list(self._close_callbacks)
+
+        for candle in closed_now:
+            for callback in callbacks:
+                try:
+                    callback(symbol, interval, candle)
+                except Exception as e:
+                    logfire.error("Candle close callback failed",
+                                  symbol=symbol, interval=interval, error=str(e))
+
+
+def _to_frame(candles: List[dict]) -> pd.DataFrame:
+    """Build a kline frame indexed by open time from candle dicts."""
+    columns = ["open", "high", "low", "close", "volume", "turnover"]
+    if not candles:
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name="timestamp"), dtype=float)
+    df = pd.DataFrame(candles)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df.set_index("timestamp")[columns]
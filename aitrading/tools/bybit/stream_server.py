@@ -0,0 +1,207 @@
+# aitrading/tools/bybit/stream_server.py
+
+"""Local stand-in for Bybit's public linear WebSocket.
+
+Speaks the subset of the v5 public protocol used by ``MarketDataStream``
+(subscribe, ping/pong, kline and ticker pushes), so the feed can be
+exercised offline. Messages are pushed explicitly with ``publish_kline``
+and ``publish_ticker``, or generated by ``start_random_walk``.
+
+Example:
+    server = LocalStreamServer()
+    server.start()
+    stream = MarketDataStream(url=server.url)
+    stream.ensure_ticker("BTCUSDT")
+    server.publish_ticker("BTCUSDT", 97000.5)
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Set
+
+import logfire
+
+
+class LocalStreamServer:
+    """Bybit-like public WebSocket server running in a background thread."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._server = None
+        self._ready = threading.Event()
+        self._subscriptions: Dict[object, Set[str]] = {}
+        self._walkers: List[threading.Thread] = []
+        self._running = False
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/v5/public/linear"
+
+    def start(self, timeout: float = 5.0) -> "LocalStreamServer":
+        """Start serving; returns once the port is bound."""
+        # Imported here: only needed when running the stand-in
+        from websockets.asyncio.server import serve
+
+        async def main():
+            self._server = await serve(self._handle, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await self._server.wait_closed()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(main())
+
+        self._running = True
+        self._thread = threading.Thread(target=run, name="stream-stand-in", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise RuntimeError("Local stream server did not start")
+        logfire.info("Local stream server listening", url=self.url)
+        return self
+
+    def stop(self) -> None:
+        """Stop the server and any random walk generators."""
+        self._running = False
+        if self._loop and self._server:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "LocalStreamServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    # Publishing
+
+    def publish_ticker(self, symbol: str, last_price: float) -> None:
+        """Push a ticker snapshot to subscribers of ``tickers.<symbol>``."""
+        topic = f"tickers.{symbol}"
+        self._publish(topic, {
+            "topic": topic,
+            "type": "snapshot",
+            "ts": int(time.time() * 1000),
+            "data": {"symbol": symbol, "lastPrice": str(last_price)},
+        })
+
+    def publish_kline(self, symbol: str, interval: str, start: int, open_: float,
+                      high: float, low: float, close: float, volume: float,
+                      turnover: float = 0.0, confirm: bool = False) -> None:
+        """Push a kline update to subscribers of ``kline.<interval>.<symbol>``."""
+        topic = f"kline.{interval}.{symbol}"
+        minutes = 1440 if interval == "D" else int(interval)
+        self._publish(topic, {
+            "topic": topic,
+            "type": "snapshot",
+            "ts": int(time.time() * 1000),
+            "data": [{
+                "start": start,
+                "end": start + minutes * 60_000 - 1,
+                "interval": interval,
+                "open": str(open_),
+                "close": str(close),
+                "high": str(high),
+                "low": str(low),
+                "volume": str(volume),
+                "turnover": str(turnover),
+                "confirm": confirm,
+                "timestamp": int(time.time() * 1000),
+            }],
+        })
+
+    def start_random_walk(self, symbol: str, intervals: List[str], price: float = 100.0,
+                          tick_seconds: float = 0.5, volatility: float = 0.001) -> None:
+        """Generate ticker and kline pushes from a random walk in the background."""
+
+        def walk():
+            nonlocal price
+            candles: Dict[str, dict] = {}
+            while self._running:
+                price *= 1 + random.gauss(0, volatility)
+                now_ms = int(time.time() * 1000)
+                self.publish_ticker(symbol, round(price, 4))
+                for interval in intervals:
+                    step = (1440 if interval == "D" else int(interval)) * 60_000
+                    start = now_ms - now_ms % step
+                    candle = candles.get(interval)
+                    if candle and candle["start"] != start:
+                        self.publish_kline(symbol, interval, confirm=True, **_kline_args(candle))
+                        candle = None
+                    if candle is None:
+                        candle = candles[interval] = {"start": start, "open": price, "high": price,
+                                                      "low": price, "close": price, "volume": 0.0}
+                    candle["high"] = max(candle["high"], price)
+                    candle["low"] = min(candle["low"], price)
+                    candle["close"] = price
+                    candle["volume"] += random.uniform(0.1, 2.0)
+                    self.publish_kline(symbol, interval, confirm=False, **_kline_args(candle))
+                time.sleep(tick_seconds)
+
+        walker = threading.Thread(target=walk, name=f"random-walk-{symbol}", daemon=True)
+        walker.start()
+        self._walkers.append(walker)
+
+    def _publish(self, topic: str, message: dict) -> None:
+        if self._loop is None:
+            raise RuntimeError("Local stream server not started")
+        payload = json.dumps(message)
+        targets = [ws for ws, topics in list(self._subscriptions.items()) if topic in topics]
+        for ws in targets:
+            asyncio.run_coroutine_threadsafe(self._send(ws, payload), self._loop)
+
+    @staticmethod
+    async def _send(ws, payload: str) -> None:
+        try:
+            await ws.send(payload)
+        except Exception:
+            pass
+
+    # Protocol
+
+    async def _handle(self, ws) -> None:
+        self._subscriptions[ws] = set()
+        conn_id = uuid.uuid4().hex
+        try:
+            async for raw in ws:
+                try:
+                    request = json.loads(raw)
+                except ValueError:
+                    continue
+                op = request.get("op")
+                if op == "ping":
+                    await ws.send(json.dumps({
+                        "success": True, "ret_msg": "pong", "conn_id": conn_id,
+                        "req_id": request.get("req_id", ""), "op": "ping"
+                    }))
+                elif op in ("subscribe", "unsubscribe"):
+                    topics = set(request.get("args") or [])
+                    if op == "subscribe":
+                        self._subscriptions[ws] |= topics
+                    else:
+                        self._subscriptions[ws] -= topics
+                    await ws.send(json.dumps({
+                        "success": True, "ret_msg": "", "conn_id": conn_id,
+                        "req_id": request.get("req_id", ""), "op": op
+                    }))
+        finally:
+            self._subscriptions.pop(ws, None)
+
+
+def _kline_args(candle: dict) -> dict:
+    return {
+        "start": candle["start"],
+        "open_": candle["open"],
+        "high": candle["high"],
+        "low": candle["low"],
+        "close": candle["close"],
+        "volume": candle["volume"],
+    }
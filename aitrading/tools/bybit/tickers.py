@@ -0,0 +1,109 @@
+# aitrading/tools/bybit/tickers.py
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+import logfire
+
+
+class TickerSnapshot:
+    """Snapshot of all linear tickers, refreshed with one request when stale.
+
+    Reads within ``ttl`` seconds of the last refresh are served from memory,
+    so pricing every symbol of a cycle costs a single ``get_tickers`` call.
+    Execution-critical reads pass ``force_refresh`` to fetch the symbol's
+    ticker right away.
+    """
+
+    def __init__(self, session, ttl: float = 10.0):
+        self.session = session
+        self.ttl = ttl
+        self._tickers: Dict[str, dict] = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "refreshes": 0, "forced": 0}
+
+    @property
+    def age(self) -> float:
+        """Seconds since the last full refresh."""
+        return time.time() - self._fetched_at
+
+    def refresh(self) -> Dict[str, dict]:
+        """Fetch every linear ticker, replacing the snapshot."""
+        response = self.session.get_tickers(category="linear")
+        if response["retCode"] != 0:
+            raise ValueError(f"API error: {response['retMsg']}")
+
+        tickers = {t["symbol"]: t for t in response["result"]["list"]}
+        self._tickers = tickers
+        self._fetched_at = time.time()
+        self.stats["refreshes"] += 1
+        logfire.debug("Ticker snapshot refreshed", symbols=len(tickers))
+        return tickers
+
+    def get(self, symbol: str, force_refresh: bool = False) -> dict:
+        """Ticker of a symbol, as returned by the exchange."""
+        if force_refresh:
+            return self._refresh_symbol(symbol)
+
+        with self._lock:
+            if self.age >= self.ttl:
+                self.refresh()
+            else:
+                self.stats["hits"] += 1
+            ticker = self._tickers.get(symbol)
+
+        if ticker is None:
+            raise ValueError(f"No ticker for {symbol}")
+        return ticker
+
+    def get_price(self, symbol: str, force_refresh: bool = False) -> float:
+        """Last traded price of a symbol."""
+        return float(self.get(symbol, force_refresh)["lastPrice"])
+
+    def symbols(self) -> List[str]:
+        """Symbols in the snapshot, refreshing it if stale."""
+        with self._lock:
+            if self.age >= self.ttl:
+                self.refresh()
+            return list(self._tickers.keys())
+
+    def all(self) -> Dict[str, dict]:
+        """All tickers of the snapshot, refreshing it if stale."""
+        with self._lock:
+            if self.age >= self.ttl:
+                self.refresh()
+            return dict(self._tickers)
+
+    def _refresh_symbol(self, symbol: str) -> dict:
+        response = self.session.get_tickers(category="linear", symbol=symbol)
+        if response["retCode"] != 0:
+            raise ValueError(f"API error: {response['retMsg']}")
+
+        tickers = response["result"]["list"]
+        if not tickers:
+            raise ValueError(f"No ticker for {symbol}")
+
+        ticker = tickers[0]
+        # Copy on write: readers may hold the previous snapshot
+        self._tickers = {**self._tickers, symbol: ticker}
+        self.stats["forced"] += 1
+        return ticker
+
+    def invalidate(self) -> None:
+        """Force the next read to refresh the snapshot."""
+        self._fetched_at = 0.0
+
+    def summary(self) -> Dict[str, int]:
+        """Snapshot counters, suitable for structured logging."""
+        return {**self.stats, "symbols": len(self._tickers)}
+
+
+def get_ticker_price(tickers: Optional[TickerSnapshot], session, symbol: str,
+                     force_refresh: bool = False) -> float:
+    """Last price from the snapshot when available, else a single-symbol request."""
+    if tickers is not None:
+        return tickers.get_price(symbol, force_refresh=force_refresh)
+    response = session.get_tickers(category="linear", symbol=symbol)
+    return float(response["result"]["list"][0]["lastPrice"])
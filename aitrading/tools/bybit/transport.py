@@ -0,0 +1,316 @@
+# aitrading/tools/bybit/transport.py
+
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from pybit.unified_trading import HTTP
+import logfire
+
+from ..redis.provider import RedisProvider
+from .replay.recorder import ResponseRecorder
+
+# Public market endpoints share Bybit's per-IP budget (600 requests / 5s);
+# private endpoints have their own per-UID budget, reported in the
+# X-Bapi-Limit-* headers of each response.
+MARKET_GROUP = "market"
+
+
+def endpoint_group(path: str) -> str:
+    """Rate limit group of a REST path."""
+    if path.startswith("/v5/market/"):
+        return MARKET_GROUP
+    return path
+
+
+class _Bucket:
+    """Token bucket state for one endpoint group."""
+
+    def __init__(self, rate: float):
+        self.capacity = rate
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.time()
+        self.blocked_until = 0.0
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RateLimiter:
+    """Per endpoint group token buckets, synced with Bybit's rate limit headers.
+
+    Buckets start from the configured rates and adopt the limit reported by
+    the exchange (``X-Bapi-Limit``, requests per second) once seen. The
+    remaining budget (``X-Bapi-Limit-Status``) caps the local tokens, and an
+    exhausted budget blocks the group until ``X-Bapi-Limit-Reset-Timestamp``.
+    """
+
+    def __init__(self, market_rate: float = 100.0, default_rate: float = 10.0,
+                 max_block_seconds: float = 10.0):
+        self.market_rate = market_rate
+        self.default_rate = default_rate
+        self.max_block_seconds = max_block_seconds
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "throttled": 0, "waited_seconds": 0.0}
+
+    def _initial_rate(self, group: str) -> float:
+        return self.market_rate if group == MARKET_GROUP else self.default_rate
+
+    def _reserve(self, group: str) -> float:
+        """Take a token if available. Returns the seconds to wait otherwise."""
+        with self._lock:
+            bucket = self._buckets.get(group)
+            if bucket is None:
+                bucket = self._buckets[group] = _Bucket(self._initial_rate(group))
+            now = time.time()
+            if now < bucket.blocked_until:
+                return bucket.blocked_until - now
+            bucket.refill(now)
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return 0.0
+            return (1 - bucket.tokens) / bucket.rate
+
+    def acquire(self, group: str) -> float:
+        """Block until a request of the group may be sent. Returns the time waited."""
+        waited = 0.0
+        while True:
+            wait = self._reserve(group)
+            if wait <= 0:
+                break
+            time.sleep(wait)
+            waited += wait
+
+        self.stats["requests"] += 1
+        if waited:
+            self.stats["throttled"] += 1
+            self.stats["waited_seconds"] += waited
+            logfire.debug("Request delayed by rate limiter", group=group, waited=round(waited, 3))
+        return waited
+
+    def observe(self, group: str, limit: int, remaining: int, reset_ms: Optional[int]) -> None:
+        """Sync a group's bucket with the limits reported by the exchange."""
+        with self._lock:
+            bucket = self._buckets.get(group)
+            if bucket is None:
+                bucket = self._buckets[group] = _Bucket(self._initial_rate(group))
+            now = time.time()
+            bucket.refill(now)
+            bucket.capacity = bucket.rate = float(limit)
+            bucket.tokens = min(bucket.tokens, float(remaining))
+            if remaining <= 0 and reset_ms:
+                bucket.blocked_until = min(reset_ms / 1000, now + self.max_block_seconds)
+
+    def block(self, group: str, seconds: float) -> None:
+        """Stop sending requests of a group for a while (e.g. after a throttle error)."""
+        with self._lock:
+            bucket = self._buckets.get(group)
+            if bucket is None:
+                bucket = self._buckets[group] = _Bucket(self._initial_rate(group))
+            bucket.blocked_until = max(bucket.blocked_until, time.time() + min(seconds, self.max_block_seconds))
+
+    def summary(self) -> Dict[str, float]:
+        """Snapshot of limiter counters, suitable for structured logging."""
+        return {**self.stats, "groups": len(self._buckets)}
+
+
+# Token bucket in a Redis hash. Uses the server clock so that every replica
+# sees the same time. Returns the milliseconds to wait (0 = token taken).
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'rate', 'blocked_until')
+local rate = tonumber(b[3]) or tonumber(ARGV[1])
+local tokens = tonumber(b[1]) or rate
+local ts = tonumber(b[2]) or now
+local blocked = tonumber(b[4]) or 0
+if now < blocked then
+    return blocked - now
+end
+tokens = math.min(rate, tokens + (now - ts) * rate / 1000)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now, 'rate', tostring(rate))
+redis.call('PEXPIRE', KEYS[1], 60000)
+return wait
+"""
+
+# ARGV: limit, remaining, reset timestamp (ms, 0 if unknown), max block (ms)
+_OBSERVE_SCRIPT = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'rate')
+local limit = tonumber(ARGV[1])
+local remaining = tonumber(ARGV[2])
+local rate = tonumber(b[3]) or limit
+local tokens = tonumber(b[1]) or limit
+local ts = tonumber(b[2]) or now
+tokens = math.min(limit, math.min(rate, tokens + (now - ts) * rate / 1000), remaining)
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now, 'rate', tostring(limit))
+if remaining <= 0 and tonumber(ARGV[3]) > 0 then
+    redis.call('HSET', KEYS[1], 'blocked_until', math.min(tonumber(ARGV[3]), now + tonumber(ARGV[4])))
+end
+redis.call('PEXPIRE', KEYS[1], 60000)
+return 0
+"""
+
+_BLOCK_SCRIPT = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local blocked = tonumber(redis.call('HGET', KEYS[1], 'blocked_until')) or 0
+redis.call('HSET', KEYS[1], 'blocked_until', math.max(blocked, now + tonumber(ARGV[1])))
+redis.call('PEXPIRE', KEYS[1], 60000)
+return 0
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """RateLimiter whose buckets live in Redis, shared by all replicas.
+
+    Falls back to the in-process buckets while Redis is unavailable.
+    """
+
+    def __init__(self, redis_provider: RedisProvider, market_rate: float = 100.0,
+                 default_rate: float = 10.0, max_block_seconds: float = 10.0):
+        super().__init__(market_rate, default_rate, max_block_seconds)
+        self.redis = redis_provider
+        self._scripts = None
+
+    def _key(self, group: str) -> str:
+        return self.redis.get_prefixed_key(f"ratelimit:{group}")
+
+    def _get_scripts(self):
+        if self._scripts is None:
+            client = self.redis.client
+            self._scripts = (
+                client.register_script(_ACQUIRE_SCRIPT),
+                client.register_script(_OBSERVE_SCRIPT),
+                client.register_script(_BLOCK_SCRIPT),
+            )
+        return self._scripts
+
+    def _reserve(self, group: str) -> float:
+        try:
+            acquire, _, _ = self._get_scripts()
+            return int(acquire(keys=[self._key(group)], args=[self._initial_rate(group)])) / 1000
+        except Exception as e:
+            logfire.warning("Shared rate limiter unavailable, using local limits",
+                            group=group, error=str(e))
+            return super()._reserve(group)
+
+    def observe(self, group: str, limit: int, remaining: int, reset_ms: Optional[int]) -> None:
+        super().observe(group, limit, remaining, reset_ms)
+        try:
+            _, observe, _ = self._get_scripts()
+            observe(keys=[self._key(group)],
+                    args=[limit, remaining, reset_ms or 0, int(self.max_block_seconds * 1000)])
+        except Exception as e:
+            logfire.warning("Failed to update shared rate limiter", group=group, error=str(e))
+
+    def block(self, group: str, seconds: float) -> None:
+        super().block(group, seconds)
+        try:
+            _, _, block = self._get_scripts()
+            block(keys=[self._key(group)], args=[int(min(seconds, self.max_block_seconds) * 1000)])
+        except Exception as e:
+            logfire.warning("Failed to update shared rate limiter", group=group, error=str(e))
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that waits for the rate limiter before each request and
+    feeds the exchange's rate limit headers back into it."""
+
+    # Bybit answers 403 when the IP limit is exceeded, blocking it for a while
+    IP_BAN_BACKOFF_SECONDS = 10.0
+
+    def __init__(self, limiter: RateLimiter, recorder=None, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter
+        self.recorder = recorder
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        group = endpoint_group(urlparse(request.url).path)
+        self.limiter.acquire(group)
+
+        response = super().send(request, **kwargs)
+
+        headers = response.headers
+        if "X-Bapi-Limit" in headers and "X-Bapi-Limit-Status" in headers:
+            try:
+                reset = headers.get("X-Bapi-Limit-Reset-Timestamp")
+                self.limiter.observe(
+                    group,
+                    limit=int(headers["X-Bapi-Limit"]),
+                    remaining=int(headers["X-Bapi-Limit-Status"]),
+                    reset_ms=int(reset) if reset else None,
+                )
+            except ValueError:
+                pass
+        elif response.status_code == 403:
+            logfire.warning("Bybit rejected request with 403, backing off", group=group)
+            self.limiter.block(group, self.IP_BAN_BACKOFF_SECONDS)
+
+        if self.recorder is not None:
+            try:
+                self.recorder.record(request, response)
+            except Exception as e:
+                logfire.warning("Failed to record response", url=request.url, error=str(e))
+
+        return response
+
+
+class BybitTransport:
+    """pybit HTTP session shared by the Bybit tools.
+
+    Requests go through a pooled keep-alive connection adapter that applies
+    the rate limiter, so market data and order traffic draw from the same
+    budgets instead of bursting independently.
+
+    ``endpoint`` replaces the exchange's base URL (e.g. with a local
+    ``ReplayServer``) and ``record_path`` records every response for replay.
+    """
+
+    def __init__(self, api_key: str, api_secret: str, testnet: bool = False,
+                 limiter: Optional[RateLimiter] = None,
+                 pool_connections: int = 4, pool_maxsize: int = 16,
+                 endpoint: Optional[str] = None, record_path: Optional[str] = None):
+        self.limiter = limiter or RateLimiter()
+        self.session = HTTP(testnet=testnet, api_key=api_key, api_secret=api_secret)
+        if endpoint:
+            self.session.endpoint = endpoint.rstrip("/")
+
+        self.recorder = ResponseRecorder(record_path) if record_path else None
+        adapter = RateLimitedAdapter(self.limiter, recorder=self.recorder,
+                                     pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.client.mount("https://", adapter)
+        self.session.client.mount("http://", adapter)
+
+        logfire.info("Bybit transport initialized",
+                     testnet=testnet,
+                     endpoint=self.session.endpoint,
+                     recording=record_path,
+                     shared_limits=isinstance(self.limiter, RedisRateLimiter),
+                     pool_maxsize=pool_maxsize)
+
+
+def create_rate_limiter(config: dict, redis_provider: Optional[RedisProvider] = None) -> RateLimiter:
+    """Build the rate limiter described by the ``transport.rate_limit`` config."""
+    rate_config = config.get("transport", {}).get("rate_limit", {})
+    params = {
+        "market_rate": rate_config.get("market_rate", 100.0),
+        "default_rate": rate_config.get("default_rate", 10.0),
+        "max_block_seconds": rate_config.get("max_block_seconds", 10.0),
+    }
+    if rate_config.get("shared", False) and redis_provider is not None and redis_provider.enabled:
+        return RedisRateLimiter(redis_provider, **params)
+    return RateLimiter(**params)
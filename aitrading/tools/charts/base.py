@@ -1,12 +1,12 @@
 # aitrading/tools/charts/base.py
 
 import base64
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 import pandas as pd
 from plotly.subplots import make_subplots
 
 
-from .indicators import IndicatorCalculator
+from .indicators import create_indicator_calculator
 from .layout import (
     create_subplots, add_candlesticks, 
     add_indicators, update_layout
@@ -20,23 +20,38 @@ import logfire
 class ChartGeneratorTool:
     """Tool for generating technical analysis charts."""
 
-    def __init__(self):
+    def __init__(self, features: Optional["FeatureStore"] = None):
+        # Imported here: the feature store builds on this package
+        from ..indicators.store import FeatureStore
+
         self.colors = chart_colors()
         self.config = TimeframesConfiguration()
+        self.features = features or FeatureStore()
+
+    def create_charts_for_timeframe(self, df: pd.DataFrame, timeframe: str,
+                                    symbol: Optional[str] = None) -> List[bytes]:
+        """Generate all chart views for a specific timeframe.
 
-    def create_charts_for_timeframe(self, df: pd.DataFrame, timeframe: str) -> List[bytes]:
-        """Generate all chart views for a specific timeframe."""
+        With ``symbol``, indicators already computed for the same candles
+        (e.g. by the market analysis) are reused from the feature store.
+        """
         try:
             # Get configuration for this timeframe
             timeframe_config = self.config.get_timeframe_config(timeframe)
             logfire.debug("get timeframe config", timeframe_config=timeframe_config)
             
             # Calculate all indicators once
-            calculator = IndicatorCalculator(df)
             all_indicators = []
             for view in timeframe_config.views:
                 all_indicators.extend(view.indicators)
-            df_with_indicators = calculator.calculate_all(all_indicators)
+            if symbol is not None:
+                df_with_indicators = self.features.indicators(symbol, timeframe_config, df, all_indicators)
+            else:
+                calculator = create_indicator_calculator(df, self.features.backend)
+                df_with_indicators = calculator.calculate_all(all_indicators)
+            if timeframe_config.display_candles:
+                # Warmup candles only feed the indicators, they are not drawn
+                df_with_indicators = df_with_indicators.iloc[-timeframe_config.display_candles:]
             logfire.debug("Dataframe with indicators", df=df_with_indicators)
             
             # Generate a chart for each view
@@ -2,7 +2,7 @@ from pathlib import Path
 from typing import Dict, List, Optional
 import yaml
 
-from .models import TimeframeConfig, ChartConfig
+from .models import TimeframeConfig, ChartConfig, ResamplingConfig, LookbackConfig, IndicatorSettings
 
 
 class TimeframesConfigurationError(Exception):
@@ -52,6 +52,36 @@ class TimeframesConfiguration:
             
         return list(self._config["timeframes"].keys())
     
+    def get_resampling_config(self) -> ResamplingConfig:
+        """Get configuration for locally resampled timeframes."""
+        if not self._config:
+            raise TimeframesConfigurationError("Configuration not loaded or invalid")
+
+        try:
+            return ResamplingConfig(**(self._config.get("resampling") or {}))
+        except Exception as e:
+            raise TimeframesConfigurationError(f"Invalid resampling configuration: {str(e)}")
+
+    def get_lookback_config(self) -> LookbackConfig:
+        """Get configuration for automatic lookback sizing."""
+        if not self._config:
+            raise TimeframesConfigurationError("Configuration not loaded or invalid")
+
+        try:
+            return LookbackConfig(**(self._config.get("lookback") or {}))
+        except Exception as e:
+            raise TimeframesConfigurationError(f"Invalid lookback configuration: {str(e)}")
+
+    def get_indicator_settings(self) -> IndicatorSettings:
+        """Get configuration of the indicator computation backend."""
+        if not self._config:
+            raise TimeframesConfigurationError("Configuration not loaded or invalid")
+
+        try:
+            return IndicatorSettings(**(self._config.get("indicators") or {}))
+        except Exception as e:
+            raise TimeframesConfigurationError(f"Invalid indicators configuration: {str(e)}")
+
     def create_chart_config(self, symbol: str, timeframes: List[str]) -> ChartConfig:
         """Create chart configuration for given symbol and timeframes."""
         timeframe_configs = []
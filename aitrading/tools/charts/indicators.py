@@ -1,24 +1,43 @@
 # aitrading/tools/charts/indicators.py
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Sequence
 import pandas as pd
 import numpy as np
+from ..indicators import kernels
+from ..indicators.graph import INPUTS, IndicatorGraph, unique_configs
+from ..indicators.percentile import expanding_rank, rank_values
+from ..indicators.atr import atr as average_true_range
+from ..indicators.volume_profile import session_index, session_vwap, volume_profile
 from .models import (
     EmaParameters, BollingerParameters, RsiParameters,
     MacdParameters, VolumeParameters, AtrParameters,
-    IndicatorConfig
+    VolumeProfileParameters, IndicatorConfig
 )
 
+
+def _timestamps(df: pd.DataFrame) -> Optional[np.ndarray]:
+    """Candle open times in ms, when the frame is indexed by them."""
+    if isinstance(df.index, pd.DatetimeIndex):
+        return df.index.as_unit("ms").asi8
+    return None
+
 class IndicatorCalculator:
     """Class for calculating technical indicators with configurable parameters."""
     
     def __init__(self, df: pd.DataFrame):
         """Initialize with a DataFrame containing OHLCV data."""
         self.df = df.copy()
+        self._emas: Dict[int, pd.Series] = {}
+
+    def _ema(self, period: int) -> pd.Series:
+        """EMA of the close, shared by the EMA and MACD indicators."""
+        if period not in self._emas:
+            self._emas[period] = self.df["close"].ewm(span=period, adjust=False).mean()
+        return self._emas[period]
         
     def calculate_ema(self, params: EmaParameters) -> pd.Series:
         """Calculate Exponential Moving Average."""
-        return self.df["close"].ewm(span=params.period, adjust=False).mean()
+        return self._ema(params.period)
         
     def calculate_bollinger(self, params: BollingerParameters) -> Dict[str, pd.Series]:
         """Calculate Bollinger Bands and optionally bandwidth."""
@@ -40,10 +59,7 @@ class IndicatorCalculator:
 
             if params.store_percentile:
                 # Calculate historical percentile of bandwidth
-                bb_width_pct = bb_width.rolling(window=len(bb_width), min_periods=1).apply(
-                    lambda x: pd.Series(x).rank(pct=True).iloc[-1]
-                )
-                result["BB_width_percentile"] = bb_width_pct
+                result["BB_width_percentile"] = expanding_rank(bb_width)
 
         return result
         
@@ -57,8 +73,8 @@ class IndicatorCalculator:
         
     def calculate_macd(self, params: MacdParameters) -> Dict[str, pd.Series]:
         """Calculate MACD indicator."""
-        exp1 = self.df["close"].ewm(span=params.fast_period, adjust=False).mean()
-        exp2 = self.df["close"].ewm(span=params.slow_period, adjust=False).mean()
+        exp1 = self._ema(params.fast_period)
+        exp2 = self._ema(params.slow_period)
         macd = exp1 - exp2
         signal = macd.ewm(span=params.signal_period, adjust=False).mean()
         
@@ -80,18 +96,8 @@ class IndicatorCalculator:
 
     def calculate_atr(self, params: AtrParameters) -> Dict[str, pd.Series]:
         """Calculate Average True Range and related metrics."""
-        high = self.df["high"]
-        low = self.df["low"]
         close = self.df["close"]
-        
-        # Calculate True Range
-        tr1 = high - low
-        tr2 = abs(high - close.shift())
-        tr3 = abs(low - close.shift())
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        
-        # Calculate ATR
-        atr = tr.rolling(window=params.period).mean()
+        atr = average_true_range(self.df, params.period)
         result = {"ATR": atr}
 
         if params.normalize:
@@ -101,20 +107,41 @@ class IndicatorCalculator:
 
         if params.store_percentile:
             # Calculate historical percentile of ATR
-            atr_pct = atr.rolling(window=len(atr), min_periods=1).apply(
-                lambda x: pd.Series(x).rank(pct=True).iloc[-1]
-            )
-            result["ATR_percentile"] = atr_pct
+            result["ATR_percentile"] = expanding_rank(atr)
             
             if params.normalize:
                 # Calculate historical percentile of NATR
-                natr_pct = natr.rolling(window=len(natr), min_periods=1).apply(
-                    lambda x: pd.Series(x).rank(pct=True).iloc[-1]
-                )
-                result["NATR_percentile"] = natr_pct
+                result["NATR_percentile"] = expanding_rank(natr)
 
         return result
 
+    def calculate_volume_profile(self, params: VolumeProfileParameters) -> Dict[str, pd.Series]:
+        """Calculate session VWAP with bands and the developing volume profile levels."""
+        df = self.df
+        sessions = pd.Series(session_index(_timestamps(df), params.session_hours), index=df.index)
+        # Deviations from the session's opening price keep the sums small
+        anchor = df["open"].groupby(sessions).transform("first")
+        deviation = (df["high"] + df["low"] + df["close"]) / 3 - anchor
+        total = df["volume"].groupby(sessions).cumsum()
+        mean = (df["volume"] * deviation).groupby(sessions).cumsum() / total
+        var = (df["volume"] * deviation ** 2).groupby(sessions).cumsum() / total - mean ** 2
+        std = np.sqrt(var.clip(lower=0))
+        vwap = anchor + mean
+
+        # The profile has no Series form: the NumPy engine computes it
+        poc, vah, val = volume_profile(
+            *(df[column].to_numpy(dtype=np.float64) for column in ("open", "high", "low", "volume")),
+            sessions.to_numpy(), params.bin_pct, params.value_area
+        )
+        return {
+            "VWAP": vwap,
+            "VWAP_upper": vwap + params.std_dev * std,
+            "VWAP_lower": vwap - params.std_dev * std,
+            "POC": pd.Series(poc, index=df.index),
+            "VAH": pd.Series(vah, index=df.index),
+            "VAL": pd.Series(val, index=df.index),
+        }
+
     def calculate_indicator(self, config: IndicatorConfig) -> Dict[str, pd.Series]:
         """Calculate a single indicator based on its configuration."""
         if config.type == "ema":
@@ -131,6 +158,8 @@ class IndicatorCalculator:
             return self.calculate_volume(config.parameters)
         elif config.type == "atr":
             return self.calculate_atr(config.parameters)
+        elif config.type == "volume_profile":
+            return self.calculate_volume_profile(config.parameters)
         else:
             raise ValueError(f"Unsupported indicator type: {config.type}")
 
@@ -138,7 +167,7 @@ class IndicatorCalculator:
         """Calculate all configured indicators."""
         df_result = self.df.copy()
         
-        for config in configs:
+        for config in unique_configs(configs):
             indicator_data = self.calculate_indicator(config)
             for name, series in indicator_data.items():
                 df_result[name] = series
@@ -146,6 +175,155 @@ class IndicatorCalculator:
         return df_result
 
 
+class ArrayIndicatorCalculator:
+    """NumPy backend of ``IndicatorCalculator``.
+
+    Reads the OHLCV columns once as contiguous float64 arrays and computes
+    every indicator with the kernels of ``aitrading.tools.indicators.kernels``,
+    through an ``IndicatorGraph``: sub-expressions shared by several
+    indicators are computed once, and only the requested columns are.
+    A DataFrame is only assembled by ``calculate_all``, for plotting.
+    """
+
+    def __init__(self, df: Optional[pd.DataFrame]):
+        """Initialize with a DataFrame containing OHLCV data."""
+        self.df = df
+        if df is not None:
+            self.open, self.high, self.low, self.close, self.volume = (
+                np.ascontiguousarray(df[column].to_numpy(dtype=np.float64))
+                for column in ("open", "high", "low", "close", "volume")
+            )
+            self.timestamp = _timestamps(df)
+
+    @classmethod
+    def from_arrays(cls, open: np.ndarray, high: np.ndarray, low: np.ndarray,
+                    close: np.ndarray, volume: np.ndarray,
+                    timestamp: Optional[np.ndarray] = None) -> "ArrayIndicatorCalculator":
+        """Calculator on OHLCV arrays, 1-D or (series x candles); no frame to assemble.
+
+        ``timestamp`` holds the candle open times in ms, needed by session indicators.
+        """
+        calculator = cls(None)
+        calculator.open, calculator.high, calculator.low, calculator.close, calculator.volume = (
+            np.ascontiguousarray(values, dtype=np.float64) for values in (open, high, low, close, volume)
+        )
+        calculator.timestamp = timestamp
+        return calculator
+
+    def calculate_ema(self, params: EmaParameters) -> np.ndarray:
+        """Calculate Exponential Moving Average."""
+        return kernels.ema(self.close, params.period)
+
+    def calculate_bollinger(self, params: BollingerParameters) -> Dict[str, np.ndarray]:
+        """Calculate Bollinger Bands and optionally bandwidth."""
+        middle, std = kernels.rolling_mean_std(self.close, params.period)
+        upper = middle + params.std_dev * std
+        lower = middle - params.std_dev * std
+        result = {"BB_upper": upper, "BB_middle": middle, "BB_lower": lower}
+
+        if params.calculate_width:
+            result["BB_width"] = (upper - lower) / middle
+            if params.store_percentile:
+                result["BB_width_percentile"] = rank_values(result["BB_width"])
+        return result
+
+    def calculate_rsi(self, params: RsiParameters) -> np.ndarray:
+        """Calculate Relative Strength Index."""
+        return kernels.rsi(self.close, params.period)
+
+    def calculate_macd(self, params: MacdParameters) -> Dict[str, np.ndarray]:
+        """Calculate MACD indicator."""
+        macd = kernels.ema(self.close, params.fast_period) - kernels.ema(self.close, params.slow_period)
+        signal = kernels.ema(macd, params.signal_period)
+        return {"MACD": macd, "MACD_signal": signal, "MACD_hist": macd - signal}
+
+    def calculate_volume(self, params: VolumeParameters) -> Dict[str, np.ndarray]:
+        """Calculate Volume and optionally Volume MA."""
+        result = {"volume": self.volume}
+        if params.ma_period:
+            result["volume_ma"] = kernels.rolling_mean(self.volume, params.ma_period)
+        return result
+
+    def calculate_atr(self, params: AtrParameters) -> Dict[str, np.ndarray]:
+        """Calculate Average True Range and related metrics."""
+        atr = kernels.atr(self.high, self.low, self.close, params.period)
+        result = {"ATR": atr}
+        if params.normalize:
+            result["NATR"] = atr / self.close * 100
+        if params.store_percentile:
+            result["ATR_percentile"] = rank_values(atr)
+            if params.normalize:
+                result["NATR_percentile"] = rank_values(result["NATR"])
+        return result
+
+    def calculate_volume_profile(self, params: VolumeProfileParameters) -> Dict[str, np.ndarray]:
+        """Calculate session VWAP with bands and the developing volume profile levels."""
+        sessions = session_index(self.timestamp, params.session_hours)
+        vwap, std = session_vwap(self.open, self.high, self.low, self.close, self.volume, sessions)
+        poc, vah, val = volume_profile(self.open, self.high, self.low, self.volume, sessions,
+                                       params.bin_pct, params.value_area)
+        return {
+            "VWAP": vwap,
+            "VWAP_upper": vwap + params.std_dev * std,
+            "VWAP_lower": vwap - params.std_dev * std,
+            "POC": poc, "VAH": vah, "VAL": val,
+        }
+
+    def calculate_indicator(self, config: IndicatorConfig) -> Dict[str, np.ndarray]:
+        """Calculate a single indicator based on its configuration."""
+        if config.type == "ema":
+            return {f"EMA{config.parameters.period}": self.calculate_ema(config.parameters)}
+        elif config.type == "bollinger":
+            return self.calculate_bollinger(config.parameters)
+        elif config.type == "rsi":
+            return {"RSI": self.calculate_rsi(config.parameters)}
+        elif config.type == "macd":
+            return self.calculate_macd(config.parameters)
+        elif config.type == "volume":
+            return self.calculate_volume(config.parameters)
+        elif config.type == "atr":
+            return self.calculate_atr(config.parameters)
+        elif config.type == "volume_profile":
+            return self.calculate_volume_profile(config.parameters)
+        else:
+            raise ValueError(f"Unsupported indicator type: {config.type}")
+
+    def calculate_arrays(self, configs: list[IndicatorConfig],
+                         columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Calculate the configured indicators as arrays, by column name.
+
+        With ``columns``, only those columns (and what they depend on) are computed.
+        """
+        inputs = {name: getattr(self, name) for name in INPUTS}
+        return IndicatorGraph(configs).evaluate(inputs, columns)
+
+    def calculate_all(self, configs: list[IndicatorConfig],
+                      columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Calculate all configured indicators, or only ``columns``."""
+        arrays = self.calculate_arrays(configs, columns)
+        new = {name: values for name, values in arrays.items() if name not in self.df.columns}
+        df_result = self.df.copy()
+        for name in arrays.keys() - new.keys():
+            df_result[name] = arrays[name]
+        if not new:
+            return df_result
+        return pd.concat([df_result, pd.DataFrame(new, index=self.df.index)], axis=1)
+
+
+CALCULATORS = {
+    "pandas": IndicatorCalculator,
+    "numpy": ArrayIndicatorCalculator,
+}
+
+
+def create_indicator_calculator(df: pd.DataFrame, backend: str = "pandas"):
+    """Indicator calculator of the configured backend."""
+    try:
+        return CALCULATORS[backend](df)
+    except KeyError:
+        raise ValueError(f"Unsupported indicator backend: {backend}")
+
+
 # Legacy functions for backward compatibility
 def calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
     """Legacy function that calculates all indicators with default parameters."""
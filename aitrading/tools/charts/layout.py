@@ -86,6 +86,35 @@ def add_overlay_indicator(fig: go.Figure, df: pd.DataFrame, indicator: Indicator
                 row=1,
                 col=1,
             )
+    elif indicator.type == "volume_profile":
+        add_volume_profile(fig, df, indicator, colors)
+
+
+def add_volume_profile(fig: go.Figure, df: pd.DataFrame, indicator: IndicatorConfig,
+                       colors: dict) -> None:
+    """Add session VWAP with its bands and the developing volume profile levels to the main chart."""
+    std_dev = indicator.parameters.std_dev
+    lines = [
+        ("VWAP", "VWAP", dict(color=colors["vwap"], width=2)),
+        ("VWAP_upper", f"VWAP +{std_dev:g}σ", dict(color=colors["vwap_bands"], width=1.5, dash="dash")),
+        ("VWAP_lower", f"VWAP -{std_dev:g}σ", dict(color=colors["vwap_bands"], width=1.5, dash="dash")),
+        # Profile levels move in steps: drawn as such
+        ("POC", "Point of Control", dict(color=colors["poc"], width=2, shape="hv")),
+        ("VAH", "Value Area High", dict(color=colors["value_area"], width=1.5, dash="dot", shape="hv")),
+        ("VAL", "Value Area Low", dict(color=colors["value_area"], width=1.5, dash="dot", shape="hv")),
+    ]
+    for column, name, line in lines:
+        fig.add_trace(
+            go.Scatter(
+                x=df.index,
+                y=df[column],
+                name=name,
+                line=line,
+                showlegend=True
+            ),
+            row=1,
+            col=1,
+        )
 
 
 def add_volume(fig: go.Figure, df: pd.DataFrame, colors: dict, row: int) -> None:
@@ -0,0 +1,85 @@
+# aitrading/tools/charts/lookback.py
+
+import math
+from typing import List, Optional
+
+from .config import TimeframesConfiguration
+from .models import IndicatorConfig, LookbackConfig, TimeframeConfig
+
+# Longest window among the volatility calculator's indicators (BB width 20,
+# ATR and efficiency periods are shorter)
+VOLATILITY_WARMUP = 20
+
+
+def indicator_warmup(indicator: IndicatorConfig, ema_warmup_factor: float = 3.0,
+                     minutes: Optional[int] = None) -> int:
+    """Candles consumed before an indicator's values are meaningful.
+
+    Rolling indicators need their window filled; exponential ones need a few
+    periods for the seed value to fade; session ones need the start of the
+    session, at most a session of ``minutes`` candles back.
+    """
+    params = indicator.parameters
+
+    def ema(period: int) -> int:
+        return int(math.ceil(period * ema_warmup_factor))
+
+    if indicator.type == "ema":
+        return ema(params.period)
+    if indicator.type == "bollinger":
+        return params.period - 1
+    if indicator.type in ("rsi", "atr"):
+        # One extra candle for the first price difference
+        return params.period
+    if indicator.type == "macd":
+        return ema(params.slow_period) + ema(params.signal_period)
+    if indicator.type == "volume":
+        return (params.ma_period or 1) - 1
+    if indicator.type == "volume_profile" and minutes:
+        return max(0, params.session_hours * 60 // minutes - 1)
+    return 0
+
+
+class LookbackPlanner:
+    """Computes how many candles each timeframe actually needs.
+
+    With ``lookback.auto`` disabled, every timeframe keeps its configured
+    ``candles``. Enabled, the fetch covers the display window plus the
+    longest warmup of the indicators drawn on it, and at least what the
+    volatility metrics read (percentile window, 24h change).
+    """
+
+    def __init__(self, config: Optional[TimeframesConfiguration] = None):
+        self.config = config or TimeframesConfiguration()
+        self.settings: LookbackConfig = self.config.get_lookback_config()
+
+    def display_candles(self, tf_config: TimeframeConfig) -> int:
+        return tf_config.display_candles or tf_config.candles
+
+    def indicators(self, tf_config: TimeframeConfig) -> List[IndicatorConfig]:
+        return [indicator for view in tf_config.views for indicator in view.indicators]
+
+    def chart_candles(self, tf_config: TimeframeConfig) -> int:
+        """Display window plus the longest indicator warmup."""
+        warmup = max(
+            (indicator_warmup(i, self.settings.ema_warmup_factor, tf_config.minutes)
+             for i in self.indicators(tf_config)),
+            default=0
+        )
+        return self.display_candles(tf_config) + warmup
+
+    def volatility_candles(self, tf_config: TimeframeConfig) -> int:
+        """History read by the volatility metrics of a timeframe."""
+        periods_24h = max(1, 1440 // tf_config.minutes)
+        return max(self.settings.percentile_window, periods_24h + 1) + VOLATILITY_WARMUP
+
+    def candles_for(self, tf_config: TimeframeConfig) -> int:
+        """Candles to fetch for a timeframe."""
+        if not self.settings.auto:
+            return tf_config.candles
+        return max(self.chart_candles(tf_config), self.volatility_candles(tf_config))
+
+    @staticmethod
+    def atr_candles(period: int) -> int:
+        """Candles needed for the latest value of a ``period`` ATR."""
+        return period + 1
@@ -1,4 +1,4 @@
-from typing import List, Dict, Optional, Union
+from typing import List, Dict, Literal, Optional, Union
 from pydantic import BaseModel, Field, model_validator
 
 
@@ -111,6 +111,39 @@ class AtrParameters(BaseIndicatorParameters):
     )
 
 
+class VolumeProfileParameters(BaseIndicatorParameters):
+    """Parameters for session VWAP and volume profile.
+
+    The ``volume_profile`` indicator draws the session VWAP with its bands,
+    and the developing volume profile (point of control, value area) of UTC
+    sessions of ``session_hours`` (24 daily, 168 weekly), in price bins of
+    ``bin_pct`` % of the session's opening price. No view enables it by
+    default: add it to a view's indicators in timeframes.yaml, e.g.
+    ``type: "volume_profile"`` with ``parameters: {session_hours: 24}``.
+    """
+    session_hours: int = Field(
+        default=24,
+        ge=1,
+        description="Length of the UTC sessions VWAP and profile restart on (24: daily, 168: weekly from Monday)"
+    )
+    std_dev: float = Field(
+        default=1.0,
+        ge=0,
+        description="VWAP band distance, in volume-weighted standard deviations"
+    )
+    bin_pct: float = Field(
+        default=0.1,
+        gt=0,
+        description="Profile price bin width, as percentage of the session's opening price"
+    )
+    value_area: float = Field(
+        default=0.7,
+        gt=0,
+        le=1,
+        description="Share of the session volume within the value area"
+    )
+
+
 # Mapping between indicator type and its parameter class
 INDICATOR_PARAMS_MAP = {
     "ema": EmaParameters,
@@ -118,7 +151,8 @@ INDICATOR_PARAMS_MAP = {
     "rsi": RsiParameters,
     "macd": MacdParameters,
     "volume": VolumeParameters,
-    "atr": AtrParameters
+    "atr": AtrParameters,
+    "volume_profile": VolumeProfileParameters
 }
 
 
@@ -126,7 +160,8 @@ class IndicatorConfig(BaseModel):
     """Configuration for a single indicator."""
     type: str
     parameters: Union[EmaParameters, BollingerParameters, RsiParameters,
-                     MacdParameters, VolumeParameters, AtrParameters]
+                     MacdParameters, VolumeParameters, AtrParameters,
+                     VolumeProfileParameters]
     subplot: bool = False
     overlay: bool = False
 
@@ -174,9 +209,114 @@ class TimeframeConfig(BaseModel):
     interval: str
     candles: int = Field(ge=1, description="Number of candles to fetch")
     minutes: int = Field(ge=1, description="Minutes per candle")
+    display_candles: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Candles drawn on charts; with automatic lookback, the fetch adds indicator warmup to it"
+    )
     views: List[ChartView]
 
 
+class ResamplingGroup(BaseModel):
+    """Timeframes built from one base series."""
+    base_timeframe: str = Field(description="Timeframe fetched from the exchange")
+    timeframes: List[str] = Field(
+        default_factory=list,
+        description="Timeframes built locally by resampling the base series"
+    )
+
+
+class ResamplingConfig(BaseModel):
+    """Configuration for deriving coarser timeframes from base series.
+
+    ``groups`` lists each base with the timeframes built from it, so coarse
+    timeframes can use an intermediate base (4H from 1H rather than 5m).
+    Without groups, ``base_timeframe`` and ``timeframes`` form the only one.
+    """
+    enabled: bool = False
+    base_timeframe: str = Field(
+        default="5m",
+        description="Base timeframe when no groups are configured"
+    )
+    timeframes: List[str] = Field(
+        default_factory=list,
+        description="Timeframes resampled from base_timeframe when no groups are configured"
+    )
+    groups: List[ResamplingGroup] = Field(
+        default_factory=list,
+        description="Base timeframes, each with the timeframes built from it"
+    )
+    reconcile_every: int = Field(
+        default=12,
+        ge=0,
+        description="Compare derived candles with exchange candles every N builds (0 disables)"
+    )
+    reconcile_candles: int = Field(
+        default=20,
+        ge=1,
+        description="Number of recent exchange candles fetched for reconciliation"
+    )
+    refresh_seconds: float = Field(
+        default=10.0,
+        ge=0,
+        description="Reuse a base series fetched less than this many seconds ago"
+    )
+    max_base_candles: int = Field(
+        default=3000,
+        ge=1,
+        description="Deepest base series kept; timeframes needing more base candles are fetched from the exchange"
+    )
+
+    @model_validator(mode='after')
+    def validate_groups(self):
+        """Validate that each timeframe is built from a single base, itself fetched."""
+        bases = {group.base_timeframe for group in self.get_groups()}
+        derived = set()
+        for group in self.get_groups():
+            for timeframe in group.timeframes:
+                if timeframe in derived or timeframe in bases:
+                    raise ValueError(f"Timeframe {timeframe} is listed more than once or is also a base")
+                derived.add(timeframe)
+        return self
+
+    def get_groups(self) -> List[ResamplingGroup]:
+        """Configured groups, or the single group of the flat fields."""
+        if self.groups:
+            return self.groups
+        return [ResamplingGroup(base_timeframe=self.base_timeframe, timeframes=self.timeframes)]
+
+
+class LookbackConfig(BaseModel):
+    """Configuration for deriving each timeframe's fetch size from its indicators."""
+    auto: bool = Field(
+        default=False,
+        description="Fetch display window + indicator warmup + percentile window instead of `candles`"
+    )
+    ema_warmup_factor: float = Field(
+        default=3.0,
+        gt=0,
+        description="EMA warmup in multiples of the period (3x leaves under 0.3% weight on the seed)"
+    )
+    percentile_window: int = Field(
+        default=100,
+        ge=1,
+        description="Values ranked by percentile metrics (volatility historical window)"
+    )
+
+
+class IndicatorSettings(BaseModel):
+    """Configuration of the indicator computation backend."""
+    backend: Literal["pandas", "numpy"] = Field(
+        default="pandas",
+        description="pandas Series arithmetic, or NumPy kernels on float64 arrays"
+    )
+    precision: Literal["float64", "float32"] = Field(
+        default="float64",
+        description="Storage of the indicator columns of shared feature frames; "
+                    "prices, volumes and ATR stay float64"
+    )
+
+
 class ChartConfig(BaseModel):
     """Complete configuration for chart generation."""
     symbol: str
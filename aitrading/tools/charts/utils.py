@@ -46,6 +46,10 @@ def chart_colors() -> Dict[str, str]:
         "signal_line": "#FBBF24",
         "macd_hist_pos": "rgba(38, 166, 154, 0.7)",
         "macd_hist_neg": "rgba(239, 83, 80, 0.7)",
+        "vwap": "#F472B6",
+        "vwap_bands": "rgba(244, 114, 182, 0.4)",
+        "poc": "#FACC15",
+        "value_area": "rgba(250, 204, 21, 0.5)",
     }
 
 def fig_to_image(fig: go.Figure) -> bytes:
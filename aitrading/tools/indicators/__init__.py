@@ -0,0 +1,8 @@
+# aitrading/tools/indicators/__init__.py
+
+# The incremental engine and the feature store build on the chart models and
+# calculators, which use this package: import them from their modules.
+from .percentile import expanding_rank, rolling_rank, last_rank
+from .atr import true_range, atr
+
+__all__ = ['expanding_rank', 'rolling_rank', 'last_rank', 'true_range', 'atr']
@@ -0,0 +1,18 @@
+# aitrading/tools/indicators/atr.py
+
+import pandas as pd
+
+
+def true_range(df: pd.DataFrame) -> pd.Series:
+    """True range of each candle; the first one has no previous close and uses high - low."""
+    prev_close = df["close"].shift()
+    return pd.concat([
+        df["high"] - df["low"],
+        (df["high"] - prev_close).abs(),
+        (df["low"] - prev_close).abs(),
+    ], axis=1).max(axis=1)
+
+
+def atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
+    """Average True Range: simple moving average of the true range."""
+    return true_range(df).rolling(window=period).mean()
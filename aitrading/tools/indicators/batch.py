@@ -0,0 +1,84 @@
+# aitrading/tools/indicators/batch.py
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..charts.indicators import ArrayIndicatorCalculator
+from ..charts.models import IndicatorConfig
+
+OHLCV = ("open", "high", "low", "close", "volume")
+
+
+class IndicatorBlock:
+    """Indicator columns of many symbols, as one (columns x symbols x candles) array.
+
+    ``values[c, s]`` is column ``columns[c]`` of symbol ``symbols[s]``;
+    ``for_symbol`` returns views into it, without copying.
+    """
+
+    def __init__(self, symbols: List[str], columns: List[str], values: np.ndarray,
+                 timestamps: np.ndarray):
+        self.symbols = symbols
+        self.columns = columns
+        self.values = values
+        self.timestamps = timestamps
+        self._symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+        self._column_index = {column: i for i, column in enumerate(columns)}
+
+    def column(self, name: str) -> np.ndarray:
+        """A column for every symbol, (symbols x candles)."""
+        return self.values[self._column_index[name]]
+
+    def latest(self, name: str) -> Dict[str, float]:
+        """Last value of a column, by symbol."""
+        return dict(zip(self.symbols, self.column(name)[:, -1].tolist()))
+
+    def for_symbol(self, symbol: str) -> Dict[str, np.ndarray]:
+        """Columns of one symbol, by name."""
+        s = self._symbol_index[symbol]
+        return {column: self.values[c, s] for c, column in enumerate(self.columns)}
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """Columns of one symbol as a DataFrame indexed by candle time."""
+        index = pd.DatetimeIndex(pd.to_datetime(self.timestamps[self._symbol_index[symbol]], unit="ms"),
+                                 name="timestamp")
+        return pd.DataFrame(self.for_symbol(symbol), index=index)
+
+
+class IndicatorBatch:
+    """OHLCV of many symbols of one timeframe, as (symbols x candles) arrays.
+
+    Indicators are computed with the NumPy kernels along the symbol axis in
+    one pass, instead of one frame at a time. Series are aligned on their
+    last ``candles`` rows (by default the shortest series' length), so each
+    row of the block ends on the symbol's latest candle.
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], candles: Optional[int] = None):
+        if not frames:
+            raise ValueError("No series to batch")
+        self.symbols = list(frames)
+        shortest = min(len(df) for df in frames.values())
+        self.candles = min(candles, shortest) if candles else shortest
+        if self.candles == 0:
+            raise ValueError("Empty series in batch")
+
+        tails = [df.iloc[-self.candles:] for df in frames.values()]
+        self.timestamps = np.stack([df.index.as_unit("ms").asi8 for df in tails])
+        for name in OHLCV:
+            setattr(self, name, np.stack([df[name].to_numpy(dtype=np.float64) for df in tails]))
+
+    def calculate(self, configs: List[IndicatorConfig],
+                  columns: Optional[Sequence[str]] = None) -> IndicatorBlock:
+        """Compute the configured indicators (or only ``columns``) for every symbol."""
+        calculator = ArrayIndicatorCalculator.from_arrays(
+            self.open, self.high, self.low, self.close, self.volume, self.timestamps
+        )
+        arrays = calculator.calculate_arrays(configs, columns)
+        columns = list(arrays)
+        values = np.empty((len(columns), len(self.symbols), self.candles))
+        for c, column in enumerate(columns):
+            values[c] = arrays[column]
+        return IndicatorBlock(self.symbols, columns, values, self.timestamps)
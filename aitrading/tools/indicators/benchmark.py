@@ -0,0 +1,94 @@
+# aitrading/tools/indicators/benchmark.py
+
+"""Micro-benchmark of the indicator backends.
+
+Times ``calculate_all`` with the pandas and NumPy calculators on a
+synthetic random walk, for the indicators of every configured timeframe
+and for a set using every indicator type.
+
+Usage:
+    python -m aitrading.tools.indicators.benchmark --candles 672 --repeat 200
+"""
+
+import argparse
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from ..charts.config import TimeframesConfiguration
+from ..charts.indicators import CALCULATORS
+from ..charts.models import IndicatorConfig
+
+ALL_INDICATORS = [
+    IndicatorConfig(type="ema", parameters={"period": 21}),
+    IndicatorConfig(type="ema", parameters={"period": 100}),
+    IndicatorConfig(type="bollinger", parameters={"period": 20, "calculate_width": True, "store_percentile": True}),
+    IndicatorConfig(type="rsi", parameters={"period": 14}),
+    IndicatorConfig(type="macd", parameters={}),
+    IndicatorConfig(type="volume", parameters={"ma_period": 20}),
+    IndicatorConfig(type="atr", parameters={"period": 14, "normalize": True, "store_percentile": True}),
+    IndicatorConfig(type="volume_profile", parameters={"session_hours": 24}),
+]
+
+
+def synthetic_candles(candles: int, seed: int = 0, interval_minutes: int = 60) -> pd.DataFrame:
+    """Random walk OHLCV frame shaped like the market data tool's output."""
+    rng = np.random.default_rng(seed)
+    close = 60_000 + np.cumsum(rng.normal(0, 150, candles))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    high = np.maximum(open_, close) + rng.random(candles) * 80
+    low = np.minimum(open_, close) - rng.random(candles) * 80
+    volume = rng.random(candles) * 50
+    index = pd.date_range("2024-01-01", periods=candles, freq=f"{interval_minutes}min", name="timestamp")
+    return pd.DataFrame({
+        "open": open_, "high": high, "low": low, "close": close,
+        "volume": volume, "turnover": volume * close,
+    }, index=index)
+
+
+def best_of(fn: Callable[[], object], repeat: int) -> float:
+    """Fastest of ``repeat`` runs, in milliseconds."""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def run(candles: int, repeat: int) -> List[Dict[str, object]]:
+    config = TimeframesConfiguration()
+    cases = {
+        tf: [i for view in config.get_timeframe_config(tf).views for i in view.indicators]
+        for tf in config.get_base_timeframes()
+    }
+    cases["all types"] = ALL_INDICATORS
+
+    df = synthetic_candles(candles)
+    rows = []
+    for name, indicators in cases.items():
+        timings = {
+            backend: best_of(lambda: calculator(df).calculate_all(indicators), repeat)
+            for backend, calculator in CALCULATORS.items()
+        }
+        rows.append({"case": name, **timings, "speedup": timings["pandas"] / timings["numpy"]})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the indicator backends")
+    parser.add_argument("--candles", type=int, default=672)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{args.candles} candles, best of {args.repeat}")
+    print(f"{'case':<12} {'pandas ms':>10} {'numpy ms':>10} {'speedup':>8}")
+    for row in run(args.candles, args.repeat):
+        print(f"{row['case']:<12} {row['pandas']:>10.3f} {row['numpy']:>10.3f} {row['speedup']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# aitrading/tools/indicators/graph.py
+
+"""Indicator configurations compiled into a graph of shared sub-expressions.
+
+The views of a timeframe list their indicators separately, so the same EMA
+can appear twice, and MACD needs the EMAs of its fast and slow periods that
+may be configured on their own. Every intermediate series (EMA, rolling
+mean and standard deviation, true range, percentile rank, session index)
+becomes a node
+keyed by its operation, inputs and parameters: equal keys are the same
+node and are evaluated once. Output columns point to nodes, and only the
+nodes behind the requested columns are evaluated.
+"""
+
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import kernels
+from .percentile import rank_values
+from .volume_profile import session_index, session_vwap, volume_profile
+
+if TYPE_CHECKING:
+    # charts.indicators imports this module: the graph only reads config
+    # attributes, so the models are needed for annotations only
+    from ..charts.models import IndicatorConfig
+
+Key = Tuple[Hashable, ...]
+
+INPUTS = ("open", "high", "low", "close", "volume", "timestamp")
+
+
+def unique_configs(configs: Sequence["IndicatorConfig"]) -> List["IndicatorConfig"]:
+    """``configs`` without repeated indicators, in order of first appearance."""
+    seen = set()
+    unique = []
+    for config in configs:
+        key = (config.type, config.parameters.model_dump_json())
+        if key not in seen:
+            seen.add(key)
+            unique.append(config)
+    return unique
+
+
+def _pick(values, index: int) -> np.ndarray:
+    return values[index]
+
+
+def _band(middle: np.ndarray, std: np.ndarray, width: float) -> np.ndarray:
+    return middle + width * std
+
+
+def _band_width(upper: np.ndarray, lower: np.ndarray, middle: np.ndarray) -> np.ndarray:
+    return (upper - lower) / middle
+
+
+def _percent_of(value: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    return value / reference * 100
+
+
+class IndicatorGraph:
+    """Compiled indicator configurations.
+
+    ``outputs`` maps each column to the node computing it, in the order
+    ``calculate_all`` adds them. A later indicator writing the same column
+    replaces the earlier one, as with ``calculate_all``.
+    """
+
+    def __init__(self, configs: Sequence["IndicatorConfig"]):
+        self.configs = unique_configs(configs)
+        self.nodes: Dict[Key, Tuple[Optional[Callable], Tuple[Key, ...]]] = {
+            (name,): (None, ()) for name in INPUTS
+        }
+        self.outputs: Dict[str, Key] = {}
+        self._plans: Dict[Tuple[str, ...], List[Key]] = {}
+        for config in self.configs:
+            self._compile(config)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.outputs)
+
+    def _node(self, key: Key, fn: Callable, *deps: Key) -> Key:
+        self.nodes.setdefault(key, (fn, deps))
+        return key
+
+    def _ema(self, source: Key, period: int) -> Key:
+        return self._node(("ema", source, period), partial(kernels.ema, period=period), source)
+
+    def _mean(self, source: Key, period: int) -> Key:
+        return self._node(("mean", source, period), partial(kernels.rolling_mean, window=period), source)
+
+    def _rank(self, source: Key) -> Key:
+        return self._node(("rank", source), rank_values, source)
+
+    def _pick(self, source: Key, index: int) -> Key:
+        return self._node(("pick", source, index), partial(_pick, index=index), source)
+
+    def _compile(self, config: "IndicatorConfig") -> None:
+        params = config.parameters
+        close = ("close",)
+        out = self.outputs
+
+        if config.type == "ema":
+            out[f"EMA{params.period}"] = self._ema(close, params.period)
+        elif config.type == "bollinger":
+            stats = self._node(("mean_std", close, params.period),
+                               partial(kernels.rolling_mean_std, window=params.period), close)
+            middle = self._pick(stats, 0)
+            std = self._pick(stats, 1)
+            upper = self._node(("band", middle, std, params.std_dev),
+                               partial(_band, width=params.std_dev), middle, std)
+            lower = self._node(("band", middle, std, -params.std_dev),
+                               partial(_band, width=-params.std_dev), middle, std)
+            out.update({"BB_upper": upper, "BB_middle": middle, "BB_lower": lower})
+            if params.calculate_width:
+                width = self._node(("band_width", upper, lower, middle), _band_width, upper, lower, middle)
+                out["BB_width"] = width
+                if params.store_percentile:
+                    out["BB_width_percentile"] = self._rank(width)
+        elif config.type == "rsi":
+            out["RSI"] = self._node(("rsi", close, params.period),
+                                    partial(kernels.rsi, period=params.period), close)
+        elif config.type == "macd":
+            fast = self._ema(close, params.fast_period)
+            slow = self._ema(close, params.slow_period)
+            macd = self._node(("sub", fast, slow), np.subtract, fast, slow)
+            signal = self._ema(macd, params.signal_period)
+            hist = self._node(("sub", macd, signal), np.subtract, macd, signal)
+            out.update({"MACD": macd, "MACD_signal": signal, "MACD_hist": hist})
+        elif config.type == "volume":
+            volume = ("volume",)
+            out["volume"] = volume
+            if params.ma_period:
+                out["volume_ma"] = self._mean(volume, params.ma_period)
+        elif config.type == "atr":
+            tr = self._node(("true_range",), kernels.true_range, ("high",), ("low",), close)
+            atr = self._mean(tr, params.period)
+            out["ATR"] = atr
+            if params.normalize:
+                out["NATR"] = self._node(("percent_of", atr, close), _percent_of, atr, close)
+            if params.store_percentile:
+                out["ATR_percentile"] = self._rank(atr)
+                if params.normalize:
+                    out["NATR_percentile"] = self._rank(out["NATR"])
+        elif config.type == "volume_profile":
+            ohlcv = tuple((name,) for name in INPUTS[:5])
+            sessions = self._node(("session", ("timestamp",), params.session_hours),
+                                  partial(session_index, session_hours=params.session_hours), ("timestamp",))
+            stats = self._node(("vwap", sessions), session_vwap, *ohlcv, sessions)
+            vwap = self._pick(stats, 0)
+            std = self._pick(stats, 1)
+            profile = self._node(("profile", sessions, params.bin_pct, params.value_area),
+                                 partial(volume_profile, bin_pct=params.bin_pct, fraction=params.value_area),
+                                 ("open",), ("high",), ("low",), ("volume",), sessions)
+            out.update({
+                "VWAP": vwap,
+                "VWAP_upper": self._node(("band", vwap, std, params.std_dev),
+                                         partial(_band, width=params.std_dev), vwap, std),
+                "VWAP_lower": self._node(("band", vwap, std, -params.std_dev),
+                                         partial(_band, width=-params.std_dev), vwap, std),
+                "POC": self._pick(profile, 0),
+                "VAH": self._pick(profile, 1),
+                "VAL": self._pick(profile, 2),
+            })
+        else:
+            raise ValueError(f"Unsupported indicator type: {config.type}")
+
+    def plan(self, columns: Optional[Sequence[str]] = None) -> List[Key]:
+        """Nodes needed for ``columns`` (all by default), each after its inputs."""
+        columns = tuple(self.outputs if columns is None else columns)
+        if columns in self._plans:
+            return self._plans[columns]
+
+        unknown = [column for column in columns if column not in self.outputs]
+        if unknown:
+            raise ValueError(f"Unknown indicator columns: {unknown}")
+
+        order: List[Key] = []
+        visited = set()
+
+        def visit(key: Key) -> None:
+            if key in visited:
+                return
+            visited.add(key)
+            for dep in self.nodes[key][1]:
+                visit(dep)
+            order.append(key)
+
+        for column in columns:
+            visit(self.outputs[column])
+        self._plans[columns] = order
+        return order
+
+    def evaluate(self, inputs: Dict[str, np.ndarray],
+                 columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Arrays of ``columns`` (all by default) from the OHLCV ``inputs``, by column name.
+
+        Inputs can be 1-D or (series x candles); every kernel works along the
+        last axis. ``timestamp`` (candle open times in ms) is only read by
+        session indicators.
+        """
+        values: Dict[Key, np.ndarray] = {}
+        for key in self.plan(columns):
+            fn, deps = self.nodes[key]
+            values[key] = inputs[key[0]] if fn is None else fn(*(values[dep] for dep in deps))
+        return {
+            column: values[self.outputs[column]]
+            for column in (self.outputs if columns is None else columns)
+        }
@@ -0,0 +1,794 @@
+# aitrading/tools/indicators/incremental.py
+
+"""Indicators updated one closed candle at a time.
+
+``IncrementalIndicators`` keeps the running state of every configured
+indicator (EMA values, rolling sums, the previous close, the values being
+ranked) and advances it in constant time when a candle closes, instead of
+recomputing the window. The forming candle is evaluated on top of the
+state without being committed.
+
+``calculate_all`` depends on where its window starts, since EMAs are
+seeded with the first close and percentiles rank within the window. The
+state is anchored instead: it starts on the first candle of a window and
+keeps that start while later windows slide forward, up to
+``reanchor_candles`` candles past it. Results are those of
+``IndicatorCalculator.calculate_all`` on the candles from the anchor to
+the end of the window, trimmed to the window's rows, within floating point
+tolerance. A window sliding further (or not continuing the state) is
+computed in one vectorized pass, and becomes the new anchor.
+
+Percentile ranks take O(log n + sqrt n) per candle over the values of the
+window. Volume profile levels take O(bins) per candle, over the bins the
+session has reached.
+"""
+
+import bisect
+import itertools
+import json
+import math
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import logfire
+
+from ..bybit.kline_cache import split_forming
+from ..charts.models import IndicatorConfig, TimeframeConfig
+from . import kernels
+from .graph import IndicatorGraph
+from .volume_profile import SESSION_ORIGIN_MS, bin_range, bin_volumes, profile_levels, session_index
+
+NAN = float("nan")
+OHLCV = ("open", "high", "low", "close", "volume")
+# Layout of saved states; states of another version are recomputed
+STATE_VERSION = 1
+
+
+def config_fingerprint(configs: List[IndicatorConfig]) -> str:
+    """Stable identifier of an indicator configuration."""
+    return json.dumps([c.model_dump(mode="json") for c in configs], sort_keys=True)
+
+
+class _Running:
+    """Running state made of plain numbers, saved by ``state`` and restored by ``load``."""
+
+    def state(self) -> Dict:
+        raise NotImplementedError
+
+    def load(self, state: Dict) -> None:
+        raise NotImplementedError
+
+
+class _Ema(_Running):
+    """``ewm(span=period, adjust=False).mean()``."""
+
+    def __init__(self, period: int):
+        self.alpha = 2.0 / (period + 1)
+        self.value: Optional[float] = None
+
+    def next(self, x: float, commit: bool = True) -> float:
+        value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        if commit:
+            self.value = value
+        return value
+
+    def seed(self, values: np.ndarray) -> None:
+        """State after ``values``, the EMA of the window so far."""
+        self.value = float(values[-1]) if len(values) else None
+
+    def state(self) -> Dict:
+        return {"value": self.value}
+
+    def load(self, state: Dict) -> None:
+        self.value = state["value"]
+
+
+class _Window(_Running):
+    """Rolling mean and sample standard deviation over a fixed window.
+
+    Sums are kept relative to a shift value to avoid cancellation on large
+    prices, and recomputed exactly once per window to stop drift.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.shift = 0.0
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self.pushes = 0
+
+    def _stats(self, n: int, total: float, total_sq: float) -> Tuple[float, float]:
+        if n < self.size:
+            return NAN, NAN
+        mean = self.shift + total / n
+        if n < 2:
+            return mean, NAN
+        var = max((total_sq - total * total / n) / (n - 1), 0.0)
+        return mean, math.sqrt(var)
+
+    def next(self, x: float, commit: bool = True) -> Tuple[float, float]:
+        """Mean and standard deviation with ``x`` as the newest value."""
+        if not self.values:
+            self.shift = x
+        d = x - self.shift
+        total, total_sq, n = self.sum + d, self.sumsq + d * d, len(self.values) + 1
+        if len(self.values) == self.size:
+            old = self.values[0] - self.shift
+            total, total_sq, n = total - old, total_sq - old * old, self.size
+        stats = self._stats(n, total, total_sq)
+
+        if commit:
+            self.values.append(x)
+            self.sum, self.sumsq = total, total_sq
+            self.pushes += 1
+            if self.pushes % self.size == 0:
+                self._resync()
+        return stats
+
+    def _resync(self) -> None:
+        if not self.values:
+            self.shift = self.sum = self.sumsq = 0.0
+            return
+        self.shift = self.values[0]
+        deltas = [v - self.shift for v in self.values]
+        self.sum = math.fsum(deltas)
+        self.sumsq = math.fsum(d * d for d in deltas)
+
+    def seed(self, values: np.ndarray) -> None:
+        """State after pushing ``values``."""
+        self.values = deque(values[-self.size:].tolist(), maxlen=self.size)
+        self.pushes = len(values)
+        self._resync()
+
+    def state(self) -> Dict:
+        return {"values": list(self.values), "pushes": self.pushes}
+
+    def load(self, state: Dict) -> None:
+        self.values = deque(state["values"], maxlen=self.size)
+        self.pushes = state["pushes"]
+        self._resync()
+
+
+class _SortedValues:
+    """Sorted multiset of floats in blocks of about ``load`` values.
+
+    Insertions and removals shift one block rather than the whole list:
+    O(log n + sqrt n) each instead of O(n).
+    """
+
+    def __init__(self, load: int = 64):
+        self.load = load
+        self.blocks: List[List[float]] = []
+        # Largest value of each block, to find the block holding a value
+        self.maxes: List[float] = []
+        self.size = 0
+
+    def _count(self, x: float, side: Callable) -> int:
+        i = side(self.maxes, x)
+        count = sum(len(block) for block in self.blocks[:i])
+        if i < len(self.blocks):
+            count += side(self.blocks[i], x)
+        return count
+
+    def count_below(self, x: float) -> int:
+        return self._count(x, bisect.bisect_left)
+
+    def count_upto(self, x: float) -> int:
+        return self._count(x, bisect.bisect_right)
+
+    def add(self, x: float) -> None:
+        self.size += 1
+        if not self.blocks:
+            self.blocks.append([x])
+            self.maxes.append(x)
+            return
+        i = min(bisect.bisect_left(self.maxes, x), len(self.blocks) - 1)
+        block = self.blocks[i]
+        bisect.insort(block, x)
+        self.maxes[i] = block[-1]
+        if len(block) > 2 * self.load:
+            self.blocks[i:i + 1] = [block[:self.load], block[self.load:]]
+            self.maxes[i:i + 1] = [block[self.load - 1], block[-1]]
+
+    def remove(self, x: float) -> None:
+        i = bisect.bisect_left(self.maxes, x)
+        block = self.blocks[i]
+        del block[bisect.bisect_left(block, x)]
+        self.size -= 1
+        if block:
+            self.maxes[i] = block[-1]
+        else:
+            del self.blocks[i], self.maxes[i]
+
+
+class _Rank(_Running):
+    """Percentile rank among the last ``window`` values, as
+    ``rolling(window, min_periods=1)`` applying ``rank(pct=True)`` with average
+    ties: NaN values take a place in the window but are not ranked.
+
+    Values are kept in arrival order, to drop the oldest, and sorted, to
+    count the smaller and equal ones.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self.sorted = _SortedValues()
+
+    def next(self, x: float, commit: bool = True) -> float:
+        dropped = self.values[0] if len(self.values) == self.window else NAN
+        if math.isnan(x):
+            rank = NAN
+        else:
+            below = self.sorted.count_below(x)
+            equal = self.sorted.count_upto(x) - below + 1
+            count = self.sorted.size + 1
+            if not math.isnan(dropped):
+                # The oldest value leaves the window as ``x`` enters it
+                below -= dropped < x
+                equal -= dropped == x
+                count -= 1
+            rank = (below + (equal + 1) / 2) / count
+        if commit:
+            if len(self.values) == self.window:
+                self.values.popleft()
+                if not math.isnan(dropped):
+                    self.sorted.remove(dropped)
+            self.values.append(x)
+            if not math.isnan(x):
+                self.sorted.add(x)
+        return rank
+
+    def seed(self, values: np.ndarray) -> None:
+        """State after ranking ``values``."""
+        self.values = deque()
+        self.sorted = _SortedValues()
+        for x in values[-self.window:].tolist():
+            self.values.append(x)
+            if not math.isnan(x):
+                self.sorted.add(x)
+
+    def state(self) -> Dict:
+        return {"values": list(self.values)}
+
+    def load(self, state: Dict) -> None:
+        self.seed(np.asarray(state["values"], dtype=np.float64))
+
+
+class _Indicator:
+    columns: Tuple[str, ...] = ()
+    # Attributes holding the running state: ``_Running`` helpers or plain numbers
+    _state: Tuple[str, ...] = ()
+
+    def next(self, candle: Tuple[float, ...], commit: bool, timestamp: int) -> Dict[str, float]:
+        raise NotImplementedError
+
+    def seed(self, candles: Dict[str, np.ndarray]) -> None:
+        """State after the closed ``candles``, arrays by OHLCV column and ``timestamp``."""
+        raise NotImplementedError
+
+    def state(self) -> Dict:
+        state = {}
+        for name in self._state:
+            value = getattr(self, name)
+            state[name] = value.state() if isinstance(value, _Running) else value
+        return state
+
+    def load(self, state: Dict) -> None:
+        for name in self._state:
+            value = getattr(self, name)
+            if isinstance(value, _Running):
+                value.load(state[name])
+            else:
+                setattr(self, name, state[name])
+
+
+def _changes(close: np.ndarray) -> np.ndarray:
+    """Close to close changes; the first candle has none."""
+    delta = np.zeros_like(close)
+    delta[1:] = np.diff(close)
+    return delta
+
+
+class _EmaIndicator(_Indicator):
+    _state = ("ema",)
+
+    def __init__(self, params, window):
+        self.params = params
+        self.columns = (f"EMA{params.period}",)
+        self.ema = _Ema(params.period)
+
+    def next(self, candle, commit, timestamp):
+        return {self.columns[0]: self.ema.next(candle[3], commit)}
+
+    def seed(self, candles):
+        self.ema.seed(kernels.ema(candles["close"], self.params.period))
+
+
+class _BollingerIndicator(_Indicator):
+    _state = ("window", "rank")
+
+    def __init__(self, params, window):
+        self.params = params
+        self.window = _Window(params.period)
+        self.rank = _Rank(window)
+        columns = ["BB_upper", "BB_middle", "BB_lower"]
+        if params.calculate_width:
+            columns.append("BB_width")
+            if params.store_percentile:
+                columns.append("BB_width_percentile")
+        self.columns = tuple(columns)
+
+    def next(self, candle, commit, timestamp):
+        middle, std = self.window.next(candle[3], commit)
+        upper = middle + self.params.std_dev * std
+        lower = middle - self.params.std_dev * std
+        result = {"BB_upper": upper, "BB_middle": middle, "BB_lower": lower}
+        if self.params.calculate_width:
+            width = (upper - lower) / middle
+            result["BB_width"] = width
+            if self.params.store_percentile:
+                result["BB_width_percentile"] = self.rank.next(width, commit)
+        return result
+
+    def seed(self, candles):
+        self.window.seed(candles["close"])
+        if "BB_width_percentile" in self.columns:
+            middle, std = kernels.rolling_mean_std(candles["close"], self.params.period)
+            upper = middle + self.params.std_dev * std
+            lower = middle - self.params.std_dev * std
+            self.rank.seed((upper - lower) / middle)
+
+
+class _RsiIndicator(_Indicator):
+    columns = ("RSI",)
+    _state = ("gains", "losses", "prev_close")
+
+    def __init__(self, params, window):
+        self.gains = _Window(params.period)
+        self.losses = _Window(params.period)
+        self.prev_close: Optional[float] = None
+
+    def next(self, candle, commit, timestamp):
+        close = candle[3]
+        # The first candle has no change: it counts as neither gain nor loss
+        delta = 0.0 if self.prev_close is None else close - self.prev_close
+        gain, _ = self.gains.next(max(delta, 0.0), commit)
+        loss, _ = self.losses.next(max(-delta, 0.0), commit)
+        if commit:
+            self.prev_close = close
+
+        if math.isnan(gain) or (gain == 0 and loss == 0):
+            return {"RSI": NAN}
+        if loss == 0:
+            return {"RSI": 100.0}
+        return {"RSI": 100 - 100 / (1 + gain / loss)}
+
+    def seed(self, candles):
+        delta = _changes(candles["close"])
+        self.gains.seed(np.maximum(delta, 0.0))
+        self.losses.seed(np.maximum(-delta, 0.0))
+        self.prev_close = float(candles["close"][-1]) if len(delta) else None
+
+
+class _MacdIndicator(_Indicator):
+    columns = ("MACD", "MACD_signal", "MACD_hist")
+    _state = ("fast", "slow", "signal")
+
+    def __init__(self, params, window):
+        self.params = params
+        self.fast = _Ema(params.fast_period)
+        self.slow = _Ema(params.slow_period)
+        self.signal = _Ema(params.signal_period)
+
+    def next(self, candle, commit, timestamp):
+        macd = self.fast.next(candle[3], commit) - self.slow.next(candle[3], commit)
+        signal = self.signal.next(macd, commit)
+        return {"MACD": macd, "MACD_signal": signal, "MACD_hist": macd - signal}
+
+    def seed(self, candles):
+        fast = kernels.ema(candles["close"], self.params.fast_period)
+        slow = kernels.ema(candles["close"], self.params.slow_period)
+        self.fast.seed(fast)
+        self.slow.seed(slow)
+        self.signal.seed(kernels.ema(fast - slow, self.params.signal_period))
+
+
+class _VolumeIndicator(_Indicator):
+    _state = ("window",)
+
+    def __init__(self, params, window):
+        # The volume column itself is the candle's
+        self.window = _Window(params.ma_period) if params.ma_period else None
+        self.columns = ("volume_ma",) if self.window else ()
+
+    def next(self, candle, commit, timestamp):
+        if self.window is None:
+            return {}
+        mean, _ = self.window.next(candle[4], commit)
+        return {"volume_ma": mean}
+
+    def seed(self, candles):
+        if self.window is not None:
+            self.window.seed(candles["volume"])
+
+
+class _AtrIndicator(_Indicator):
+    _state = ("window", "atr_rank", "natr_rank", "prev_close")
+
+    def __init__(self, params, window):
+        self.params = params
+        self.window = _Window(params.period)
+        self.atr_rank = _Rank(window)
+        self.natr_rank = _Rank(window)
+        self.prev_close: Optional[float] = None
+        columns = ["ATR"]
+        if params.normalize:
+            columns.append("NATR")
+        if params.store_percentile:
+            columns.append("ATR_percentile")
+            if params.normalize:
+                columns.append("NATR_percentile")
+        self.columns = tuple(columns)
+
+    def next(self, candle, commit, timestamp):
+        _, high, low, close, _ = candle
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        atr, _ = self.window.next(tr, commit)
+        if commit:
+            self.prev_close = close
+
+        result = {"ATR": atr}
+        if self.params.normalize:
+            result["NATR"] = atr / close * 100
+        if self.params.store_percentile:
+            result["ATR_percentile"] = self.atr_rank.next(atr, commit)
+            if self.params.normalize:
+                result["NATR_percentile"] = self.natr_rank.next(result["NATR"], commit)
+        return result
+
+    def seed(self, candles):
+        close = candles["close"]
+        tr = kernels.true_range(candles["high"], candles["low"], close)
+        self.window.seed(tr)
+        self.prev_close = float(close[-1]) if len(close) else None
+        if self.params.store_percentile:
+            atr = kernels.rolling_mean(tr, self.params.period)
+            self.atr_rank.seed(atr)
+            if self.params.normalize:
+                self.natr_rank.seed(atr / close * 100)
+
+
+class _VolumeProfileIndicator(_Indicator):
+    columns = ("VWAP", "VWAP_upper", "VWAP_lower", "POC", "VAH", "VAL")
+    _state = ("session", "anchor", "width", "volume", "volume_dev", "volume_dev_sq", "first_bin")
+
+    def __init__(self, params, window=None):
+        self.params = params
+        self.session_ms = params.session_hours * 3_600_000
+        self._start(None, NAN)
+
+    def _start(self, session: Optional[int], anchor: float) -> None:
+        self.session = session
+        self.anchor = anchor
+        self.width = anchor * self.params.bin_pct / 100
+        # VWAP sums, of deviations from the session's opening price
+        self.volume = self.volume_dev = self.volume_dev_sq = 0.0
+        # Volume by bin, from bin ``first_bin`` on
+        self.first_bin: Optional[int] = None
+        self.hist = np.zeros(0)
+
+    def next(self, candle, commit, timestamp):
+        open_, high, low, close, volume = candle
+        session = (timestamp - SESSION_ORIGIN_MS) // self.session_ms
+        if session != self.session:
+            if not commit:
+                # Forming candle opening a session: evaluate it on a scratch state
+                scratch = _VolumeProfileIndicator(self.params)
+                return scratch.next(candle, True, timestamp)
+            self._start(session, open_)
+
+        deviation = (high + low + close) / 3 - self.anchor
+        total = self.volume + volume
+        volume_dev = self.volume_dev + volume * deviation
+        volume_dev_sq = self.volume_dev_sq + volume * deviation * deviation
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.float64(volume_dev) / total
+            std = math.sqrt(max(np.float64(volume_dev_sq) / total - mean * mean, 0.0))
+        vwap = self.anchor + mean
+
+        # Widen the histogram to the bins this candle reaches
+        first, last = bin_range(np.array([high]), np.array([low]), self.anchor, self.width)
+        first_bin, last_bin = int(first[0]), int(last[0])
+        if self.first_bin is not None:
+            first_bin = min(first_bin, self.first_bin)
+            last_bin = max(last_bin, self.first_bin + len(self.hist) - 1)
+        hist = np.zeros(last_bin - first_bin + 1)
+        if self.first_bin is not None:
+            offset = self.first_bin - first_bin
+            hist[offset:offset + len(self.hist)] = self.hist
+        lower = self.anchor + np.arange(first_bin, last_bin + 1) * self.width
+        hist += bin_volumes(np.array([high]), np.array([low]), np.array([volume]),
+                            lower, self.width, first - first_bin)[0]
+        poc, vah, val = profile_levels(hist[None, :], lower, self.width, self.params.value_area,
+                                       np.array([0]), np.array([len(hist) - 1]))[:, 0]
+
+        if commit:
+            self.volume, self.volume_dev, self.volume_dev_sq = total, volume_dev, volume_dev_sq
+            self.first_bin, self.hist = first_bin, hist
+        return {
+            "VWAP": vwap,
+            "VWAP_upper": vwap + self.params.std_dev * std,
+            "VWAP_lower": vwap - self.params.std_dev * std,
+            "POC": poc, "VAH": vah, "VAL": val,
+        }
+
+    def seed(self, candles):
+        # Only the last session carries over
+        timestamps = candles["timestamp"]
+        self._start(None, NAN)
+        if len(timestamps) == 0:
+            return
+        sessions = session_index(timestamps, self.params.session_hours)
+        start = int(np.searchsorted(sessions, sessions[-1]))
+        open_, high, low, close, volume = (candles[c][start:] for c in OHLCV)
+        self._start(int(sessions[-1]), float(open_[0]))
+
+        deviation = (high + low + close) / 3 - self.anchor
+        self.volume = float(np.sum(volume))
+        self.volume_dev = float(np.sum(volume * deviation))
+        self.volume_dev_sq = float(np.sum(volume * deviation * deviation))
+        first, last = bin_range(high, low, self.anchor, self.width)
+        self.first_bin = int(first.min())
+        lower = self.anchor + np.arange(self.first_bin, int(last.max()) + 1) * self.width
+        self.hist = bin_volumes(high, low, volume, lower, self.width, first - self.first_bin).sum(axis=0)
+
+    def state(self):
+        return {**super().state(), "hist": self.hist.tolist()}
+
+    def load(self, state):
+        super().load(state)
+        self.hist = np.asarray(state["hist"], dtype=np.float64)
+
+
+_INDICATORS = {
+    "ema": _EmaIndicator,
+    "bollinger": _BollingerIndicator,
+    "rsi": _RsiIndicator,
+    "macd": _MacdIndicator,
+    "volume": _VolumeIndicator,
+    "atr": _AtrIndicator,
+    "volume_profile": _VolumeProfileIndicator,
+}
+
+
+class IncrementalIndicators:
+    """Indicator state of one (symbol, timeframe) series.
+
+    The state covers the closed candles from its anchor, the first candle of
+    the window it was seeded from, to the last one seen: EMAs are seeded and
+    percentiles ranked from the anchor on. A window starting at most
+    ``reanchor_candles`` candles after the anchor and continuing the state
+    only feeds its new closed candles, one at a time, and returns the rows
+    of its own candles. Any other window is computed in one vectorized pass,
+    and the state seeded from it.
+
+    ``stats`` counts the windows served by each path.
+    """
+
+    def __init__(self, configs: List[IndicatorConfig], interval_ms: int, max_rows: int = 2000,
+                 reanchor_candles: int = 100):
+        for config in configs:
+            if config.type not in _INDICATORS:
+                raise ValueError(f"Unsupported indicator type: {config.type}")
+        self.configs = list(configs)
+        self.fingerprint = config_fingerprint(self.configs)
+        self.graph = IndicatorGraph(self.configs)
+        self.interval_ms = interval_ms
+        self.max_rows = max_rows
+        self.reanchor_candles = reanchor_candles
+        self.stats = {"extended": 0, "seeded": 0}
+        self.reset()
+
+    def reset(self) -> None:
+        self._indicators = [_INDICATORS[c.type](c.parameters, self.max_rows) for c in self.configs]
+        columns = {}
+        for indicator in self._indicators:
+            columns.update(dict.fromkeys(indicator.columns))
+        self.columns: List[str] = list(columns)
+        self.timestamps = deque(maxlen=self.max_rows)
+        self.rows = deque(maxlen=self.max_rows)
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return self.timestamps[-1] if self.timestamps else None
+
+    def _row(self, timestamp: int, candle: Tuple[float, ...], commit: bool) -> List[float]:
+        values = {}
+        for indicator in self._indicators:
+            values.update(indicator.next(candle, commit, timestamp))
+        return [values[column] for column in self.columns]
+
+    def update(self, timestamp: int, candle: Tuple[float, ...]) -> List[float]:
+        """Advance the state with a closed ``(open, high, low, close, volume)`` candle."""
+        row = self._row(timestamp, candle, commit=True)
+        self.timestamps.append(timestamp)
+        self.rows.append(row)
+        return row
+
+    def peek(self, timestamp: int, candle: Tuple[float, ...]) -> List[float]:
+        """Indicator values for a forming candle, leaving the state untouched."""
+        return self._row(timestamp, candle, commit=False)
+
+    def seed(self, timestamps: np.ndarray, candles: np.ndarray) -> None:
+        """Compute the closed ``candles`` (rows of OHLCV) in one pass and restart the state from them."""
+        self.reset()
+        if len(timestamps) == 0:
+            return
+        arrays = {column: np.ascontiguousarray(candles[:, i]) for i, column in enumerate(OHLCV)}
+        arrays["timestamp"] = timestamps
+        values = self.graph.evaluate(arrays, self.columns)
+        for indicator in self._indicators:
+            indicator.seed(arrays)
+        self.timestamps.extend(timestamps.tolist())
+        self.rows.extend(np.column_stack([values[c] for c in self.columns]).tolist())
+
+    def _offset(self, timestamps: np.ndarray) -> Optional[int]:
+        """Position in the state of the closed candles' first one, when they
+        start within ``reanchor_candles`` of the anchor and continue the state."""
+        if not self.timestamps or len(timestamps) == 0:
+            return None
+        if timestamps[-1] - timestamps[0] != (len(timestamps) - 1) * self.interval_ms:
+            return None
+        offset, gap = divmod(int(timestamps[0]) - self.timestamps[0], self.interval_ms)
+        if gap or offset < 0 or offset > min(self.reanchor_candles, len(self.timestamps)):
+            return None
+        if timestamps[-1] < self.timestamps[-1]:
+            return None
+        return offset
+
+    def calculate(self, df: pd.DataFrame, now_ms: Optional[int] = None) -> pd.DataFrame:
+        """Return ``df`` with the indicator columns, as ``calculate_all`` computes
+        them on the candles from the anchor to the end of ``df``."""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        closed, forming = split_forming(df, self.interval_ms, now_ms)
+        timestamps = closed.index.as_unit("ms").asi8
+        candles = closed[list(OHLCV)].to_numpy(dtype=np.float64)
+
+        # Room for the window and the candles it may slide past the anchor
+        if len(timestamps) + self.reanchor_candles > self.max_rows:
+            self.max_rows = len(timestamps) + self.reanchor_candles
+            self.reset()
+        offset = self._offset(timestamps)
+        if offset is not None:
+            start = len(self.timestamps) - offset
+            for ts, candle in zip(timestamps[start:].tolist(), candles[start:].tolist()):
+                self.update(ts, tuple(candle))
+            self.stats["extended"] += 1
+        else:
+            self.seed(timestamps, candles)
+            self.stats["seeded"] += 1
+            offset = 0
+
+        rows = list(itertools.islice(self.rows, offset, None))
+        forming_candles = forming[list(OHLCV)].to_numpy(dtype=np.float64)
+        rows += [self.peek(ts, tuple(candle)) for ts, candle in
+                 zip(forming.index.as_unit("ms").asi8.tolist(), forming_candles.tolist())]
+
+        values = np.array(rows, dtype=np.float64).reshape(len(rows), len(self.columns))
+        indicators = pd.DataFrame(values, index=df.index, columns=self.columns, copy=False)
+        return pd.concat([df.drop(columns=[c for c in self.columns if c in df.columns]), indicators], axis=1)
+
+    def save(self, f: BinaryIO) -> None:
+        """Write the state to ``f`` as npz: rows, timestamps and the running
+        numbers of each indicator as JSON, no pickled objects."""
+        meta = {
+            "version": STATE_VERSION,
+            "fingerprint": self.fingerprint,
+            "interval_ms": self.interval_ms,
+            "max_rows": self.max_rows,
+            "indicators": [indicator.state() for indicator in self._indicators],
+        }
+        np.savez(
+            f,
+            meta=np.array(json.dumps(meta)),
+            timestamps=np.array(self.timestamps, dtype=np.int64),
+            rows=np.array(self.rows, dtype=np.float64).reshape(len(self.rows), len(self.columns)),
+        )
+
+    @classmethod
+    def load(cls, f: BinaryIO, configs: List[IndicatorConfig], interval_ms: int,
+             reanchor_candles: int = 100) -> Optional["IncrementalIndicators"]:
+        """State written by ``save``; None when saved by another version, for
+        other indicators or another interval."""
+        with np.load(f, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if (meta.get("version") != STATE_VERSION
+                    or meta.get("fingerprint") != config_fingerprint(configs)
+                    or meta.get("interval_ms") != interval_ms):
+                return None
+            state = cls(configs, interval_ms, meta["max_rows"], reanchor_candles)
+            for indicator, saved in zip(state._indicators, meta["indicators"]):
+                indicator.load(saved)
+            state.timestamps.extend(data["timestamps"].tolist())
+            state.rows.extend(data["rows"].tolist())
+        return state
+
+
+class IndicatorStateStore:
+    """Incremental indicator states by (symbol, timeframe).
+
+    With a ``root`` (the kline store directory) states are saved next to
+    the archived candles, ``<root>/<symbol>/<interval>.indicators.npz``, and
+    picked up again after a restart.
+
+    Each state is anchored (see ``IncrementalIndicators``): indicators of a
+    window are computed from up to ``reanchor_candles`` candles before it.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_rows: int = 2000, reanchor_candles: int = 100):
+        self.root = Path(root) if root else None
+        self.max_rows = max_rows
+        self.reanchor_candles = reanchor_candles
+        self._states: Dict[Tuple[str, str], IncrementalIndicators] = {}
+        self._lock = threading.Lock()
+
+    def path(self, symbol: str, interval: str) -> Path:
+        return self.root / symbol / f"{interval}.indicators.npz"
+
+    def get(self, symbol: str, tf_config: TimeframeConfig,
+            configs: List[IndicatorConfig]) -> IncrementalIndicators:
+        key = (symbol, tf_config.timeframe)
+        fingerprint = config_fingerprint(configs)
+        interval_ms = tf_config.minutes * 60_000
+        with self._lock:
+            state = self._states.get(key)
+            if state is None or state.fingerprint != fingerprint:
+                state = self._load(symbol, tf_config.interval, configs, interval_ms)
+                if state is None:
+                    state = IncrementalIndicators(configs, interval_ms, self.max_rows, self.reanchor_candles)
+                self._states[key] = state
+            return state
+
+    def calculate(self, symbol: str, tf_config: TimeframeConfig, df: pd.DataFrame,
+                  configs: List[IndicatorConfig]) -> pd.DataFrame:
+        """``df`` with its indicator columns, updating the saved state."""
+        state = self.get(symbol, tf_config, configs)
+        bounds = (state.timestamps[0], state.timestamps[-1]) if state.timestamps else None
+        result = state.calculate(df)
+        if self.root is not None and state.timestamps and bounds != (state.timestamps[0], state.timestamps[-1]):
+            self._save(symbol, tf_config.interval, state)
+        return result
+
+    def _load(self, symbol: str, interval: str, configs: List[IndicatorConfig],
+              interval_ms: int) -> Optional[IncrementalIndicators]:
+        if self.root is None:
+            return None
+        path = self.path(symbol, interval)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "rb") as f:
+                return IncrementalIndicators.load(f, configs, interval_ms, self.reanchor_candles)
+        except Exception as e:
+            logfire.warning("Discarding unreadable indicator state", path=str(path), error=str(e))
+            return None
+
+    def _save(self, symbol: str, interval: str, state: IncrementalIndicators) -> None:
+        path = self.path(symbol, interval)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        try:
+            with open(tmp, "wb") as f:
+                state.save(f)
+            tmp.replace(path)
+        except Exception as e:
+            logfire.warning("Failed to save indicator state", path=str(path), error=str(e))
@@ -0,0 +1,121 @@
+# aitrading/tools/indicators/kernels.py
+
+"""Indicator kernels on float64 NumPy arrays.
+
+Every kernel works along the last axis, so the same code serves a single
+series (``n`` candles) and a block of series (``symbols x n``). Outputs
+follow the pandas implementations of ``IndicatorCalculator``: NaN until a
+rolling window is full, EMAs seeded with the first value (``adjust=False``).
+Inputs are expected to be finite.
+"""
+
+import math
+
+import numpy as np
+
+# Largest growth of the EMA weights inside one block: keeps the running
+# sums far from overflow and their rounding negligible
+_EMA_BLOCK_RANGE = 1e12
+
+
+def ema(x: np.ndarray, period: int) -> np.ndarray:
+    """Exponential moving average, ``ewm(span=period, adjust=False).mean()``.
+
+    The recursion y[t] = d * y[t-1] + a * x[t] is unrolled in blocks:
+    within a block y[s+k] = d**(k+1) * (y[s-1] + a * sum(d**-(j+1) * x[s+j])),
+    a weighted cumulative sum.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = x.shape[-1]
+    out = np.empty_like(x)
+    if n == 0:
+        return out
+
+    alpha = 2.0 / (period + 1)
+    decay = 1.0 - alpha
+    if decay == 0.0:
+        out[...] = x
+        return out
+
+    block = max(1, min(n, int(math.log(_EMA_BLOCK_RANGE) / -math.log(decay))))
+    steps = np.arange(1, block + 1, dtype=np.float64)
+    growth = decay ** -steps
+    shrink = decay ** steps
+
+    # Seeding with y[-1] = x[0] yields y[0] = x[0]
+    prev = x[..., 0].copy()
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        k = stop - start
+        acc = np.cumsum(x[..., start:stop] * growth[:k], axis=-1)
+        acc *= alpha
+        acc += prev[..., None]
+        acc *= shrink[:k]
+        out[..., start:stop] = acc
+        prev = acc[..., -1]
+    return out
+
+
+def _window_sums(x: np.ndarray, window: int) -> np.ndarray:
+    """Sums over the trailing ``window`` values; NaN until the window is full."""
+    n = x.shape[-1]
+    out = np.full(x.shape, np.nan)
+    if window > n:
+        return out
+    c = np.cumsum(x, axis=-1)
+    out[..., window - 1] = c[..., window - 1]
+    out[..., window:] = c[..., window:] - c[..., :-window]
+    return out
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """Mean over the trailing ``window`` values."""
+    x = np.asarray(x, dtype=np.float64)
+    if x.shape[-1] == 0:
+        return x.copy()
+    # Shifting by the first value keeps the running sums small
+    shift = x[..., :1]
+    return _window_sums(x - shift, window) / window + shift
+
+
+def rolling_mean_std(x: np.ndarray, window: int):
+    """Mean and sample standard deviation over the trailing ``window`` values."""
+    x = np.asarray(x, dtype=np.float64)
+    if x.shape[-1] == 0:
+        return x.copy(), x.copy()
+    shift = x[..., :1]
+    d = x - shift
+    sums = _window_sums(d, window)
+    mean = sums / window + shift
+    if window < 2:
+        return mean, np.full(x.shape, np.nan)
+    var = (_window_sums(d * d, window) - sums * sums / window) / (window - 1)
+    np.maximum(var, 0.0, out=var)
+    return mean, np.sqrt(var)
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range; the first candle has no previous close and uses high - low."""
+    tr = high - low
+    prev_close = close[..., :-1]
+    np.maximum(tr[..., 1:], np.abs(high[..., 1:] - prev_close), out=tr[..., 1:])
+    np.maximum(tr[..., 1:], np.abs(low[..., 1:] - prev_close), out=tr[..., 1:])
+    return tr
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
+    """Average True Range: simple moving average of the true range."""
+    return rolling_mean(true_range(high, low, close), period)
+
+
+def rsi(close: np.ndarray, period: int) -> np.ndarray:
+    """RSI with simple moving averages of gains and losses."""
+    delta = np.zeros_like(close)
+    delta[..., 1:] = np.diff(close, axis=-1)
+    gain = rolling_mean(np.maximum(delta, 0.0), period)
+    loss = rolling_mean(np.maximum(-delta, 0.0), period)
+    # Both averages hold exact zeros when flat; cumulative sums may leave a residue
+    gain[np.abs(gain) < 1e-12 * np.abs(close)] = 0.0
+    loss[np.abs(loss) < 1e-12 * np.abs(close)] = 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - 100 / (1 + gain / loss)
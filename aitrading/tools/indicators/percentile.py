@@ -0,0 +1,166 @@
+# aitrading/tools/indicators/percentile.py
+
+"""Percentile ranks of a series against its own history.
+
+Each function matches ``Series.rank(pct=True)`` applied to the relevant
+window: ties get their average rank, NaN values get a NaN rank and are left
+out of the count. Rolling ranks are kept in a Fenwick tree over the
+compressed values; expanding ranks count smaller values level by level of a
+binary partition, vectorized over whole blocks of series. Either way a full
+series costs O(n log^2 n) at most instead of re-ranking every prefix.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class _Fenwick:
+    """Counts of compressed values, with O(log n) updates and prefix sums."""
+
+    def __init__(self, size: int):
+        self.tree = [0] * (size + 1)
+
+    def add(self, index: int, delta: int) -> None:
+        index += 1
+        tree = self.tree
+        while index < len(tree):
+            tree[index] += delta
+            index += index & -index
+
+    def count_upto(self, index: int) -> int:
+        """Number of values with compressed index <= ``index``."""
+        index += 1
+        total = 0
+        tree = self.tree
+        while index > 0:
+            total += tree[index]
+            index -= index & -index
+        return total
+
+
+def _compress(values: np.ndarray):
+    valid = ~np.isnan(values)
+    codes = np.full(len(values), -1, dtype=np.int64)
+    uniques, codes[valid] = np.unique(values[valid], return_inverse=True)
+    return codes, len(uniques)
+
+
+def _ranks(values: np.ndarray, window: int = 0) -> np.ndarray:
+    codes, size = _compress(values)
+    tree = _Fenwick(size)
+    ranks = np.full(len(values), np.nan)
+    count = 0
+
+    for i, code in enumerate(codes.tolist()):
+        if window and i >= window:
+            dropped = codes[i - window]
+            if dropped >= 0:
+                tree.add(dropped, -1)
+                count -= 1
+        if code < 0:
+            continue
+        tree.add(code, 1)
+        count += 1
+
+        below = tree.count_upto(code - 1) if code else 0
+        equal = tree.count_upto(code) - below
+        ranks[i] = (below + (equal + 1) / 2) / count
+
+    return ranks
+
+
+def _expanding_ranks(block: np.ndarray) -> np.ndarray:
+    """Expanding ranks of each row of a (series x candles) block, without a Python loop per value.
+
+    Every earlier/later pair of candles is split by exactly one level of a
+    binary partition of the positions. At each level, the values of the
+    left halves are sorted once (with a per-block offset, so all blocks of
+    all rows share one array) and the right halves count the smaller and
+    equal values there with ``searchsorted``.
+    """
+    rows, n = block.shape
+    size = 1 << max(0, (n - 1).bit_length())
+    valid = ~np.isnan(block)
+
+    # Dense per-row value codes; NaN and padding get code n, above every value
+    order = np.argsort(block, axis=1, kind="stable")
+    ordered = np.take_along_axis(block, order, axis=1)
+    distinct = np.ones(block.shape, dtype=np.int64)
+    distinct[:, 0] = 0
+    distinct[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    codes = np.full((rows, size), n, dtype=np.int64)
+    np.put_along_axis(codes[:, :n], order, np.cumsum(distinct, axis=1), axis=1)
+    codes[:, :n][~valid] = n
+
+    below = np.zeros((rows, size), dtype=np.int64)
+    below_or_equal = np.zeros((rows, size), dtype=np.int64)
+    half = 1
+    while half < size:
+        blocks = size // (2 * half)
+        grouped = codes.reshape(rows, blocks, 2 * half)
+        offsets = np.arange(rows * blocks, dtype=np.int64).reshape(rows, blocks, 1) * (n + 1)
+        left = np.sort(grouped[..., :half] + offsets, axis=-1).ravel()
+        right = (grouped[..., half:] + offsets).ravel()
+        starts = np.repeat(np.arange(rows * blocks, dtype=np.int64) * half, half)
+        shape = (rows, blocks, half)
+        below.reshape(rows, blocks, 2 * half)[..., half:] += (
+            np.searchsorted(left, right, side="left") - starts).reshape(shape)
+        below_or_equal.reshape(rows, blocks, 2 * half)[..., half:] += (
+            np.searchsorted(left, right, side="right") - starts).reshape(shape)
+        half *= 2
+
+    below, below_or_equal = below[:, :n], below_or_equal[:, :n]
+    # Equal values include the candle itself
+    equal = below_or_equal - below + 1
+    count = np.cumsum(valid, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ranks = (below + (equal + 1) / 2) / count
+    ranks[~valid] = np.nan
+    return ranks
+
+
+def rank_values(values: np.ndarray, window: int = 0) -> np.ndarray:
+    """Expanding (or ``window`` rolling) percentile ranks of a float64 array.
+
+    Ranks along the last axis: each row of a 2-D array is ranked separately.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if not window and values.shape[-1]:
+        return _expanding_ranks(values.reshape(-1, values.shape[-1])).reshape(values.shape)
+    if values.ndim == 1:
+        return _ranks(values, window)
+    ranks = np.empty(values.shape)
+    for row in np.ndindex(values.shape[:-1]):
+        ranks[row] = _ranks(values[row], window)
+    return ranks
+
+
+def expanding_rank(series: pd.Series) -> pd.Series:
+    """Percentile rank (0-1] of each value among all values up to it."""
+    values = series.to_numpy(dtype=np.float64)
+    return pd.Series(rank_values(values), index=series.index, name=series.name)
+
+
+def rolling_rank(series: pd.Series, window: int) -> pd.Series:
+    """Percentile rank (0-1] of each value among the last ``window`` values."""
+    values = series.to_numpy(dtype=np.float64)
+    return pd.Series(_ranks(values, window), index=series.index, name=series.name)
+
+
+def last_rank(series: pd.Series, window: int = 0) -> float:
+    """Percentile rank (0-1] of the last value among the last ``window`` values (all if 0)."""
+    return rank_last_value(series.to_numpy(dtype=np.float64), window)
+
+
+def rank_last_value(values: np.ndarray, window: int = 0) -> float:
+    """``last_rank`` of a float64 array."""
+    if window:
+        values = values[-window:]
+    if len(values) == 0 or np.isnan(values[-1]):
+        return float("nan")
+
+    valid = values[~np.isnan(values)]
+    current = values[-1]
+    below = np.count_nonzero(valid < current)
+    equal = np.count_nonzero(valid == current)
+    return float((below + (equal + 1) / 2) / len(valid))
@@ -0,0 +1,124 @@
+# aitrading/tools/indicators/store.py
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..charts.config import TimeframesConfiguration
+from ..charts.indicators import create_indicator_calculator
+from ..charts.models import IndicatorConfig, TimeframeConfig
+from .atr import atr
+from .graph import unique_configs
+from .incremental import IndicatorStateStore, config_fingerprint
+
+# Columns kept as float64 by compact frames: prices and volumes, and the ATR
+# that stop-loss distances are derived from
+FULL_PRECISION_COLUMNS = ("open", "high", "low", "close", "volume", "turnover", "ATR")
+
+
+def compact_frame(df: pd.DataFrame, keep: Iterable[str] = FULL_PRECISION_COLUMNS) -> pd.DataFrame:
+    """``df`` with its float64 indicator columns stored as float32."""
+    keep = set(keep)
+    columns = [c for c in df.columns if c not in keep and df[c].dtype == np.float64]
+    if not columns:
+        return df
+    return df.astype(dict.fromkeys(columns, np.float32))
+
+
+def frame_key(df: pd.DataFrame) -> Tuple:
+    """Identifies a candle window: its bounds, length and last (possibly forming) candle."""
+    if df.empty:
+        return ()
+    last = df.iloc[-1]
+    return (
+        df.index[0].value, df.index[-1].value, len(df),
+        float(last["open"]), float(last["high"]), float(last["low"]),
+        float(last["close"]), float(last["volume"]),
+    )
+
+
+class FeatureStore:
+    """Indicator features computed once per candle window and shared.
+
+    Features are keyed by symbol, timeframe, the candle window they were
+    computed on (see ``frame_key``) and their parameters. The indicator
+    frame built for the analysis is the one the charts draw, and ATR
+    series are shared between the volatility metrics and the stop losses.
+    A new or updated candle changes the key, so nothing is invalidated
+    explicitly; old entries are evicted least recently used.
+
+    ``backend`` selects the indicator calculator and ``precision`` the storage
+    of the indicator columns (see ``compact_frame``), by default as set in
+    timeframes.yaml. With ``states``, indicator frames come from incremental
+    state anchored before the window instead (see ``IncrementalIndicators``).
+    """
+
+    def __init__(self, states: Optional[IndicatorStateStore] = None, max_entries: int = 128,
+                 backend: Optional[str] = None, precision: Optional[str] = None):
+        self.states = states
+        self.max_entries = max_entries
+        settings = TimeframesConfiguration().get_indicator_settings()
+        self.backend = backend or settings.backend
+        self.precision = precision or settings.precision
+        self._features: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Cached value for ``key``, computed on a miss."""
+        with self._lock:
+            if key in self._features:
+                self._features.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._features[key]
+
+        value = compute()
+        with self._lock:
+            self._features[key] = value
+            self.stats["misses"] += 1
+            while len(self._features) > self.max_entries:
+                self._features.popitem(last=False)
+        return value
+
+    def feature(self, symbol: str, timeframe: str, df: pd.DataFrame, name: str,
+                params: Hashable, compute: Callable[[], Any]) -> Any:
+        """A feature of a candle window, computed once."""
+        return self.get((symbol, timeframe, frame_key(df), name, params), compute)
+
+    def indicators(self, symbol: str, tf_config: TimeframeConfig, df: pd.DataFrame,
+                   configs: List[IndicatorConfig]) -> pd.DataFrame:
+        """``df`` with the columns of the configured indicators."""
+        # Indicators repeated across views are computed, and keyed, once
+        configs = unique_configs(configs)
+
+        def compute() -> pd.DataFrame:
+            if self.states is not None:
+                result = self.states.calculate(symbol, tf_config, df, configs)
+            else:
+                result = create_indicator_calculator(df, self.backend).calculate_all(configs)
+            return compact_frame(result) if self.precision == "float32" else result
+
+        return self.feature(symbol, tf_config.timeframe, df, "indicators",
+                            config_fingerprint(configs), compute)
+
+    def atr(self, symbol: str, timeframe: str, df: pd.DataFrame, period: int = 14) -> pd.Series:
+        """ATR series of a candle window."""
+        series = self.feature(symbol, timeframe, df, "atr", period, lambda: atr(df, period))
+        # The latest value only depends on the last period + 1 candles
+        tail = df.iloc[-(period + 1):]
+        self.get((symbol, timeframe, frame_key(tail), "atr_latest", period), lambda: float(series.iloc[-1]))
+        return series
+
+    def latest_atr(self, symbol: str, timeframe: str, df: pd.DataFrame, period: int = 14) -> float:
+        """Current ATR value, reused from any window ending on the same candles."""
+        tail = df.iloc[-(period + 1):]
+        return self.get((symbol, timeframe, frame_key(tail), "atr_latest", period),
+                        lambda: float(atr(tail, period).iloc[-1]))
+
+    def summary(self) -> Dict[str, int]:
+        """Feature cache counters, suitable for structured logging."""
+        with self._lock:
+            return {**self.stats, "entries": len(self._features)}
@@ -0,0 +1,195 @@
+# aitrading/tools/indicators/volume_profile.py
+
+"""Session VWAP and volume profile on float64 NumPy arrays.
+
+Both are anchored to UTC sessions of ``session_hours`` (counted from a
+Monday midnight, so 24 gives days and 168 weeks) and develop candle by
+candle: each row holds the values of its session up to that candle.
+
+The VWAP is the volume-weighted mean of the typical price, (high + low +
+close) / 3, and its bands sit a multiple of the volume-weighted standard
+deviation away. The profile spreads each candle's volume evenly over its
+high-low range, in price bins ``bin_pct`` percent of the session's opening
+price wide. The point of control is the centre of the bin holding the most
+volume (the lowest on ties); the value area grows from it one bin at a
+time, towards the heavier neighbour, until it holds ``value_area`` of the
+session's volume.
+
+Like the kernels, functions work along the last axis. The incremental
+engine uses ``bin_volumes`` and ``profile_levels`` one candle at a time,
+with the same results.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+# Monday 1970-01-05 00:00 UTC: sessions of whole days and weeks start on it
+SESSION_ORIGIN_MS = 4 * 86_400_000
+
+
+def session_index(timestamps: np.ndarray, session_hours: int) -> np.ndarray:
+    """Session of each candle, from its open time in ms."""
+    if timestamps is None:
+        raise ValueError("Session indicators need the candle timestamps")
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    return (timestamps - SESSION_ORIGIN_MS) // (session_hours * 3_600_000)
+
+
+def _session_starts(sessions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Whether each candle opens its session, and the position of the first candle of its session."""
+    first = np.ones(sessions.shape, dtype=bool)
+    first[..., 1:] = sessions[..., 1:] != sessions[..., :-1]
+    positions = np.broadcast_to(np.arange(sessions.shape[-1]), sessions.shape)
+    return first, np.maximum.accumulate(np.where(first, positions, 0), axis=-1)
+
+
+def _session_cumsum(x: np.ndarray, first: np.ndarray) -> np.ndarray:
+    """Cumulative sums restarting at every session.
+
+    Sessions are laid out as the rows of a padded array and summed on their
+    own: differences of one running sum would lose small sessions after
+    large ones.
+    """
+    flat = x.reshape(-1)
+    starts = np.flatnonzero(first.reshape(-1))
+    lengths = np.diff(np.append(starts, flat.size))
+    session = np.repeat(np.arange(len(starts)), lengths)
+    position = np.arange(flat.size) - starts[session]
+    padded = np.zeros((len(starts), lengths.max() if len(starts) else 0))
+    padded[session, position] = flat
+    return np.cumsum(padded, axis=1)[session, position].reshape(x.shape)
+
+
+def session_vwap(open: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                 volume: np.ndarray, sessions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Developing VWAP and volume-weighted standard deviation of the typical price.
+
+    NaN until the session has traded some volume.
+    """
+    first, starts = _session_starts(sessions)
+    # Deviations from the session's opening price keep the sums small
+    anchor = np.take_along_axis(open, starts, axis=-1)
+    deviation = (high + low + close) / 3 - anchor
+    total = _session_cumsum(volume, first)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = _session_cumsum(volume * deviation, first) / total
+        var = _session_cumsum(volume * deviation * deviation, first) / total - mean * mean
+    np.maximum(var, 0.0, out=var)
+    return anchor + mean, np.sqrt(var)
+
+
+def bin_range(high: np.ndarray, low: np.ndarray, anchor: float,
+              width: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices of the bins holding each candle's low and high; bin k starts at anchor + k * width."""
+    return (np.floor((low - anchor) / width).astype(np.int64),
+            np.floor((high - anchor) / width).astype(np.int64))
+
+
+def bin_volumes(high: np.ndarray, low: np.ndarray, volume: np.ndarray, lower: np.ndarray,
+                width, flat_bins: np.ndarray) -> np.ndarray:
+    """Volume of each candle (rows) in each bin (columns) starting at ``lower``.
+
+    ``lower`` holds the bins of all candles, or of each candle (rows x bins)
+    with ``width`` one per candle (rows x 1). A candle without range puts
+    all its volume in its bin, ``flat_bins`` (a column of ``lower``).
+    """
+    span = high - low
+    upper = lower + width
+    overlap = np.minimum(high[:, None], upper) - np.maximum(low[:, None], lower)
+    np.maximum(overlap, 0.0, out=overlap)
+    # Bins inside the range get exactly equal shares, for deterministic ties
+    overlap = np.where((low[:, None] <= lower) & (upper <= high[:, None]), width, overlap)
+    flat = span <= 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shares = overlap / span[:, None]
+    if flat.any():
+        shares[flat] = 0.0
+        shares[np.flatnonzero(flat), flat_bins[flat]] = 1.0
+    return shares * volume[:, None]
+
+
+def value_area(hist: np.ndarray, fraction: float, lowest: np.ndarray,
+               highest: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Point of control and value area bounds, as bin positions, of each row's histogram.
+
+    The area only grows within the bins ``lowest`` to ``highest`` of each row.
+    """
+    rows = np.arange(hist.shape[0])
+    poc = np.argmax(hist, axis=1)
+    lo, hi = poc.copy(), poc.copy()
+    volume = hist[rows, poc]
+    target = fraction * hist.sum(axis=1)
+    while True:
+        growing = (volume < target) & ((lo > lowest) | (hi < highest))
+        if not growing.any():
+            break
+        # Bins past the bounds never win
+        below = np.where(lo > lowest, hist[rows, np.maximum(lo - 1, 0)], -1.0)
+        above = np.where(hi < highest, hist[rows, np.minimum(hi + 1, hist.shape[1] - 1)], -1.0)
+        up = growing & (above >= below)
+        down = growing & ~up
+        volume = volume + np.where(up, above, 0.0) + np.where(down, below, 0.0)
+        hi += up
+        lo -= down
+    return poc, lo, hi
+
+
+def profile_levels(hist: np.ndarray, lower: np.ndarray, width, fraction: float,
+                   lowest: np.ndarray, highest: np.ndarray) -> np.ndarray:
+    """Point of control, value area high and low prices of each row, (3 x rows).
+
+    ``lower`` and ``width`` are shaped as for ``bin_volumes``.
+    """
+    poc, lo, hi = value_area(hist, fraction, lowest, highest)
+    edges = np.broadcast_to(lower, hist.shape)
+    width = np.broadcast_to(width, (hist.shape[0], 1))[:, 0]
+    rows = np.arange(hist.shape[0])
+    levels = np.stack([edges[rows, poc] + width / 2, edges[rows, hi] + width, edges[rows, lo]])
+    levels[:, hist.sum(axis=1) <= 0] = np.nan
+    return levels
+
+
+def _series_profile(open: np.ndarray, high: np.ndarray, low: np.ndarray, volume: np.ndarray,
+                    sessions: np.ndarray, bin_pct: float, fraction: float) -> np.ndarray:
+    n = len(high)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(sessions)) + 1])
+    lengths = np.diff(np.concatenate([starts, [n]]))
+    session = np.repeat(np.arange(len(starts)), lengths)
+    position = np.arange(n) - starts[session]
+
+    anchor = open[starts][session]
+    width = anchor * bin_pct / 100
+    first, last = bin_range(high, low, anchor, width)
+    start = np.minimum.reduceat(first, starts)[session]
+    bins = int((np.maximum.reduceat(last, starts)[session] - start).max()) + 1
+    # Bins of each candle's session, from its lowest one
+    lower = anchor[:, None] + (start[:, None] + np.arange(bins)) * width[:, None]
+    volumes = bin_volumes(high, low, volume, lower, width[:, None], first - start)
+
+    # Sessions padded to a common length: cumulative sums along each one
+    def developing(values, accumulate, fill):
+        padded = np.full((len(starts), lengths.max()) + values.shape[1:], fill, dtype=values.dtype)
+        padded[session, position] = values
+        return accumulate(padded, axis=1)[session, position]
+
+    hist = developing(volumes, np.cumsum, 0.0)
+    # Bins reached by the session so far
+    lowest = developing(first - start, np.minimum.accumulate, bins)
+    highest = developing(last - start, np.maximum.accumulate, -1)
+    return profile_levels(hist, lower, width[:, None], fraction, lowest, highest)
+
+
+def volume_profile(open: np.ndarray, high: np.ndarray, low: np.ndarray, volume: np.ndarray,
+                   sessions: np.ndarray, bin_pct: float = 0.1,
+                   fraction: float = 0.7) -> np.ndarray:
+    """Developing point of control, value area high and low, stacked as (3, ..., n)."""
+    shape = np.shape(high)
+    n = shape[-1]
+    series = [np.reshape(a, (-1, n)) for a in (open, high, low, volume, sessions)]
+    out = np.full((3, series[0].shape[0], n), np.nan)
+    if n == 0:
+        return out.reshape((3,) + shape)
+    for row, values in enumerate(zip(*series)):
+        out[:, row] = _series_profile(*values, bin_pct, fraction)
+    return out.reshape((3,) + shape)
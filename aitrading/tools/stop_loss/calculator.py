@@ -3,6 +3,7 @@ import pandas as pd
 import logfire
 
 from .models import StopLossConfig, StopLossUpdate, ProfitBand
+from ..indicators.atr import atr as average_true_range
 
 
 class StopLossCalculator:
@@ -47,15 +48,7 @@ class StopLossCalculator:
         """
         try:
             with logfire.span("atr_calculation"):
-                high = df["high"]
-                low = df["low"]
-                close = df["close"].shift()
-
-                tr1 = high - low
-                tr2 = (high - close).abs()
-                tr3 = (low - close).abs()
-                tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-                atr = tr.rolling(window=period).mean().iloc[-1]
+                atr = average_true_range(df, period).iloc[-1]
 
                 logfire.info("ATR calculated", value=atr, period=period)
                 return float(atr)
@@ -6,6 +6,9 @@ from .models import StopLossConfig, StopLossUpdate
 from .calculator import StopLossCalculator
 from ...tools.bybit.market_data import MarketDataTool
 from ...tools.bybit.orders import OrdersTool
+from ...tools.charts.lookback import LookbackPlanner
+from ...tools.indicators.store import FeatureStore
+from ...tools.volatility.service import VolatilityRegistry
 
 
 class StopLossManager:
@@ -16,11 +19,15 @@ class StopLossManager:
             market_data: MarketDataTool,
             orders: OrdersTool,
             config: Optional[StopLossConfig] = None,
-            enabled: bool = True
+            enabled: bool = True,
+            features: Optional[FeatureStore] = None,
+            volatility: Optional[VolatilityRegistry] = None
     ):
         """Initialize the stop loss manager."""
         self.market_data = market_data
         self.orders = orders
+        self.features = features
+        self.volatility = volatility
         self.config = config or StopLossConfig()
         self.calculator = StopLossCalculator(self.config)
         self.enabled = enabled
@@ -29,6 +36,25 @@ class StopLossManager:
                      enabled=enabled,
                      **self.config.model_dump())
 
+    def _latest_atr(self, symbol: str) -> float:
+        """ATR of the stop loss timeframe, as published by the volatility service when current."""
+        if self.volatility is not None:
+            atr_value = self.volatility.latest_atr(symbol, self.config.timeframe, self.config.atr_period)
+            if atr_value is not None:
+                return atr_value
+
+        # Only the latest ATR is needed: fetch period + 1 candles
+        historical_data = self.market_data.fetch_recent_candles(
+            symbol,
+            self.config.timeframe,
+            LookbackPlanner.atr_candles(self.config.atr_period)
+        )
+        if self.features is not None:
+            return self.features.latest_atr(
+                symbol, self.config.timeframe, historical_data, self.config.atr_period
+            )
+        return self.calculator.calculate_atr(historical_data, period=self.config.atr_period)
+
     def update_position_stops(self, symbol: str) -> Dict[str, Any]:
         """Update stop losses for all positions in the given symbol."""
         # TODO: forced, for now
@@ -52,12 +78,7 @@ class StopLossManager:
                     return results
 
                 current_price = self.market_data.get_current_price(symbol)
-                historical_data = self.market_data.fetch_historical_data(
-                    symbol,
-                    self.config.timeframe
-                )
-
-                atr_value = self.calculator.calculate_atr(historical_data)
+                atr_value = self._latest_atr(symbol)
 
                 for position in positions:
                     try:
@@ -12,6 +12,7 @@ class ProfitBand(str, Enum):
 class StopLossConfig(BaseModel):
     """Configuration for stop loss calculation."""
     timeframe: str = Field("1H", description="Timeframe for ATR calculation")
+    atr_period: int = Field(14, ge=1, description="ATR period")
     in_profit_multiplier: float = Field(2.0, description="ATR multiplier for positions in profit")
     initial_multiplier: float = Field(1.5, description="ATR multiplier for positions not in profit")
 
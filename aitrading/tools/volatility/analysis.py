@@ -1,18 +1,21 @@
 # aitrading/tools/volatility/analysis.py
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Union
+import numpy as np
 import pandas as pd
 import logfire
 
-from .indicators import (
-    calculate_atr, calculate_adx_components, calculate_efficiency_ratio,
-    calculate_money_flow_ratio, calculate_normalized_atr
-)
+from .arrays import VolatilityArrays
 
 
-def analyze_volatility_nature(df: pd.DataFrame, period: int = 14) -> Dict[str, float]:
+def analyze_volatility_nature(df: pd.DataFrame, period: int = 14,
+                              atr: Optional[Union[pd.Series, np.ndarray]] = None,
+                              arrays: Optional[VolatilityArrays] = None) -> Dict[str, float]:
     """
     Analyze volatility nature by combining multiple metrics.
+
+    ``atr`` is the ``period`` ATR of ``df`` when already computed, and
+    ``arrays`` the candles of ``df`` already read as arrays.
     
     Returns:
         Dict with:
@@ -21,56 +24,15 @@ def analyze_volatility_nature(df: pd.DataFrame, period: int = 14) -> Dict[str, f
         - chaos_ratio: proportion of non-directional volatility
     """
     try:
-        # 1. Normalized ATR for price-relative volatility
-        norm_atr = calculate_normalized_atr(df, period)
-        
-        # 2. ADX and directional components
-        adx, pos_di, neg_di = calculate_adx_components(df, period)
-        
-        # 3. Efficiency Ratio for movement quality
-        er = calculate_efficiency_ratio(df, period)
-        
-        # 4. Money Flow Ratio for volume confirmation
-        mf_ratio = calculate_money_flow_ratio(df, period)
-        
-        # 5. Normalize money flow ratio to 0-1 range
-        norm_mf = mf_ratio / (1 + mf_ratio)
-        
-        # 6. Calculate directional ratio from ADX components
-        di_diff = abs(pos_di - neg_di)
-        di_sum = pos_di + neg_di
-        di_ratio = di_diff / di_sum
-        
-        # 7. Compose final directional strength with more weight on price efficiency
-        directional_strength = (
-            0.5 * er +         # Efficiency Ratio: primary measure of price efficiency
-            0.3 * di_ratio +   # ADX components: trend strength confirmation
-            0.2 * norm_mf      # Volume confirmation: validate with flow
-        ).fillna(0)
-        
-        # Get final values (last in series)
-        last_directional = float(directional_strength.iloc[-1])
-        last_vol = float(norm_atr.iloc[-1])
-        
-        result = {
-            'directional_strength': last_directional,
-            'volatility_score': last_vol,
-            'chaos_ratio': 1 - last_directional,
-            'efficiency_ratio': float(er.iloc[-1]),
-            'di_ratio': float(di_ratio.iloc[-1]),
-            'money_flow_norm': float(norm_mf.iloc[-1])
-        }
-        
-        logfire.debug(
-            "Volatility nature analysis",
-            raw_metrics=result,
-            interpretation={
-                "directional_quality": "strong" if last_directional > 0.7 else "moderate" if last_directional > 0.4 else "weak",
-                "volatility_level": "very_high" if last_vol > 0.12 else "high" if last_vol > 0.06 else "normal" if last_vol > 0.03 else "low",
-                "chaos_level": "high" if result['chaos_ratio'] > 0.6 else "moderate" if result['chaos_ratio'] > 0.3 else "low"
-            }
-        )
-        
+        # Directional strength weighs price efficiency (0.5), ADX
+        # directional components (0.3) and money flow (0.2)
+        if arrays is None:
+            arrays = VolatilityArrays(df)
+        if atr is not None:
+            atr = np.asarray(atr, dtype=np.float64)
+        result = arrays.nature(period, atr=atr)
+
+        logfire.debug("Volatility nature analysis", raw_metrics=result)
         return result
         
     except Exception as e:
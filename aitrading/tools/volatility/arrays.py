@@ -0,0 +1,103 @@
+# aitrading/tools/volatility/arrays.py
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..indicators import kernels
+
+
+class VolatilityArrays:
+    """The candles of one timeframe as float64 arrays, with the intermediate
+    series of the volatility metrics computed once and shared.
+
+    The true range feeds the ATR of any period and the smoothed directional
+    movement; only the last values of the nature components are computed,
+    since only those are reported. Results match the pandas functions of
+    ``volatility.indicators`` within floating point rounding.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.high, self.low, self.close, self.volume = (
+            df[column].to_numpy(dtype=np.float64) for column in ("high", "low", "close", "volume")
+        )
+        self.tr = kernels.true_range(self.high, self.low, self.close)
+        self._atr: Dict[int, np.ndarray] = {}
+
+    def atr(self, period: int = 14) -> np.ndarray:
+        """Average True Range."""
+        if period not in self._atr:
+            self._atr[period] = kernels.rolling_mean(self.tr, period)
+        return self._atr[period]
+
+    def bb_width(self, period: int = 20, std_dev: float = 2.0) -> np.ndarray:
+        """Bollinger Band Width ((Upper - Lower) / Middle)."""
+        middle, std = kernels.rolling_mean_std(self.close, period)
+        return ((middle + std_dev * std) - (middle - std_dev * std)) / middle
+
+    def _efficiency_ratio(self, period: int) -> float:
+        close = self.close
+        if len(close) <= period:
+            return float("nan")
+        path_length = np.abs(np.diff(close[-(period + 1):])).sum()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return float(np.float64(abs(close[-1] - close[-1 - period])) / path_length)
+
+    def _di_ratio(self, period: int) -> float:
+        high_diff = np.diff(self.high, prepend=np.nan)
+        low_diff = np.abs(np.diff(self.low, prepend=np.nan))
+        with np.errstate(invalid="ignore"):
+            pos_dm = np.where(high_diff > low_diff, high_diff, 0.0)
+            neg_dm = np.where(low_diff > high_diff, low_diff, 0.0)
+
+        # EMAs of true range and directional movement in one call
+        smoothed_tr, smoothed_pos, smoothed_neg = kernels.ema(
+            np.stack([self.tr, pos_dm, neg_dm]), period
+        )[:, -1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pos_di = 100 * smoothed_pos / smoothed_tr
+            neg_di = 100 * smoothed_neg / smoothed_tr
+            return float(abs(pos_di - neg_di) / (pos_di + neg_di))
+
+    def _money_flow_ratio(self, period: int) -> float:
+        if len(self.close) < period:
+            return 1.0
+        window = slice(-(period + 1), None)
+        typical_price = (self.high[window] + self.low[window] + self.close[window]) / 3
+        if len(typical_price) == period:
+            # The first candle has no previous typical price
+            typical_price = np.concatenate([[np.nan], typical_price])
+        money_flow = typical_price[1:] * self.volume[-period:]
+        change = np.diff(typical_price)
+        with np.errstate(invalid="ignore"):
+            pos_flow = money_flow[change > 0].sum()
+            neg_flow = money_flow[change < 0].sum()
+        if neg_flow == 0:
+            return 1.0
+        return float(pos_flow / neg_flow)
+
+    def nature(self, period: int = 14, atr: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """Last values of the ``analyze_volatility_nature`` components.
+
+        ``atr`` is the ``period`` ATR when already computed (e.g. from the
+        feature store).
+        """
+        if atr is None:
+            atr = self.atr(period)
+        er = self._efficiency_ratio(period)
+        di_ratio = self._di_ratio(period)
+        mf_ratio = self._money_flow_ratio(period)
+        norm_mf = mf_ratio / (1 + mf_ratio)
+
+        directional_strength = 0.5 * er + 0.3 * di_ratio + 0.2 * norm_mf
+        if np.isnan(directional_strength):
+            directional_strength = 0.0
+        return {
+            'directional_strength': float(directional_strength),
+            'volatility_score': float(atr[-1] / self.close[-1] * 100),
+            'chaos_ratio': 1 - float(directional_strength),
+            'efficiency_ratio': er,
+            'di_ratio': di_ratio,
+            'money_flow_norm': float(norm_mf)
+        }
@@ -0,0 +1,79 @@
+# aitrading/tools/volatility/benchmark.py
+
+"""Micro-benchmark of the volatility metrics.
+
+Times ``calculate_for_timeframes`` on synthetic candles of every base
+timeframe, and the nature analysis against the pandas indicator functions
+it replaces (recomputed here as reference, with the largest difference).
+
+Usage:
+    python -m aitrading.tools.volatility.benchmark --candles 672 --repeat 50
+"""
+
+import argparse
+from typing import Dict
+
+import pandas as pd
+
+from ..charts.config import TimeframesConfiguration
+from ..indicators.benchmark import best_of, synthetic_candles
+from .arrays import VolatilityArrays
+from .calculator import VolatilityCalculator
+from .indicators import (
+    calculate_adx_components, calculate_efficiency_ratio,
+    calculate_money_flow_ratio, calculate_normalized_atr
+)
+
+
+def reference_nature(df: pd.DataFrame, period: int) -> Dict[str, float]:
+    """Nature components with the pandas indicator functions."""
+    norm_atr = calculate_normalized_atr(df, period)
+    _, pos_di, neg_di = calculate_adx_components(df, period)
+    er = calculate_efficiency_ratio(df, period)
+    mf_ratio = calculate_money_flow_ratio(df, period)
+    norm_mf = mf_ratio / (1 + mf_ratio)
+    di_ratio = abs(pos_di - neg_di) / (pos_di + neg_di)
+    directional = (0.5 * er + 0.3 * di_ratio + 0.2 * norm_mf).fillna(0)
+    return {
+        'directional_strength': float(directional.iloc[-1]),
+        'volatility_score': float(norm_atr.iloc[-1]),
+        'efficiency_ratio': float(er.iloc[-1]),
+        'di_ratio': float(di_ratio.iloc[-1]),
+        'money_flow_norm': float(norm_mf.iloc[-1]),
+    }
+
+
+def run(candles: int, repeat: int) -> Dict[str, float]:
+    timeframes = TimeframesConfiguration().get_base_timeframes()
+    data = {tf: synthetic_candles(candles, seed=i) for i, tf in enumerate(timeframes)}
+    calculator = VolatilityCalculator()
+    df = data[timeframes[0]]
+
+    expected = reference_nature(df, calculator.period)
+    actual = VolatilityArrays(df).nature(calculator.period)
+    return {
+        "timeframes": len(timeframes),
+        "calculate_for_timeframes": best_of(lambda: calculator.calculate_for_timeframes(data), repeat),
+        "nature pandas": best_of(lambda: reference_nature(df, calculator.period), repeat),
+        "nature arrays": best_of(lambda: VolatilityArrays(df).nature(calculator.period), repeat),
+        "max abs diff": max(abs(expected[k] - actual[k]) for k in expected),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the volatility metrics")
+    parser.add_argument("--candles", type=int, default=672)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{args.candles} candles, best of {args.repeat}")
+    result = run(args.candles, args.repeat)
+    print(f"{'calculate_for_timeframes':<26} {result['calculate_for_timeframes']:>9.3f} ms "
+          f"({result['timeframes']} timeframes)")
+    for name in ("nature pandas", "nature arrays"):
+        print(f"{name:<26} {result[name]:>9.3f} ms")
+    print(f"{'max abs diff':<26} {result['max abs diff']:>9.2e}")
+
+
+if __name__ == "__main__":
+    main()
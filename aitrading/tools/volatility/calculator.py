@@ -1,16 +1,16 @@
 # aitrading/tools/volatility/calculator.py
 
-from typing import Dict
+from typing import Any, Callable, Dict, Hashable, Optional
 import logfire
 import pandas as pd
 import numpy as np
 
 from .models import VolatilityMetrics, TimeframeVolatility
 from .utils import get_timeframe_minutes, calculate_percentile
-from .indicators import (
-    calculate_atr, calculate_bb_width, calculate_volatility_change
-)
+from .arrays import VolatilityArrays
+from .indicators import calculate_volatility_change
 from .analysis import analyze_volatility_nature, interpret_volatility
+from ..indicators.store import FeatureStore
 
 
 class VolatilityCalculator:
@@ -24,17 +24,27 @@ class VolatilityCalculator:
     - Trading implications
     """
 
-    def __init__(self, historical_window: int = 100):
+    def __init__(self, historical_window: int = 100, features: Optional[FeatureStore] = None):
         self.historical_window = historical_window
         self.period = 9
+        self.features = features
 
-    def calculate_metrics(self, df: pd.DataFrame, timeframe: str) -> VolatilityMetrics:
+    def _feature(self, symbol: Optional[str], timeframe: str, df: pd.DataFrame,
+                 name: str, params: Hashable, compute: Callable[[], Any]) -> Any:
+        """Compute a series, through the feature store when one is shared."""
+        if self.features is None or symbol is None:
+            return compute()
+        return self.features.feature(symbol, timeframe, df, name, params, compute)
+
+    def calculate_metrics(self, df: pd.DataFrame, timeframe: str,
+                          symbol: Optional[str] = None) -> VolatilityMetrics:
         """
         Calculate comprehensive volatility metrics for a single timeframe.
         
         Args:
             df: DataFrame with OHLCV data
             timeframe: Timeframe identifier (e.g. '4H', '1H', '15m')
+            symbol: Symbol of the data, to share features through the store
             
         Returns:
             VolatilityMetrics object containing:
@@ -44,19 +54,25 @@ class VolatilityCalculator:
             - Trading implications
         """
         try:
-            with logfire.span(f"calculate_metrics_{timeframe}"):
+            with logfire.span(f"calculate_metrics_{timeframe}") as span:
+                # Candles as arrays; the true range is shared by ATR and ADX
+                arrays = VolatilityArrays(df)
+
                 # 1. Basic ATR calculations
-                atr = calculate_atr(df, self.period)
-                atr_current = float(atr.iloc[-1])
+                if self.features is not None and symbol is not None:
+                    atr = self.features.atr(symbol, timeframe, df, self.period).to_numpy(dtype=np.float64)
+                else:
+                    atr = arrays.atr(self.period)
+                atr_current = float(atr[-1])
                 atr_percentile = calculate_percentile(atr, self.historical_window)
                 
                 # 2. Normalized ATR
-                price = float(df["close"].iloc[-1])
+                price = float(arrays.close[-1])
                 normalized_atr = (atr_current / price) * 100
                 
                 # 3. Bollinger Bands analysis
-                bb_width = calculate_bb_width(df)
-                bb_width_current = float(bb_width.iloc[-1])
+                bb_width = self._feature(symbol, timeframe, df, "bb_width", (20, 2.0), arrays.bb_width)
+                bb_width_current = float(bb_width[-1])
                 bb_width_percentile = calculate_percentile(bb_width, self.historical_window)
                 
                 # 4. Volatility change calculation
@@ -69,12 +85,12 @@ class VolatilityCalculator:
                     volatility_change = calculate_volatility_change(atr, 4)  # Fallback to 4 periods
                 
                 # 5. Volatility nature analysis
-                vol_nature = analyze_volatility_nature(df, self.period)
+                vol_nature = analyze_volatility_nature(df, self.period, atr=atr, arrays=arrays)
                 vol_interpretation = interpret_volatility(vol_nature)
                 
                 # 6. Calculate normalized direction score (-100 to +100)
                 direction_score = vol_nature['directional_strength'] * 100
-                if df['close'].iloc[-1] < df['close'].iloc[-self.period]:
+                if arrays.close[-1] < arrays.close[-self.period]:
                     direction_score *= -1
                 
                 # 7. Calculate opportunity score based on new metrics
@@ -88,98 +104,21 @@ class VolatilityCalculator:
                 # Ensure opportunity score is within bounds
                 opportunity_score = float(np.clip(opportunity_score, 0, 100))
 
-                # Log detailed analysis with structured context
-                with logfire.span(f"volatility_analysis_{timeframe}") as span:
-                    span.set_attributes({
-                        "timeframe": timeframe,
-                        "atr": atr_current,
-                        "atr_percentile": atr_percentile,
-                        "normalized_atr": normalized_atr,
-                        "volatility_change_24h": volatility_change,
-                        "regime": vol_interpretation['volatility_class'],
-                        "direction_score": direction_score,
-                        "opportunity_score": opportunity_score
-                    })
-
-                    # Log volatility context interpretation
-                    volatility_context = {
-                        "LOW": "Market showing minimal movement, consider widening stop distances",
-                        "NORMAL": "Standard risk parameters apply",
-                        "HIGH": f"Consider reducing position sizes by {(1 - vol_nature['directional_strength']) * 100:.0f}%",
-                        "EXTREME": "High risk conditions, maximum position reduction recommended"
-                    }[vol_interpretation['volatility_class']]
-
-                    # Log directional analysis
-                    if direction_score > 70:
-                        direction_context = "Strong upward movement with clear directional bias"
-                    elif direction_score > 30:
-                        direction_context = "Moderate upward trend, showing directional consistency"
-                    elif direction_score > -30:
-                        direction_context = "Neutral/unclear directional bias"
-                    elif direction_score > -70:
-                        direction_context = "Moderate downward trend, showing directional consistency"
-                    else:
-                        direction_context = "Strong downward movement with clear directional bias"
-
-                    # Log trading implications
-                    if opportunity_score > 70:
-                        trading_context = {
-                            "opportunity_level": "HIGH OPPORTUNITY",
-                            "description": "Strong directional movement with supporting volatility",
-                            "position_sizing": f"Up to {vol_nature['directional_strength'] * 100:.0f}% of normal size",
-                            "entry_type": "Can consider market orders if momentum confirms"
-                        }
-                    elif opportunity_score > 50:
-                        trading_context = {
-                            "opportunity_level": "MODERATE OPPORTUNITY",
-                            "description": "Decent setup with acceptable risk",
-                            "position_sizing": f"{vol_nature['directional_strength'] * 100:.0f}% of normal size",
-                            "entry_type": "Prefer limit orders at key levels"
-                        }
-                    elif opportunity_score > 30:
-                        trading_context = {
-                            "opportunity_level": "CAUTIOUS",
-                            "description": "Conditions require careful validation",
-                            "position_sizing": f"Maximum {vol_nature['directional_strength'] * 100:.0f}% of normal size",
-                            "entry_type": "Only limit orders with clear invalidation"
-                        }
-                    else:
-                        trading_context = {
-                            "opportunity_level": "DEFENSIVE",
-                            "description": "Not ideal for new positions",
-                            "position_sizing": "Focus on managing existing positions",
-                            "entry_type": "Consider wider stops if holding through volatility"
-                        }
-
-                    # Log market efficiency analysis
-                    if bb_width_percentile > 80:
-                        efficiency_context = "Market showing significant expansion, expect increased volatility"
-                    elif bb_width_percentile > 50:
-                        efficiency_context = "Normal market expansion, standard trading conditions"
-                    else:
-                        efficiency_context = "Compressed market conditions, potential for expansion"
-
-                    # Log complete analysis
-                    logfire.info(f"Volatility Analysis for {timeframe}",
-                               volatility_context=volatility_context,
-                               direction_context=direction_context,
-                               trading_context=trading_context,
-                               efficiency_context=efficiency_context,
-                               extras={
-                                   "market_metrics": {
-                                       "atr_normalized": f"{normalized_atr:.2f}% of price",
-                                       "volatility_change": f"{volatility_change:.2f}% over 24h",
-                                       "direction_strength": f"{vol_nature['directional_strength']:.2f}",
-                                       "chaos_ratio": f"{vol_nature['chaos_ratio']:.2f}",
-                                       "bb_width_percentile": bb_width_percentile
-                                   },
-                                   "risk_parameters": {
-                                       "suggested_size_multiplier": vol_nature['directional_strength'],
-                                       "volatility_regime": vol_interpretation['volatility_class'],
-                                       "directional_class": vol_interpretation['directional_class'],
-                                       "trading_implication": vol_interpretation['trading_implication']
-                                   }
-                               })
+                # Numbers only: the interpretation follows from them and the regime
+                span.set_attributes({
+                    "timeframe": timeframe,
+                    "atr": atr_current,
+                    "atr_percentile": atr_percentile,
+                    "normalized_atr": normalized_atr,
+                    "bb_width_percentile": bb_width_percentile,
+                    "volatility_change_24h": volatility_change,
+                    "regime": vol_interpretation['volatility_class'],
+                    "directional_class": vol_interpretation['directional_class'],
+                    "trading_implication": vol_interpretation['trading_implication'],
+                    "direction_score": direction_score,
+                    "chaos_ratio": vol_nature['chaos_ratio'],
+                    "opportunity_score": opportunity_score
+                })
 
                 return VolatilityMetrics(
                     atr=atr_current,
@@ -197,21 +136,22 @@ class VolatilityCalculator:
             logfire.error(f"Error in calculate_metrics: {str(e)}")
             raise
 
-    def calculate_for_timeframes(self, data: Dict[str, pd.DataFrame]) -> TimeframeVolatility:
+    def calculate_for_timeframes(self, data: Dict[str, pd.DataFrame],
+                                 symbol: Optional[str] = None) -> TimeframeVolatility:
         """Calculate volatility metrics for multiple timeframes."""
         metrics = {}
         
         first_df = next(iter(data.values()))
-        symbol = first_df.index.name or "UNKNOWN"
+        label = symbol or first_df.index.name or "UNKNOWN"
 
         for timeframe, df in data.items():
             try:
-                metrics[timeframe] = self.calculate_metrics(df, timeframe)
+                metrics[timeframe] = self.calculate_metrics(df, timeframe, symbol)
             except Exception as e:
                 logfire.error(f"Error calculating metrics for {timeframe}", error=str(e))
                 raise ValueError(f"Error calculating metrics for {timeframe}: {str(e)}")
 
         return TimeframeVolatility(
-            symbol=symbol,
+            symbol=label,
             metrics=metrics
         )
\ No newline at end of file
@@ -1,22 +1,15 @@
 # aitrading/tools/volatility/indicators.py
 
-from typing import Tuple
+from typing import Tuple, Union
 import pandas as pd
 import numpy as np
 
+from ..indicators.atr import atr, true_range
+
 
 def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
     """Calculate Average True Range."""
-    high = df["high"]
-    low = df["low"]
-    close = df["close"]
-
-    tr1 = high - low
-    tr2 = abs(high - close.shift())
-    tr3 = abs(low - close.shift())
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-
-    return tr.rolling(window=period).mean()
+    return atr(df, period)
 
 
 def calculate_bb_width(df: pd.DataFrame, period: int = 20, std_dev: float = 2.0) -> pd.Series:
@@ -48,11 +41,7 @@ def calculate_adx_components(df: pd.DataFrame, period: int = 14) -> Tuple[pd.Ser
     pos_dm.loc[pos_dm_mask] = high_diff[pos_dm_mask]
     neg_dm.loc[neg_dm_mask] = low_diff.abs()[neg_dm_mask]
 
-    tr = pd.DataFrame({
-        'tr1': df['high'] - df['low'],
-        'tr2': abs(df['high'] - df['close'].shift(1)),
-        'tr3': abs(df['low'] - df['close'].shift(1))
-    }).max(axis=1)
+    tr = true_range(df)
 
     # Exponential smoothing
     smoothed_tr = tr.ewm(span=period, adjust=False).mean()
@@ -115,15 +104,16 @@ def calculate_normalized_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
     return norm_atr
 
 
-def calculate_volatility_change(atr_series: pd.Series, periods: int) -> float:
+def calculate_volatility_change(atr_series: Union[pd.Series, np.ndarray], periods: int) -> float:
     """
     Calculate percentage change in ATR over specified number of periods.
     """
-    if len(atr_series) < periods:
-        periods = len(atr_series) // 2
+    values = np.asarray(atr_series, dtype=np.float64)
+    if len(values) < periods:
+        periods = len(values) // 2
     
-    current = float(atr_series.iloc[-1])
-    previous = float(atr_series.iloc[-periods])
+    current = float(values[-1])
+    previous = float(values[-periods])
     
     if previous == 0:
         return 0.0
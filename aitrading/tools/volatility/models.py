@@ -1,6 +1,6 @@
 # aitrading/tools/volatility/models.py
 
-from typing import Dict, Literal
+from typing import Dict, List, Literal, Optional
 from pydantic import BaseModel, Field
 
 VolatilityClass = Literal["LOW", "NORMAL", "HIGH", "EXTREME"]
@@ -178,4 +178,39 @@ class TimeframeVolatility(BaseModel):
             }
             
         except KeyError:
-            raise ValueError(f"Primary timeframe {primary_timeframe} not found in metrics")
\ No newline at end of file
+            raise ValueError(f"Primary timeframe {primary_timeframe} not found in metrics")
+
+
+class PublishedVolatility(BaseModel):
+    """Metrics of one timeframe published by the volatility service."""
+    metrics: VolatilityMetrics = Field(..., description="Metrics as of the last closed candle")
+    atr: Dict[int, float] = Field(
+        default_factory=dict,
+        description="Latest ATR by period, for consumers using other periods (e.g. stop losses)"
+    )
+    closed_at: int = Field(..., description="Close time of the last candle included (ms)")
+    next_close: int = Field(..., description="Close time of the next candle, when these metrics are superseded (ms)")
+    updated_at: float = Field(..., description="Publication time (epoch seconds)")
+
+
+class ScreenedSymbol(BaseModel):
+    """Screening outcome of one symbol."""
+    symbol: str
+    normalized_atr: Optional[float] = Field(None, description="ATR as percentage of price")
+    opportunity_score: Optional[float] = Field(None, description="Opportunity score on the screening timeframe")
+    direction_score: Optional[float] = Field(None, description="Direction score on the screening timeframe")
+    regime: Optional[VolatilityClass] = Field(None, description="Volatility regime on the screening timeframe")
+    has_position: bool = Field(False, description="Whether the account holds a position in the symbol")
+    selected: bool = Field(False, description="Whether the symbol goes on to planning")
+    reason: str = Field(..., description="Why the symbol was selected or skipped")
+
+
+class ScreenerResult(BaseModel):
+    """Symbols of a screening run, best ranked first."""
+    timeframe: str
+    ranking: List[ScreenedSymbol] = Field(default_factory=list)
+
+    @property
+    def selected(self) -> List[str]:
+        """Symbols to plan, in ranking order."""
+        return [s.symbol for s in self.ranking if s.selected]
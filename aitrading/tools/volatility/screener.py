@@ -0,0 +1,175 @@
+# aitrading/tools/volatility/screener.py
+
+from typing import Dict, List, Optional, Union
+
+import logfire
+import pandas as pd
+
+from ..bybit.async_market_data import AsyncMarketDataTool
+from ..bybit.orders import OrdersTool
+from ..bybit.tickers import TickerSnapshot
+from ..charts.models import IndicatorConfig
+from ..indicators.batch import IndicatorBatch
+from .calculator import VolatilityCalculator
+from .models import ScreenedSymbol, ScreenerResult, VolatilityMetrics
+from .service import VolatilityRegistry
+
+
+class VolatilityScreener:
+    """Ranks a symbol universe on its volatility metrics to pick what gets planned.
+
+    Chart rendering and the LLM call are the expensive part of a cycle; the
+    screener keeps them for the symbols worth it. For every symbol of the
+    universe it loads one timeframe, drops quiet markets (NATR below
+    ``min_natr``, computed for all symbols in one batched pass), then ranks
+    the rest on the ``VolatilityCalculator`` opportunity score (ties broken
+    by the strength of the direction score). The top ``top_n`` symbols,
+    or those scoring at least ``min_opportunity``, are selected, and symbols
+    with an open position always are.
+
+    ``universe`` lists extra symbols to scan besides the configured ones,
+    or is "tickers" to scan every linear ``settle_coin`` contract with at
+    least ``min_turnover`` of 24h turnover, the ``max_universe`` most
+    traded first.
+    """
+
+    def __init__(self, market_data: AsyncMarketDataTool, orders: OrdersTool,
+                 tickers: Optional[TickerSnapshot] = None,
+                 calculator: Optional[VolatilityCalculator] = None,
+                 registry: Optional[VolatilityRegistry] = None,
+                 timeframe: str = "1H", top_n: Optional[int] = 5,
+                 min_opportunity: Optional[float] = None, min_natr: float = 0.0,
+                 universe: Union[List[str], str, None] = None,
+                 min_turnover: float = 0.0, max_universe: int = 200,
+                 settle_coin: str = "USDT"):
+        self.market_data = market_data
+        self.orders = orders
+        self.tickers = tickers
+        self.calculator = calculator or VolatilityCalculator()
+        self.registry = registry
+        self.timeframe = timeframe
+        self.top_n = top_n
+        self.min_opportunity = min_opportunity
+        self.min_natr = min_natr
+        self.universe = universe
+        self.min_turnover = min_turnover
+        self.max_universe = max_universe
+        self.settle_coin = settle_coin
+
+    def universe_symbols(self, configured: List[str]) -> List[str]:
+        """Configured symbols followed by the rest of the universe."""
+        if self.universe == "tickers":
+            if self.tickers is None:
+                raise ValueError("A ticker snapshot is needed to screen all tickers")
+            tickers = [
+                t for t in self.tickers.all().values()
+                if t["symbol"].endswith(self.settle_coin)
+                and float(t.get("turnover24h") or 0) >= self.min_turnover
+            ]
+            tickers.sort(key=lambda t: float(t.get("turnover24h") or 0), reverse=True)
+            extra = [t["symbol"] for t in tickers[:self.max_universe]]
+        else:
+            extra = list(self.universe or [])
+        return list(dict.fromkeys(list(configured) + extra))
+
+    def _position_symbols(self, configured: List[str]) -> List[str]:
+        try:
+            return self.orders.get_position_symbols(self.settle_coin)
+        except Exception as e:
+            # Never drop a symbol that may hold a position: keep every configured one
+            logfire.error("Failed to fetch open positions for screening", error=str(e))
+            return list(configured)
+
+    def _load(self, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+        fetched = self.market_data.fetch_symbols(symbols, [self.timeframe])
+        frames = {}
+        for symbol, timeframes in fetched.items():
+            df = timeframes[self.timeframe]
+            if isinstance(df, Exception):
+                logfire.warning("Screener data unavailable", symbol=symbol, error=str(df))
+            elif len(df) > self.calculator.period:
+                frames[symbol] = df
+        return frames
+
+    def _normalized_atr(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, float]:
+        if not frames:
+            return {}
+        period = self.calculator.period
+        # The latest NATR only needs period + 1 candles
+        block = IndicatorBatch(frames, candles=period + 1).calculate(
+            [IndicatorConfig(type="atr", parameters={"period": period, "normalize": True})],
+            columns=["NATR"]
+        )
+        return block.latest("NATR")
+
+    def _metrics(self, symbol: str, df: pd.DataFrame) -> VolatilityMetrics:
+        if self.registry is not None:
+            published = self.registry.get(symbol, [self.timeframe])
+            if published is not None:
+                return published.metrics[self.timeframe]
+        return self.calculator.calculate_metrics(df, self.timeframe, symbol)
+
+    def screen(self, configured: List[str]) -> ScreenerResult:
+        """Rank the universe and select the symbols to plan."""
+        with logfire.span("volatility_screener") as span:
+            symbols = self.universe_symbols(configured)
+            positions = set(self._position_symbols(configured))
+            frames = self._load(symbols)
+            natr = self._normalized_atr(frames)
+
+            ranked: List[ScreenedSymbol] = []
+            skipped: List[ScreenedSymbol] = []
+            for symbol in symbols:
+                has_position = symbol in positions
+                if symbol not in frames:
+                    skipped.append(ScreenedSymbol(symbol=symbol, has_position=has_position,
+                                                  reason="no data"))
+                    continue
+                if natr[symbol] < self.min_natr:
+                    skipped.append(ScreenedSymbol(symbol=symbol, normalized_atr=natr[symbol],
+                                                  has_position=has_position, reason="quiet market"))
+                    continue
+                try:
+                    metrics = self._metrics(symbol, frames[symbol])
+                except Exception as e:
+                    logfire.warning("Screener metrics failed", symbol=symbol, error=str(e))
+                    skipped.append(ScreenedSymbol(symbol=symbol, has_position=has_position,
+                                                  reason="metrics failed"))
+                    continue
+                ranked.append(ScreenedSymbol(
+                    symbol=symbol,
+                    normalized_atr=metrics.normalized_atr,
+                    opportunity_score=metrics.opportunity_score,
+                    direction_score=metrics.direction_score,
+                    regime=metrics.regime,
+                    has_position=has_position,
+                    reason="ranked below the cut"
+                ))
+
+            ranked.sort(key=lambda s: (s.opportunity_score, abs(s.direction_score)), reverse=True)
+            picked = 0
+            for entry in ranked:
+                if self.min_opportunity is not None and entry.opportunity_score < self.min_opportunity:
+                    entry.reason = "below threshold"
+                elif self.top_n is None or picked < self.top_n:
+                    entry.selected = True
+                    entry.reason = "top ranked"
+                    picked += 1
+            for entry in ranked + skipped:
+                if entry.has_position and not entry.selected:
+                    entry.selected = True
+                    entry.reason = "open position"
+            # Positions on symbols outside the universe are managed too
+            for symbol in sorted(positions - set(symbols)):
+                skipped.append(ScreenedSymbol(symbol=symbol, has_position=True, selected=True,
+                                              reason="open position"))
+
+            result = ScreenerResult(timeframe=self.timeframe, ranking=ranked + skipped)
+            span.set_attributes({
+                "universe": len(symbols),
+                "ranked": len(ranked),
+                "selected": result.selected,
+            })
+            logfire.info("Symbols screened", universe=len(symbols), ranked=len(ranked),
+                         selected=result.selected, positions=sorted(positions))
+            return result
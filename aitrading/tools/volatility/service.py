@@ -0,0 +1,266 @@
+# aitrading/tools/volatility/service.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import logfire
+
+from ..bybit.kline_cache import split_forming
+from ..bybit.market_data import MarketDataTool
+from ..bybit.stream import MarketDataStream
+from ..indicators.atr import atr
+from ..redis.provider import RedisProvider
+from .calculator import VolatilityCalculator
+from .models import PublishedVolatility, TimeframeVolatility
+
+
+class VolatilityRegistry:
+    """Latest published volatility metrics per symbol and timeframe.
+
+    Kept in memory and, when Redis is enabled, mirrored to a hash per symbol
+    (``volatility:<symbol>``, one field per timeframe) so that other
+    processes, such as the UI, read the same metrics. An entry is current
+    until the next candle of its timeframe closes, plus ``grace_seconds``
+    for the recomputation to land.
+    """
+
+    def __init__(self, redis_provider: Optional[RedisProvider] = None,
+                 ttl_seconds: int = 86400, grace_seconds: float = 60.0):
+        self.redis = redis_provider
+        self.ttl = ttl_seconds
+        self.grace_seconds = grace_seconds
+        self.key_prefix = "volatility:"
+        self._entries: Dict[Tuple[str, str], PublishedVolatility] = {}
+        self._lock = threading.Lock()
+        self.stats = {"published": 0, "hits": 0, "misses": 0}
+
+    def _get_key(self, symbol: str) -> str:
+        return f"{self.key_prefix}{symbol}"
+
+    @property
+    def _redis_client(self):
+        if self.redis is None or not self.redis.enabled:
+            return None
+        return self.redis.client
+
+    def publish(self, symbol: str, timeframe: str, entry: PublishedVolatility) -> None:
+        """Store the metrics of a timeframe, replacing older ones."""
+        with self._lock:
+            current = self._entries.get((symbol, timeframe))
+            if current is not None and current.closed_at > entry.closed_at:
+                return
+            self._entries[(symbol, timeframe)] = entry
+            self.stats["published"] += 1
+
+        try:
+            client = self._redis_client
+            if client is not None:
+                key = self._get_key(symbol)
+                client.hset(key, timeframe, entry.model_dump_json())
+                client.expire(key, self.ttl)
+        except Exception as e:
+            logfire.warning("Failed to publish volatility to Redis", symbol=symbol,
+                            timeframe=timeframe, error=str(e))
+
+    def entry(self, symbol: str, timeframe: str) -> Optional[PublishedVolatility]:
+        """Latest entry of a timeframe if still current, from memory or Redis."""
+        with self._lock:
+            entry = self._entries.get((symbol, timeframe))
+        if entry is None or not self._is_current(entry):
+            entry = self._load(symbol, timeframe)
+        if entry is None or not self._is_current(entry):
+            return None
+        return entry
+
+    def _load(self, symbol: str, timeframe: str) -> Optional[PublishedVolatility]:
+        try:
+            client = self._redis_client
+            if client is None:
+                return None
+            raw = client.hget(self._get_key(symbol), timeframe)
+            if not raw:
+                return None
+            entry = PublishedVolatility.model_validate_json(raw)
+        except Exception as e:
+            logfire.warning("Failed to read volatility from Redis", symbol=symbol,
+                            timeframe=timeframe, error=str(e))
+            return None
+        with self._lock:
+            current = self._entries.get((symbol, timeframe))
+            if current is None or current.closed_at < entry.closed_at:
+                self._entries[(symbol, timeframe)] = entry
+        return entry
+
+    def _is_current(self, entry: PublishedVolatility) -> bool:
+        return time.time() * 1000 < entry.next_close + self.grace_seconds * 1000
+
+    def get(self, symbol: str, timeframes: Iterable[str]) -> Optional[TimeframeVolatility]:
+        """Current metrics of all ``timeframes``, or None if any is missing or outdated."""
+        metrics = {}
+        for timeframe in timeframes:
+            entry = self.entry(symbol, timeframe)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            metrics[timeframe] = entry.metrics
+        self.stats["hits"] += 1
+        return TimeframeVolatility(symbol=symbol, metrics=metrics)
+
+    def latest_atr(self, symbol: str, timeframe: str, period: int) -> Optional[float]:
+        """Current ATR of a timeframe, if published for ``period``."""
+        entry = self.entry(symbol, timeframe)
+        if entry is None:
+            return None
+        return entry.atr.get(period)
+
+    def summary(self) -> Dict[str, int]:
+        """Registry counters, suitable for structured logging."""
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries)}
+
+
+class VolatilityService:
+    """Recomputes volatility metrics in the background whenever a candle closes.
+
+    Tracked symbols are updated per timeframe on the stream's candle-close
+    callbacks, or, without a stream, on a timer firing ``close_delay``
+    seconds after each candle boundary. Each update fetches the timeframe
+    through the market data tool (cached candles plus the ones just
+    closed), computes the metrics on the closed candles only and publishes
+    them to the registry, with the latest ATR for each of ``atr_periods``.
+    """
+
+    def __init__(self, market_data: MarketDataTool, registry: VolatilityRegistry,
+                 calculator: Optional[VolatilityCalculator] = None,
+                 stream: Optional[MarketDataStream] = None,
+                 timeframes: Optional[List[str]] = None,
+                 atr_periods: Iterable[int] = (),
+                 close_delay: float = 5.0, max_workers: int = 2):
+        self.market_data = market_data
+        self.registry = registry
+        self.calculator = calculator or VolatilityCalculator()
+        self.stream = stream
+        self.timeframes = timeframes or market_data.get_analysis_timeframes()
+        self.atr_periods = sorted(set(atr_periods))
+        self.close_delay = close_delay
+
+        self._configs = {tf: market_data.config.get_timeframe_config(tf) for tf in self.timeframes}
+        self._by_interval = {config.interval: tf for tf, config in self._configs.items()}
+        self.symbols: Set[str] = set()
+        self._pending: Set[Tuple[str, str]] = set()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="volatility")
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self) -> None:
+        """Listen for candle closes."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        if self.stream is not None:
+            self.stream.on_candle_close(self._on_candle_close)
+        else:
+            self._schedule()
+        logfire.info("Volatility service started", timeframes=self.timeframes,
+                     source="stream" if self.stream is not None else "timer")
+
+    def stop(self) -> None:
+        """Stop the timer and drop queued updates."""
+        with self._lock:
+            self._started = False
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def track(self, symbols: Iterable[str]) -> None:
+        """Keep the metrics of ``symbols`` published; new symbols are computed right away."""
+        new = [symbol for symbol in symbols if symbol not in self.symbols]
+        self.symbols.update(new)
+        self.start()
+        for symbol in new:
+            for timeframe, config in self._configs.items():
+                if self.stream is not None:
+                    self.stream.ensure_kline(symbol, config.interval)
+                self._submit(symbol, timeframe)
+
+    def _on_candle_close(self, symbol: str, interval: str, candle: dict) -> None:
+        timeframe = self._by_interval.get(interval)
+        if timeframe is not None and symbol in self.symbols:
+            self._submit(symbol, timeframe)
+
+    def _schedule(self) -> None:
+        now_ms = int(time.time() * 1000)
+        next_close = min(
+            (now_ms // (config.minutes * 60_000) + 1) * config.minutes * 60_000
+            for config in self._configs.values()
+        )
+        delay = (next_close - now_ms) / 1000 + self.close_delay
+        with self._lock:
+            if not self._started:
+                return
+            self._timer = threading.Timer(delay, self._on_timer, args=(next_close,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _on_timer(self, boundary: int) -> None:
+        for timeframe, config in self._configs.items():
+            if boundary % (config.minutes * 60_000) == 0:
+                for symbol in list(self.symbols):
+                    self._submit(symbol, timeframe)
+        self._schedule()
+
+    def _submit(self, symbol: str, timeframe: str) -> None:
+        # Closes arriving while an update is queued are covered by it
+        with self._lock:
+            if not self._started or (symbol, timeframe) in self._pending:
+                return
+            self._pending.add((symbol, timeframe))
+        try:
+            self._executor.submit(self._run, symbol, timeframe)
+        except RuntimeError:
+            # Shut down
+            with self._lock:
+                self._pending.discard((symbol, timeframe))
+
+    def _run(self, symbol: str, timeframe: str) -> None:
+        with self._lock:
+            self._pending.discard((symbol, timeframe))
+        try:
+            self.update(symbol, timeframe)
+        except Exception as e:
+            logfire.error("Volatility update failed", symbol=symbol, timeframe=timeframe, error=str(e))
+
+    def update(self, symbol: str, timeframe: str) -> PublishedVolatility:
+        """Compute and publish the metrics of a timeframe now."""
+        config = self._configs[timeframe]
+        interval_ms = config.minutes * 60_000
+        df = self.market_data.fetch_historical_data(symbol, timeframe)
+        closed, _ = split_forming(df, interval_ms, int(time.time() * 1000))
+        if closed.empty:
+            raise ValueError(f"No closed {timeframe} candles for {symbol}")
+
+        features = self.calculator.features
+        atr_values = {}
+        for period in self.atr_periods:
+            if features is not None:
+                atr_values[period] = features.latest_atr(symbol, timeframe, closed, period)
+            else:
+                atr_values[period] = float(atr(closed, period).iloc[-1])
+
+        closed_at = int(closed.index.as_unit("ms").asi8[-1]) + interval_ms
+        entry = PublishedVolatility(
+            metrics=self.calculator.calculate_metrics(closed, timeframe, symbol),
+            atr=atr_values,
+            closed_at=closed_at,
+            next_close=closed_at + interval_ms,
+            updated_at=time.time()
+        )
+        self.registry.publish(symbol, timeframe, entry)
+        logfire.debug("Volatility published", symbol=symbol, timeframe=timeframe,
+                      regime=entry.metrics.regime, closed_at=closed_at)
+        return entry
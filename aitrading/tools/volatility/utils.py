@@ -1,7 +1,12 @@
 # aitrading/tools/volatility/utils.py
 
+from typing import Union
+
+import numpy as np
 import pandas as pd
 
+from ..indicators.percentile import rank_last_value
+
 def get_timeframe_minutes(timeframe: str) -> int:
     """Get number of minutes for a timeframe."""
     timeframe = timeframe.upper()
@@ -27,8 +32,6 @@ def get_dynamic_lookback(timeframe: str) -> int:
     return max(10, periods)
 
 
-def calculate_percentile(series: pd.Series, window: int) -> float:
+def calculate_percentile(series: Union[pd.Series, np.ndarray], window: int) -> float:
     """Calculate the current value's percentile over a historical window."""
-    current_value = series.iloc[-1]
-    historical_window = series.iloc[-window:]
-    return float(pd.Series(historical_window).rank(pct=True).iloc[-1] * 100)
\ No newline at end of file
+    return rank_last_value(np.asarray(series, dtype=np.float64), window) * 100
\ No newline at end of file
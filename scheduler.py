@@ -4,7 +4,7 @@ import yaml
 import signal
 import time
 import warnings
-from typing import Dict, Any
+from typing import Dict, Any, List
 from datetime import datetime
 from pathlib import Path
 from rich.console import Console
@@ -85,7 +85,11 @@ class TradingScheduler:
             # Aggiungiamo la configurazione dello stop loss
             "stop_loss": self.config.get("stop_loss", {}),
             # Aggiungiamo anche la configurazione redis se presente
-            "redis": self.config.get("redis", {})
+            "redis": self.config.get("redis", {}),
+            "market_data": self.config.get("market_data", {}),
+            "screener": self.config.get("screener", {}),
+            "planning_gate": self.config.get("planning_gate", {}),
+            "transport": self.config.get("transport", {})
         })
 
         logfire.debug("Container initialized",
@@ -99,6 +103,12 @@ class TradingScheduler:
         """Handle termination signals."""
         logfire.info("Received termination signal - initiating shutdown")
         self.running = False
+        prefetcher = self.container.cycle_prefetcher()
+        if prefetcher is not None:
+            prefetcher.cancel()
+        volatility = self.container.volatility_service()
+        if volatility is not None:
+            volatility.stop()
 
     def _execute_strategy(self, symbol: str, params: Dict[str, Any]) -> None:
         """Execute trading strategy for a single symbol."""
@@ -118,6 +128,15 @@ class TradingScheduler:
             planner = self.container.trading_planner()
             stop_loss_manager = self.container.stop_loss_manager()
 
+            # Charts and the LLM call only when the market state moved
+            gate = self.container.planning_gate()
+            decision = gate.check(symbol) if gate is not None else None
+            if decision is not None and not decision.replan:
+                stop_loss_updates = stop_loss_manager.update_position_stops(symbol)
+                if stop_loss_updates:
+                    logfire.info("Stop loss updates", extra=stop_loss_updates)
+                return
+
             trading_plan = planner.create_plan(trading_params)
 
             if trading_plan:
@@ -130,6 +149,8 @@ class TradingScheduler:
 
                     # Execute the plan
                     result = planner.execute_plan(trading_plan)
+                    if decision is not None:
+                        gate.record(decision)
 
                     result["stop_loss_updates"] = stop_loss_manager.update_position_stops(symbol)
 
@@ -166,6 +187,40 @@ class TradingScheduler:
         except Exception as e:
             logfire.exception(f"Error executing strategy: {str(e)}")
 
+    def _schedule_prefetch(self, cycle_in: float, symbols: List[str]) -> None:
+        """Warm the caches for the next cycle's symbols shortly before it starts."""
+        prefetcher = self.container.cycle_prefetcher()
+        if prefetcher is not None:
+            prefetcher.schedule(symbols, cycle_in)
+
+    def _select_symbols(self) -> Dict[str, Dict[str, Any]]:
+        """Symbols to plan this cycle, with their trading parameters.
+
+        Without a screener, every configured symbol. With one, the symbols
+        it selects from its universe; those not configured use the
+        screener's default parameters, or are skipped when there are none.
+        """
+        configured = self.config.get("symbols", {})
+        screener = self.container.volatility_screener()
+        if screener is None:
+            return dict(configured)
+
+        try:
+            selected = screener.screen(list(configured)).selected
+        except Exception as e:
+            logfire.exception(f"Screener failed, planning all configured symbols: {str(e)}")
+            return dict(configured)
+
+        defaults = self.config.get("screener", {}).get("defaults")
+        symbols = {}
+        for symbol in selected:
+            params = configured.get(symbol) or defaults
+            if params is None:
+                logfire.warning("Screened symbol has no trading parameters, skipped", symbol=symbol)
+                continue
+            symbols[symbol] = params
+        return symbols
+
     def run(self) -> None:
         """Main scheduling loop."""
         self.running = True
@@ -173,12 +228,19 @@ class TradingScheduler:
 
         logfire.info(f"Starting trading scheduler", extra={"interval": interval})
 
+        # Volatility metrics published on candle close, read by planner and stop losses
+        volatility = self.container.volatility_service()
+        if volatility is not None:
+            volatility.track(list(self.config.get("symbols", {})))
+
         while self.running:
             start_time = datetime.now()
 
             try:
+                symbols = self._select_symbols()
+
                 # Process each symbol sequentially
-                for symbol, params in self.config.get("symbols", {}).items():
+                for symbol, params in symbols.items():
                     if not self.running:
                         break
 
@@ -188,6 +250,11 @@ class TradingScheduler:
                     # Short pause between symbols
                     time.sleep(1)
 
+                logfire.info("Market data cache stats",
+                             **self.container.market_data().cache_summary(),
+                             account=self.container.orders().cache_summary(),
+                             volatility=self.container.volatility_registry().summary())
+
                 # Calculate time until next run
                 elapsed = (datetime.now() - start_time).total_seconds()
                 sleep_time = max(0, (interval * 60) - elapsed)
@@ -195,6 +262,7 @@ class TradingScheduler:
                 if sleep_time > 0 and self.running:
                     next_run = datetime.now().timestamp() + sleep_time
                     logfire.info(f"Next run at {datetime.fromtimestamp(next_run).strftime('%Y-%m-%d %H:%M:%S')}")
+                    self._schedule_prefetch(sleep_time, list(symbols))
                     time.sleep(sleep_time)
 
             except Exception as e:
@@ -0,0 +1,186 @@
+"""The incremental indicator engine against a full recompute of each anchored window."""
+
+import io
+
+import numpy as np
+import pandas as pd
+from hypothesis import given, settings, strategies as st
+from hypothesis.extra.numpy import arrays
+
+from aitrading.tools.charts.indicators import create_indicator_calculator
+from aitrading.tools.charts.models import IndicatorConfig
+from aitrading.tools.indicators.incremental import IncrementalIndicators, _Rank
+
+INTERVAL_MS = 15 * 60_000
+
+CONFIGS = [
+    IndicatorConfig(type="ema", parameters={"period": 10}),
+    IndicatorConfig(type="bollinger", parameters={"period": 8, "calculate_width": True,
+                                                   "store_percentile": True}),
+    IndicatorConfig(type="rsi", parameters={"period": 6}),
+    IndicatorConfig(type="macd", parameters={"fast_period": 5, "slow_period": 9, "signal_period": 4}),
+    IndicatorConfig(type="volume", parameters={"ma_period": 5}),
+    IndicatorConfig(type="atr", parameters={"period": 7, "normalize": True, "store_percentile": True}),
+    IndicatorConfig(type="volume_profile", parameters={"session_hours": 4, "bin_pct": 0.5}),
+]
+
+
+def candles(returns: np.ndarray, ranges: np.ndarray, volumes: np.ndarray, start: int) -> pd.DataFrame:
+    """OHLCV frame of a random walk on a 0.01 tick, ``start`` candles after the epoch's first Monday."""
+    close = np.round(100 * np.exp(np.cumsum(returns)), 2)
+    open_ = np.r_[100.0, close[:-1]]
+    high = np.maximum(np.round(np.maximum(open_, close) * (1 + ranges[:, 0]), 2), np.maximum(open_, close))
+    low = np.minimum(np.round(np.minimum(open_, close) * (1 - ranges[:, 1]), 2), np.minimum(open_, close))
+    index = pd.DatetimeIndex(pd.to_datetime((4 * 96 + start + np.arange(len(close))) * INTERVAL_MS,
+                                            unit="ms"), name="timestamp")
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close,
+                         "volume": volumes, "turnover": volumes * close}, index=index)
+
+
+@st.composite
+def series(draw):
+    n = draw(st.integers(20, 120))
+    returns = draw(arrays(np.float64, n, elements=st.floats(-0.03, 0.03)))
+    ranges = draw(arrays(np.float64, (n, 2), elements=st.floats(0, 0.02)))
+    # Traded quantities come in lots
+    volumes = draw(arrays(np.int64, n, elements=st.integers(0, 10 ** 6))) / 1000
+    return candles(returns, ranges, volumes, draw(st.integers(0, 200)))
+
+
+RTOL, ATOL = 1e-7, 1e-9
+
+# Standard deviations near zero carry the square root of their variance's
+# rounding, about 1e-8 of the price
+STD_COLUMNS = ("BB_upper", "BB_lower", "VWAP_upper", "VWAP_lower")
+
+# Percentile columns and the columns they rank
+RANKED = {"BB_width_percentile": "BB_width", "ATR_percentile": "ATR", "NATR_percentile": "NATR"}
+
+
+def tolerance(column: str, window: pd.DataFrame) -> float:
+    """Absolute tolerance of a column."""
+    if column in STD_COLUMNS:
+        return 1e-6 * window["close"].abs().max()
+    if column == "BB_width":
+        return 1e-6
+    if column == "RSI":
+        return RTOL * 100
+    return ATOL
+
+
+def assert_ranks_within(ranks: np.ndarray, values: np.ndarray, atol: float, column: str) -> None:
+    """Each rank, of one of the last ``len(ranks)`` values, is one the values
+    up to it allow within tolerance.
+
+    Values equal in exact arithmetic (a steady trend gives equal band widths)
+    round differently in each engine, and exact ties are what ranks count.
+    """
+    skip = len(values) - len(ranks)
+    for t, (rank, x) in enumerate(zip(ranks, values[skip:]), start=skip):
+        if np.isnan(x):
+            assert np.isnan(rank), column
+            continue
+        seen = values[:t + 1][~np.isnan(values[:t + 1])]
+        tol = RTOL * abs(x) + atol
+        low = (np.sum(seen < x - tol) + 1) / len(seen)
+        high = np.sum(seen <= x + tol) / len(seen)
+        assert low - 1e-12 <= rank <= high + 1e-12, (column, t, rank, low, high)
+
+
+def assert_matches(result: pd.DataFrame, frame: pd.DataFrame) -> None:
+    """``result`` matches ``calculate_all`` on ``frame``, whose last rows are those of ``result``."""
+    expected = create_indicator_calculator(frame).calculate_all(CONFIGS)
+    assert set(result.columns) == set(expected.columns)
+    assert result.index.equals(frame.index[len(frame) - len(result):])
+    skip = len(frame) - len(result)
+    for column in expected.columns:
+        a = expected[column].to_numpy(dtype=np.float64)[skip:]
+        b = result[column].to_numpy(dtype=np.float64)
+        if column == "RSI":
+            # Undefined (0 / 0) once the last period closes are equal, up to
+            # rounding: the engines tell residues from moves differently
+            period = next(c.parameters.period for c in CONFIGS if c.type == "rsi")
+            close = frame["close"]
+            spread = (close.rolling(period + 1, min_periods=1).max()
+                      - close.rolling(period + 1, min_periods=1).min())
+            flat = (spread <= 1e-10 * close).to_numpy()[skip:]
+            a, b = a[~flat], b[~flat]
+        if column in RANKED:
+            source = RANKED[column]
+            assert_ranks_within(b, expected[source].to_numpy(dtype=np.float64),
+                                tolerance(source, frame), column)
+        else:
+            np.testing.assert_allclose(b, a, rtol=RTOL, atol=tolerance(column, frame), err_msg=column)
+
+
+@settings(max_examples=150, deadline=None)
+@given(
+    df=series(),
+    length=st.integers(12, 60),
+    reanchor=st.integers(0, 10),
+    steps=st.lists(st.tuples(st.integers(0, 3), st.booleans(), st.booleans()), min_size=1, max_size=12),
+)
+def test_incremental_matches_full_recompute(df, length, reanchor, steps):
+    """Sliding and growing windows, with or without a forming candle, match
+    ``calculate_all`` from their anchor, extending the state until they slide
+    more than ``reanchor`` candles past it."""
+    engine = IncrementalIndicators(CONFIGS, INTERVAL_MS, max_rows=len(df) + reanchor,
+                                   reanchor_candles=reanchor)
+    start, end = 0, min(length, len(df))
+    anchor, last_closed, seeds = None, None, 0
+    for calls, (advance, grow, forming) in enumerate(steps, start=1):
+        end = min(end + advance, len(df))
+        if not grow:
+            start = max(end - length, 0)
+        window = df.iloc[start:end]
+        last_open = int(window.index[-1].value // 1_000_000)
+        # The last candle is still forming, or just closed
+        now_ms = last_open + (INTERVAL_MS // 2 if forming else INTERVAL_MS)
+        closed = end - 1 if forming else end
+        if anchor is None or start - anchor > reanchor or closed < last_closed:
+            anchor = start
+            seeds += 1
+        last_closed = closed
+
+        assert_matches(engine.calculate(window, now_ms), df.iloc[anchor:end])
+        # Windows within reach of the anchor extend the state
+        assert engine.stats == {"seeded": seeds, "extended": calls - seeds}
+
+
+@settings(max_examples=30, deadline=None)
+@given(df=series(), length=st.integers(12, 40))
+def test_saved_state_resumes(df, length):
+    """A state saved and loaded again extends like the original."""
+    window = df.iloc[:min(length, len(df) - 1)]
+    engine = IncrementalIndicators(CONFIGS, INTERVAL_MS)
+    engine.calculate(window, int(window.index[-1].value // 1_000_000) + INTERVAL_MS)
+
+    buffer = io.BytesIO()
+    engine.save(buffer)
+    buffer.seek(0)
+    restored = IncrementalIndicators.load(buffer, CONFIGS, INTERVAL_MS)
+    assert restored is not None
+
+    grown = df.iloc[:len(window) + 1]
+    now_ms = int(grown.index[-1].value // 1_000_000) + INTERVAL_MS // 2
+    assert_matches(restored.calculate(grown, now_ms), grown)
+    assert list(restored.timestamps) == list(engine.timestamps)
+
+
+@settings(max_examples=50, deadline=None)
+@given(
+    # Enough values for the sorted blocks to split
+    values=st.lists(st.one_of(st.integers(-50, 50).map(float), st.just(float("nan"))),
+                    min_size=1, max_size=400),
+    window=st.integers(1, 300),
+)
+def test_rank_matches_rolling_rank(values, window):
+    """The bounded rank matches ``rolling(window)`` applying ``rank(pct=True)``, ties and NaN included."""
+    rank = _Rank(window)
+    ranks = [rank.next(x) for x in values]
+    peeked = rank.next(0.0, commit=False)
+
+    series = pd.Series(values + [0.0])
+    expected = series.rolling(window, min_periods=1).apply(
+        lambda x: pd.Series(x).rank(pct=True).iloc[-1], raw=True)
+    np.testing.assert_allclose(ranks + [peeked], expected.to_numpy(), rtol=1e-12)